@@ -10,17 +10,21 @@ Klassen:
 
 """
 
-import hashlib
-import json
-import os
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QDialog, QLabel, QLineEdit, QPushButton, QVBoxLayout
 
+import messung
+from benutzer import UserRepository
+from passwort_hash import HashingService
+
 
 class RegisterWindow(QDialog):
     """
     Die Klasse `RegisterWindow` repräsentiert das Registrierungsfenster der Anwendung.
 
     Attribute:
+        users (UserRepository): Die Benutzerverwaltung.
+        hasher (HashingService): Berechnet die Passwort-Hashes in einem Worker-Thread.
         username_label (QLabel): Das Label für den Benutzernamen.
         username_input (QLineEdit): Das Eingabefeld für den Benutzernamen.
         password_label (QLabel): Das Label für das Passwort.
@@ -29,20 +33,36 @@ class RegisterWindow(QDialog):
         email_input (QLineEdit): Das Eingabefeld für die E-Mail-Adresse.
         register_button (QPushButton): Der Registrieren-Button.
 
+    Signale:
+        registration_finished: Wird im GUI-Thread mit (result, error) ausgelöst, wenn die Registrierung
+            im Worker-Thread abgeschlossen ist.
+
     Methoden:
         register(): Registriert einen neuen Benutzer.
+        handle_registration_finished(result, error): Schließt die Registrierung im GUI-Thread ab.
         user_exists(username): Überprüft, ob ein Benutzer bereits existiert.
         register_user(username, password, email): Registriert einen neuen Benutzer in der Benutzerdatenbank.
         show_message(title, message): Zeigt eine Dialognachricht an.
     """
 
-    def __init__(self):
+    registration_finished = pyqtSignal(object, object)
+
+    def __init__(self, users=None, hasher=None):
         """
         Initialisiert das `RegisterWindow`.
 
         Erstellt das Registrierungsfenster mit den entsprechenden Eingabefeldern und Buttons.
+
+        Parameters:
+            users (UserRepository): Die gemeinsame Benutzerverwaltung (Standard: eine neue für users.jsonl).
+            hasher (HashingService): Der gemeinsame Hashing-Dienst (Standard: ein neuer).
         """
         super().__init__()
+        self.users = users if users is not None else UserRepository()
+        self.hasher = hasher if hasher is not None else HashingService()
+        # Die Kosten werden kalibriert, während der Benutzer das Formular ausfüllt.
+        self.hasher.warm_up()
+        self.registration_finished.connect(self.handle_registration_finished)
         self.setWindowTitle("Registrierung")
         self.setGeometry(100, 100, 300, 200)
 
@@ -83,13 +103,30 @@ class RegisterWindow(QDialog):
 
         if username and password and email:
             if not self.user_exists(username):
-                self.register_user(username, password, email)
-                self.accept()
+                self.register_button.setEnabled(False)
+                self.hasher.submit(self.register_user, username, password, email,
+                                   on_done=self.registration_finished.emit)
             else:
                 self.show_message("Registrierung fehlgeschlagen", "Benutzername bereits vergeben.")
         else:
             self.show_message("Registrierung fehlgeschlagen", "Ungültige Eingabe.")
 
+    def handle_registration_finished(self, _result, error):
+        """
+        Schließt die Registrierung im GUI-Thread ab, nachdem der Benutzer im Worker-Thread gespeichert wurde.
+
+        Parameters:
+            _result: Nicht verwendet.
+            error (Exception): Der Fehler der Registrierung oder None.
+        """
+        self.register_button.setEnabled(True)
+        if error is None:
+            self.accept()
+        elif isinstance(error, ValueError):
+            self.show_message("Registrierung fehlgeschlagen", "Benutzername bereits vergeben.")
+        else:
+            self.show_message("Registrierung fehlgeschlagen", str(error))
+
     def user_exists(self, username):
         """
         Überprüft, ob ein Benutzer bereits existiert.
@@ -100,37 +137,18 @@ class RegisterWindow(QDialog):
         Returns:
             bool: True, falls der Benutzer existiert, ansonsten False.
         """
-        if os.path.exists("users.json"):
-            with open("users.json", "r") as file:
-                users = json.load(file)
-                return username in users
-        return False
+        return self.users.user_exists(username)
 
     def register_user(self, username, password, email):
         """
-        Registriert einen neuen Benutzer in der Benutzerdatenbank.
+        Registriert einen neuen Benutzer in der Benutzerdatenbank. Blockiert für die Dauer des Hashes.
 
         Parameters:
             username (str): Der Benutzername.
             password (str): Das Passwort.
             email (str): Die E-Mail-Adresse.
         """
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        user_data = {
-            "username": username,
-            "password": hashed_password,
-            "email": email
-        }
-
-        if os.path.exists("users.json"):
-            with open("users.json", "r") as file:
-                users = json.load(file)
-                users.append(user_data)
-        else:
-            users = [user_data]
-
-        with open("users.json", "w") as file:
-            json.dump(users, file)
+        self.users.register_user(username, password, email)
 
     def show_message(self, title, message):
         """
@@ -168,6 +186,8 @@ class LoginWindow(QDialog):
     Die Klasse `LoginWindow` repräsentiert das Anmeldungs-Fenster der Anwendung.
 
     Attribute:
+        users (UserRepository): Die Benutzerverwaltung, die auch das Registrierungsfenster verwendet.
+        hasher (HashingService): Prüft die Passwörter in einem Worker-Thread.
         username_label (QLabel): Das Label für den Benutzernamen.
         username_input (QLineEdit): Das Eingabefeld für den Benutzernamen.
         password_label (QLabel): Das Label für das Passwort.
@@ -175,23 +195,36 @@ class LoginWindow(QDialog):
         login_button (QPushButton): Der Anmelden-Button.
         register_button (QPushButton): Der Registrieren-Button.
 
+    Signale:
+        password_checked: Wird im GUI-Thread mit (result, error) ausgelöst, wenn die Passwortprüfung
+            im Worker-Thread abgeschlossen ist.
+
     Methoden:
         login(): Führt den Anmeldevorgang aus.
+        handle_password_checked(result, error): Schließt die Anmeldung im GUI-Thread ab.
         register(): Öffnet das Registrierungsfenster.
         user_exists(username): Überprüft, ob ein Benutzer bereits existiert.
         check_password(username, password): Überprüft das eingegebene Passwort für den angegebenen Benutzer.
         show_message(title, message): Zeigt eine Dialognachricht an.
     """
     logged_in = False
+    password_checked = pyqtSignal(object, object)
 
-    def __init__(self):
+    def __init__(self, users=None, hasher=None):
         """
         Initialisiert das `LoginWindow`.
 
         Erstellt das Anmeldungs-Fenster mit den entsprechenden Eingabefeldern und Buttons.
+
+        Parameters:
+            users (UserRepository): Die Benutzerverwaltung (Standard: eine neue für users.jsonl).
+            hasher (HashingService): Der Hashing-Dienst (Standard: ein neuer).
         """
 
         super().__init__()
+        self.users = users if users is not None else UserRepository()
+        self.hasher = hasher if hasher is not None else HashingService()
+        self.password_checked.connect(self.handle_password_checked)
 
         self.setWindowTitle("Anmeldung")
         self.setGeometry(100, 100, 300, 200)
@@ -234,16 +267,34 @@ class LoginWindow(QDialog):
 
         if self.username and self.password:
             if self.user_exists(self.username):
-                if self.check_password(self.username, self.password):
-                    self.accept()
-                    self.logged_in = True
-                else:
-                    self.show_message("Anmeldung fehlgeschlagen", "Falsches Passwort.")
+                # Die Prüfung ist bewusst langsam und läuft daher im Worker-Thread.
+                self.login_button.setEnabled(False)
+                self.register_button.setEnabled(False)
+                self.hasher.submit(self.check_password, self.username, self.password,
+                                   on_done=self.password_checked.emit)
             else:
                 self.show_message("Anmeldung fehlgeschlagen", "Benutzer existiert nicht.")
         else:
             self.show_message("Anmeldung fehlgeschlagen", "Ungültige Eingabe.")
 
+    def handle_password_checked(self, correct, error):
+        """
+        Schließt die Anmeldung im GUI-Thread ab, nachdem das Passwort im Worker-Thread geprüft wurde.
+
+        Parameters:
+            correct (bool): Ob das Passwort korrekt ist.
+            error (Exception): Der Fehler der Prüfung oder None.
+        """
+        self.login_button.setEnabled(True)
+        self.register_button.setEnabled(True)
+        if error is not None:
+            self.show_message("Anmeldung fehlgeschlagen", str(error))
+        elif correct:
+            self.accept()
+            self.logged_in = True
+        else:
+            self.show_message("Anmeldung fehlgeschlagen", "Falsches Passwort.")
+
     def register(self):
         """
         Öffnet das Registrierungsfenster.
@@ -251,7 +302,7 @@ class LoginWindow(QDialog):
         Öffnet das Registrierungsfenster und erfasst die eingegebenen Daten,
         wenn die Registrierung erfolgreich ist.
         """
-        register_window = RegisterWindow()
+        register_window = RegisterWindow(self.users, self.hasher)
         if register_window.exec_() == QDialog.Accepted:
             self.username = register_window.username_input.text()
             self.password = register_window.password_input.text()
@@ -267,15 +318,12 @@ class LoginWindow(QDialog):
         Returns:
             bool: True, falls der Benutzer existiert, ansonsten False.
         """
-        if os.path.exists("users.json"):
-            with open("users.json", "r") as file:
-                users = json.load(file)
-                return any(user["username"] == username for user in users)
-        return False
+        return self.users.user_exists(username)
 
+    @messung.timed("anmeldung.passwort_pruefen")
     def check_password(self, username, password):
         """
-        Überprüft das eingegebene Passwort für den angegebenen Benutzer.
+        Überprüft das eingegebene Passwort für den angegebenen Benutzer. Blockiert für die Dauer des Hashes.
 
         Parameters:
             username (str): Der Benutzername.
@@ -284,12 +332,7 @@ class LoginWindow(QDialog):
         Returns:
             bool: True, falls das Passwort korrekt ist, ansonsten False.
         """
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        if os.path.exists("users.json"):
-            with open("users.json", "r") as file:
-                users = json.load(file)
-                return any(user["username"] == username and user["password"] == hashed_password for user in users)
-        return False
+        return self.users.check_password(username, password)
 
     def show_message(self, title, message):
         """
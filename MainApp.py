@@ -5,20 +5,30 @@ MainApp Modul:
 
 Dieses Modul enthält die `MainApp`-Klasse, die das Hauptfenster der Anwendung darstellt.
 
+Damit der Anmeldedialog schnell erscheint, werden nur PyQt5 und das Anmeldefenster beim Start importiert. Die
+Module der Automatisierung und des Passwortmanagers werden erst beim ersten Klick auf den jeweiligen Button
+geladen; der Passworttresor wird ebenfalls erst dann entsperrt, und zwar im Worker-Thread des Hashing-Dienstes,
+da die Schlüsselableitung mit scrypt die Ereignisschleife sonst spürbar blockieren würde. Sobald das Hauptfenster angezeigt wird und
+die Ereignisschleife nichts zu tun hat, werden die Module schrittweise im Voraus importiert.
+
 Klassen:
 - MainApp: Das Hauptfenster der Anwendung.
 
 """
 
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QDialog
-from LoginWindow import LoginWindow
-from passwortmanager import PasswordManagerApp, PasswordManager
-from automatisierung import AutomatisierungApp
+import importlib
 import faulthandler
+import messung
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QDialog, QMessageBox
+from LoginWindow import LoginWindow
 
 # Fehlerprotokolldetails anzuzeigen.
 faulthandler.enable()
 
+# Module, die nach dem Anzeigen des Hauptfensters im Leerlauf vorab importiert werden.
+WARM_UP_MODULES = ["automatisierung", "passwortmanager"]
+
 
 class MainApp(QMainWindow):
     """
@@ -26,18 +36,22 @@ class MainApp(QMainWindow):
 
     Attribute:
         login_window (LoginWindow): Das Anmeldefenster.
-        password_manager (PasswordManager): Der Passwortmanager.
+        password_manager (PasswordManager): Der Passwortmanager; wird beim ersten Öffnen geladen.
 
     Signale:
         automatisierung_app_closed: Signal, das ausgelöst wird, wenn das Automatisierungsfenster geschlossen wird.
         passwortmanager_app_closed: Signal, das ausgelöst wird, wenn das Passwortmanagerfenster geschlossen wird.
+        password_manager_loaded: Signal mit dem entsperrten Passwortmanager und dem Fehler (oder None).
     """
 
+    password_manager_loaded = pyqtSignal(object, object)
+
     def __init__(self):
         """
         Initialisiert die `MainApp`.
 
-        Erstellt das Hauptfenster, lädt den Passwortmanager und zeigt die Login-Dialogbox an.
+        Erstellt das Hauptfenster und zeigt die Login-Dialogbox an. Der Passwortmanager wird erst beim
+        ersten Öffnen geladen.
         """
         super().__init__()
         self.setWindowTitle("Hauptfenster")
@@ -57,16 +71,117 @@ class MainApp(QMainWindow):
         layout.addWidget(button1)
         layout.addWidget(button2)
 
+        self._warm_up_modules = list(WARM_UP_MODULES)
+        self._shown = False
         self.login_window = LoginWindow()
-        if self.login_window.exec_() != QDialog.Accepted:
+        messung.mark("start.anmeldedialog")
+        with messung.span("anmeldung.dialog"):
+            accepted = self.login_window.exec_()
+        if accepted != QDialog.Accepted:
             self.close()
             return
 
-        self.password_manager = PasswordManager("passwords.json")
-        self.password_manager.load_passwords_from_file()
-
+        self.password_manager = None
+        self._loading_password_manager = False
         self.automatisierung_app = None
         self.passwortmanager_app = None
+        self.password_manager_loaded.connect(self.handle_password_manager_loaded)
+
+    def showEvent(self, event):
+        """
+        Startet nach dem Anzeigen des Hauptfensters das Vorab-Importieren im Leerlauf.
+        """
+        super().showEvent(event)
+        if not self._shown:
+            self._shown = True
+            messung.mark("start.hauptfenster")
+        if self._warm_up_modules:
+            QTimer.singleShot(0, self.warm_up_next_module)
+
+    def warm_up_next_module(self):
+        """
+        Importiert ein weiteres Modul im Voraus. Pro Aufruf wird nur ein Modul importiert, damit
+        Benutzereingaben zwischen den Importen verarbeitet werden.
+        """
+        if self._warm_up_modules:
+            importlib.import_module(self._warm_up_modules.pop(0))
+        if self._warm_up_modules:
+            QTimer.singleShot(0, self.warm_up_next_module)
+
+    def load_password_manager(self):
+        """
+        Lädt beim ersten Aufruf den Passwortmanager des angemeldeten Benutzers.
+
+        Das Entsperren (scrypt, beim ersten Mal mit Kalibrierung) und das Einspielen des Logs laufen im
+        Worker-Thread des Hashing-Dienstes; das Ergebnis wird über das Signal `password_manager_loaded`
+        zugestellt. Weitere Aufrufe während des Ladens werden ignoriert.
+        """
+        if self.password_manager is not None or self._loading_password_manager:
+            return
+        from passwortmanager import PasswordManager
+        from tresor import vault_path_for
+
+        self._loading_password_manager = True
+        self.statusBar().showMessage("Passworttresor wird entsperrt...")
+        # Jeder Benutzer hat einen eigenen Tresor, dessen Schlüssel aus seinem Anmeldepasswort abgeleitet wird.
+        password_manager = PasswordManager(vault_path_for(self.login_window.username),
+                                           legacy_filename="passwords.json")
+        self.login_window.hasher.submit(self._unlock_password_manager, password_manager, self.login_window.password,
+                                        on_done=self.password_manager_loaded.emit)
+
+    @staticmethod
+    def _unlock_password_manager(password_manager, master_password):
+        """
+        Entsperrt den Tresor und lädt die Passwörter (im Worker-Thread).
+        """
+        with messung.span("passwortmanager.laden"):
+            try:
+                password_manager.unlock(master_password)
+                password_manager.load_passwords_from_file()
+            except BaseException:
+                password_manager.close()
+                raise
+        return password_manager
+
+    def handle_password_manager_loaded(self, password_manager, error):
+        """
+        Übernimmt den im Hintergrund entsperrten Passwortmanager und öffnet das Passwortmanagerfenster.
+
+        Args:
+            password_manager (PasswordManager): Der entsperrte Passwortmanager oder None.
+            error (Exception): Der Fehler beim Entsperren oder None.
+        """
+        self._loading_password_manager = False
+        self.statusBar().clearMessage()
+        if error is not None:
+            QMessageBox.warning(self, "Passwortmanager", f"Der Passworttresor konnte nicht geöffnet werden: {error}")
+            return
+        self.password_manager = password_manager
+        self.offer_legacy_import()
+        self.open_passwortmanager_app()
+
+    def offer_legacy_import(self):
+        """
+        Fragt nach, ob die alte unverschlüsselte passwords.json in den Tresor des angemeldeten Benutzers
+        übernommen werden soll. Die Datei gehört keinem Benutzer; lehnt der Benutzer ab, bleibt sie für die
+        anderen Benutzer liegen, und beim nächsten Laden wird erneut gefragt.
+        """
+        count = self.password_manager.legacy_password_count()
+        if not count:
+            return
+        answer = QMessageBox.question(
+            self, "Alte Passwörter übernehmen",
+            f"Die alte unverschlüsselte Datei {self.password_manager.legacy_filename} enthält {count} Passwörter.\n\n"
+            f"Sollen sie in den Tresor von {self.login_window.username} übernommen werden? Die Datei wird danach "
+            f"gelöscht und steht anderen Benutzern nicht mehr zur Verfügung.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            return
+        try:
+            self.password_manager.import_legacy_passwords()
+        except (OSError, ValueError) as error:
+            QMessageBox.warning(self, "Alte Passwörter übernehmen",
+                                f"Die Passwörter konnten nicht übernommen werden: {error}")
 
     def open_automatisierung_app(self):
         """
@@ -77,7 +192,10 @@ class MainApp(QMainWindow):
         """
         if self.login_window.logged_in:
             if not self.automatisierung_app:
-                self.automatisierung_app = AutomatisierungApp()
+                with messung.span("automatisierung.init"):
+                    from automatisierung import AutomatisierungApp
+
+                    self.automatisierung_app = AutomatisierungApp()
                 self.automatisierung_app.closed.connect(self.close_automatisierung_app)
             self.automatisierung_app.show()
 
@@ -94,10 +212,16 @@ class MainApp(QMainWindow):
         Öffnet das Passwortmanagerfenster.
 
         Wenn das Passwortmanagerfenster noch nicht geöffnet ist, wird eine neue Instanz erstellt
-        und das `closed`-Signal mit der Methode `close_passwortmanager_app` verbunden.
+        und das `closed`-Signal mit der Methode `close_passwortmanager_app` verbunden. Ist der Passworttresor
+        noch nicht entsperrt, wird er zuerst im Hintergrund entsperrt; das Fenster öffnet sich danach.
         """
         if self.login_window.logged_in:
+            if self.password_manager is None:
+                self.load_password_manager()
+                return
             if not self.passwortmanager_app:
+                from passwortmanager import PasswordManagerApp
+
                 self.passwortmanager_app = PasswordManagerApp(self.password_manager)
                 self.passwortmanager_app.closed.connect(self.close_passwortmanager_app)
             self.passwortmanager_app.show()
@@ -113,6 +237,7 @@ class MainApp(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication([])
+    messung.mark("start.qapplication")
     window = MainApp()
     window.show()
     app.exec_()
@@ -2,14 +2,21 @@
 Author: Taha Al-Bukhaiti
 """
 import os
-import shutil
 import subprocess
 import sys
 
-from PyQt5.QtCore import QDateTime, Qt, pyqtSignal
-from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox
+from PyQt5.QtCore import QDateTime, QSize, Qt, QSocketNotifier, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QHeaderView, QTableView, QMessageBox
 from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QWidget
 
+from automatisierungskern import LEGACY_TARGET_DIR, AutomationCore
+from modelle import MovedFilesModel
+from verschiebung import DEFAULT_MAX_WORKERS
+from vorschau import THUMBNAIL_SIZE, ThumbnailService
+from zeitplaner import STATUS_OK, STATUS_SKIPPED, Scheduler
+
+HISTORY_PAGE_SIZE = 200
+
 
 class AutomatisierungApp(QMainWindow):
     """
@@ -17,29 +24,57 @@ class AutomatisierungApp(QMainWindow):
 
     Die Anwendung überwacht den Downloads-Ordner auf neue Fotos und verschiebt sie in den Zielordner.
     Sie zeigt eine Tabelle mit den verschobenen Dateien und ermöglicht das Öffnen der Dateien.
+
+    Signale:
+        closed: Signal, das ausgelöst wird, wenn das Fenster geschlossen wird.
+        file_moved: Signal mit Verlaufs-ID, Dateiname, Zielpfad und Zeitpunkt, sobald eine Verschiebung im Verlauf steht.
+        move_failed: Signal mit Dateiname und Fehlermeldung, wenn eine Verschiebung fehlschlägt.
+        move_progress: Signal mit der Anzahl abgeschlossener und eingeplanter Verschiebungen des aktuellen Stapels.
+        task_finished: Signal mit Name, Status und Meldung, sobald eine geplante Aufgabe beendet ist.
+        history_failed: Signal mit der Fehlermeldung, wenn der Verlauf nicht geschrieben werden kann.
     """
 
     closed = pyqtSignal()
+    file_moved = pyqtSignal(int, str, str, float)
+    move_failed = pyqtSignal(str, str)
+    move_progress = pyqtSignal(int, int)
+    task_finished = pyqtSignal(str, str, str)
+    history_failed = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, move_workers=DEFAULT_MAX_WORKERS, durable_history=False):
         """
         Initialisiert die AutomatisierungApp.
 
-        Erstellt und konfiguriert das Hauptfenster, erstellt das Table Widget für die Anzeige der verschobenen Dateien,
+        Erstellt und konfiguriert das Hauptfenster, erstellt die Tabelle für die Anzeige der verschobenen Dateien,
         lädt die zuvor verschobenen Dateien und überwacht den Downloads-Ordner für neue Fotos.
+
+        Args:
+            move_workers (int): Die maximale Anzahl gleichzeitiger Verschiebungen im Hintergrund.
+            durable_history (bool): Ob jeder Commit des Verlaufs mit fsync gesichert wird.
         """
         super().__init__()
         self.setWindowTitle("Automatisierung")
         self.setGeometry(100, 100, 500, 500)
 
-        self.table_widget = QTableWidget(self)
-        self.table_widget.setGeometry(10, 10, 480, 480)
-        self.table_widget.setColumnCount(2)
-        self.table_widget.setHorizontalHeaderLabels(["Dateiname", "Verschiebungszeitpunkt"])
-        self.table_widget.itemDoubleClicked.connect(self.open_file)
+        # Der Kern ruft seine Callbacks in Hintergrund-Threads auf; die Signale übertragen die Ergebnisse in den GUI-Thread.
+        self.core = AutomationCore(move_workers=move_workers, durable_history=durable_history,
+                                   on_moved=self.handle_history_committed, on_failed=self.move_failed.emit,
+                                   on_progress=self.move_progress.emit,
+                                   on_history_error=lambda error: self.history_failed.emit(str(error)))
+        self.thumbnails = ThumbnailService(parent=self)
+        self.moved_files_model = MovedFilesModel(self.core.history, HISTORY_PAGE_SIZE, self, self.thumbnails)
+
+        self.table_view = QTableView(self)
+        self.table_view.setGeometry(10, 10, 480, 480)
+        self.table_view.setModel(self.moved_files_model)
+        # Feste Zeilenhöhen ersparen der Ansicht das Ausmessen jeder einzelnen Zeile.
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(THUMBNAIL_SIZE + 4)
+        self.table_view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.table_view.doubleClicked.connect(self.open_file)
 
         layout = QVBoxLayout()
-        layout.addWidget(self.table_widget)
+        layout.addWidget(self.table_view)
 
         central_widget = QWidget()
         central_widget.setLayout(layout)
@@ -47,61 +82,195 @@ class AutomatisierungApp(QMainWindow):
 
         self.show()
 
+        self.file_moved.connect(self.moved_files_model.add_moved_file)
+        self.file_moved.connect(self.prefetch_thumbnail)
+        self.move_failed.connect(self.show_move_error)
+        self.move_progress.connect(self.show_move_progress)
+        self.task_finished.connect(self.show_task_result)
+        self.history_failed.connect(self.show_history_error)
+
         self.load_moved_files()
         self.watch_downloads_fotos()
+        self.start_scheduler()
 
     def watch_downloads_fotos(self):
         """
-        Überwacht den Downloads-Ordner auf neue Fotos und verschiebt sie in den Zielordner.
+        Überwacht die Quellordner der Regeln (standardmäßig den Downloads-Ordner) und verschiebt neue Dateien.
+
+        Verschiebt zunächst die bereits vorhandenen Dateien und startet dann den Watcher. Unter Linux
+        meldet inotify neue Dateien über einen QSocketNotifier, ansonsten werden die Ordner per QTimer abgefragt.
+        Gemeldete Dateien werden erst verschoben, wenn sie fertig geschrieben sind; dafür genügt ein einziger
+        QTimer, der nur läuft, solange Dateien warten.
+        """
+        # Der Watcher wird vor dem ersten Durchlauf gestartet, damit keine Datei dazwischen verloren geht.
+        watcher = self.core.start_watching()
+        self.watcher_notifier = None
+        self.watcher_timer = None
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.timeout.connect(self.process_settled_files)
+        fd = watcher.fileno()
+        if fd is not None:
+            self.watcher_notifier = QSocketNotifier(fd, QSocketNotifier.Read, self)
+            self.watcher_notifier.activated.connect(self.handle_watcher_changes)
+        else:
+            self.watcher_timer = QTimer(self)
+            self.watcher_timer.timeout.connect(self.handle_watcher_changes)
+            self.watcher_timer.start(watcher.poll_interval)
+
+        self.core.sweep()
+        self.arm_settle_timer()
+
+    def handle_watcher_changes(self):
+        """
+        Merkt die vom Watcher gemeldeten Dateien vor und stellt den Timer für ihre Prüfung.
+        """
+        self.core.handle_watcher_changes()
+        self.arm_settle_timer()
 
-        Aktualisiert die Tabelle der verschobenen Dateien in der GUI.
+    def process_settled_files(self):
         """
-        downloads_dir = os.path.expanduser("~/Downloads")
-        target_dir = os.path.expanduser("~/Documents/Bilder")
+        Verschiebt die fertig geschriebenen Dateien und stellt den Timer für die nächste Prüfung.
+        """
+        self.core.process_settled()
+        self.arm_settle_timer()
 
-        for filename in os.listdir(downloads_dir):
-            if filename.lower().endswith(".jpg") or filename.lower().endswith(".heic") \
-                    or filename.lower().endswith(".jpeg") or filename.lower().endswith(".png"):
-                file_path = os.path.join(downloads_dir, filename)
-                target_path = os.path.join(target_dir, filename)
-                shutil.move(file_path, target_path)
+    def arm_settle_timer(self):
+        """
+        Stellt den Timer auf die nächste fällige Prüfung oder hält ihn an, wenn keine Datei wartet.
+        """
+        timeout = self.core.next_timeout()
+        if timeout is None:
+            self.settle_timer.stop()
+        else:
+            self.settle_timer.start(int(timeout * 1000) + 1)
 
-                timestamp = QDateTime.currentDateTime().toString(Qt.DefaultLocaleLongDate)
-                row_count = self.table_widget.rowCount()
-                self.table_widget.insertRow(row_count)
-                self.table_widget.setItem(row_count, 0, QTableWidgetItem(filename))
-                self.table_widget.setItem(row_count, 1, QTableWidgetItem(timestamp))
-                self.save_moved_file(filename, timestamp)
+    def start_scheduler(self):
+        """
+        Startet die geplanten Aufgaben aus aufgaben.json.
 
-        self.adjust_table_columns()
+        Alle Aufgaben teilen sich einen einzigen QTimer, der auf die nächste fällige Aufgabe gestellt wird; die
+        Aufgaben selbst laufen im Thread-Pool des Zeitplaners.
+        """
+        self.scheduler = Scheduler(on_finished=self.task_finished.emit)
+        self.scheduler_timer = QTimer(self)
+        self.scheduler_timer.setSingleShot(True)
+        self.scheduler_timer.timeout.connect(self.run_due_tasks)
+        self.arm_scheduler_timer()
 
-    def save_moved_file(self, filename, timestamp):
+    def run_due_tasks(self):
         """
-        Speichert den Dateinamen und den Zeitstempel einer verschobenen Datei in einer Textdatei.
+        Startet die fälligen Aufgaben und stellt den Timer auf die nächste.
+        """
+        self.scheduler.run_due()
+        self.arm_scheduler_timer()
+
+    def arm_scheduler_timer(self):
+        """
+        Stellt den Timer auf die nächste fällige Aufgabe oder hält ihn an, wenn keine Aufgabe eingeplant ist.
+        """
+        timeout = self.scheduler.next_timeout()
+        if timeout is None:
+            self.scheduler_timer.stop()
+        else:
+            self.scheduler_timer.start(int(timeout * 1000) + 1)
+
+    def show_task_result(self, name, status, message):
+        """
+        Zeigt das Ergebnis einer geplanten Aufgabe in der Statusleiste an.
+
+        Args:
+            name (str): Der Name der Aufgabe.
+            status (str): Der Status der Ausführung.
+            message (str): Die Meldung der Aufgabe bzw. der Fehler.
+        """
+        if status == STATUS_SKIPPED:
+            return
+        if status == STATUS_OK:
+            self.statusBar().showMessage(f"{name}: {message}" if message else f"{name} ausgeführt", 5000)
+        else:
+            self.statusBar().showMessage(f"{name} fehlgeschlagen: {message}")
+
+    def handle_history_committed(self, entries):
+        """
+        Meldet die geschriebenen Verlaufseinträge im Schreib-Thread per Signal an die Tabelle.
+
+        Args:
+            entries (list): Tupel (id, filename, target_path, moved_at) der geschriebenen Einträge.
+        """
+        for entry in entries:
+            self.file_moved.emit(*entry)
+
+    def prefetch_thumbnail(self, _entry_id, _filename, target_path, _moved_at):
+        """
+        Plant das Vorschaubild einer gerade verschobenen Datei ein, damit es bereitsteht, wenn die Zeile angezeigt wird.
 
         Args:
-            filename (str): Der Name der verschobenen Datei.
-            timestamp (str): Der Zeitstempel der Verschiebung.
+            target_path (str): Der Zielpfad der verschobenen Datei.
         """
-        with open("moved_files.txt", "a") as file:
-            file.write(f"{filename},{timestamp}\n")
+        if target_path:
+            self.thumbnails.request(target_path)
+
+    def show_move_error(self, filename, message):
+        """
+        Zeigt einen Fehler beim Verschieben in der Statusleiste an.
+
+        Args:
+            filename (str): Der Name der Datei.
+            message (str): Die Fehlermeldung.
+        """
+        self.statusBar().showMessage(f"{filename} konnte nicht verschoben werden: {message}")
+
+    def show_history_error(self, message):
+        """
+        Zeigt in der Statusleiste an, dass der Verlauf nicht geschrieben werden konnte.
+
+        Args:
+            message (str): Die Fehlermeldung.
+        """
+        self.statusBar().showMessage(f"Verlauf konnte nicht gespeichert werden (neuer Versuch folgt): {message}")
+
+    def show_move_progress(self, completed, total):
+        """
+        Zeigt den Fortschritt des aktuellen Verschiebe-Stapels in der Statusleiste an.
+
+        Args:
+            completed (int): Die Anzahl abgeschlossener Verschiebungen.
+            total (int): Die Anzahl eingeplanter Verschiebungen.
+        """
+        self.statusBar().showMessage(f"{completed} von {total} Dateien verschoben", 3000)
 
     def load_moved_files(self):
         """
-        Lädt die zuvor verschobenen Dateien aus der Textdatei und aktualisiert die Tabelle in der GUI.
+        Lädt die zuletzt verschobenen Dateien aus dem Verlauf und aktualisiert die Tabelle in der GUI.
+
+        Eine vorhandene moved_files.txt wird dabei einmalig in den Verlauf übernommen. Es wird nur die
+        neueste Seite des Verlaufs geladen; ältere Seiten lädt das Modell erst beim Scrollen nach.
         """
-        if os.path.exists("moved_files.txt"):
-            with open("moved_files.txt", "r") as file:
-                moved_files = file.readlines()
-                for moved_file in moved_files:
-                    filename, timestamp = moved_file.strip().split(",")
-                    row_count = self.table_widget.rowCount()
-                    self.table_widget.insertRow(row_count)
-                    self.table_widget.setItem(row_count, 0, QTableWidgetItem(filename))
-                    self.table_widget.setItem(row_count, 1, QTableWidgetItem(timestamp))
+        self.core.import_legacy_history(parse_timestamp)
+
+        if self.moved_files_model.canFetchMore():
+            self.moved_files_model.fetchMore()
 
         self.adjust_table_columns()
 
+    def closeEvent(self, event):
+        """
+        Behandelt das Ereignis des Schließens des Fensters.
+        Beendet die Ordnerüberwachung, sendet das Signal `closed` aus und akzeptiert das Ereignis.
+        """
+        if self.watcher_notifier is not None:
+            self.watcher_notifier.setEnabled(False)
+        if self.watcher_timer is not None:
+            self.watcher_timer.stop()
+        self.settle_timer.stop()
+        self.scheduler_timer.stop()
+        self.scheduler.shutdown(wait=False)
+        self.core.stop()
+        self.thumbnails.shutdown()
+        self.closed.emit()
+        event.accept()
+
     def resizeEvent(self, event):
         """
         Behandelt das Resize-Event des Hauptfensters und passt die Spaltenbreite der Tabelle an.
@@ -114,24 +283,24 @@ class AutomatisierungApp(QMainWindow):
 
     def adjust_table_columns(self):
         """
-        Passt die Spaltenbreite der Tabelle basierend auf der Breite des Table Widgets an.
+        Passt die Spaltenbreite der Tabelle basierend auf der Breite der Tabellenansicht an.
         """
-        table_width = self.table_widget.viewport().width()
-        self.table_widget.setColumnWidth(0, int(table_width * 0.7))
-        self.table_widget.setColumnWidth(1, int(table_width * 0.3))
+        table_width = self.table_view.viewport().width()
+        self.table_view.setColumnWidth(0, int(table_width * 0.7))
+        self.table_view.setColumnWidth(1, int(table_width * 0.3))
 
-    def open_file(self, item):
+    def open_file(self, index):
         """
         Öffnet die ausgewählte Datei.
 
         Args:
-            item (QTableWidgetItem): Das ausgewählte Element in der Tabelle.
+            index (QModelIndex): Der Index der ausgewählten Zelle in der Tabelle.
         """
-        filename_item = self.table_widget.item(item.row(), 0)
-        if filename_item:
-            filename = filename_item.text()
-            target_dir = os.path.expanduser("~/Documents/Bilder")
-            file_path = os.path.join(target_dir, filename)
+        if index.isValid():
+            file_path = self.moved_files_model.target_path(index.row())
+            if not file_path:
+                filename = self.moved_files_model.index(index.row(), 0).data()
+                file_path = os.path.join(os.path.expanduser(LEGACY_TARGET_DIR), filename)
             if os.path.exists(file_path):
                 if sys.platform == 'win32':
                     os.startfile(file_path)  # Öffnet die Datei unter Windows
@@ -143,17 +312,43 @@ class AutomatisierungApp(QMainWindow):
                 QMessageBox.warning(self, "Datei nicht gefunden", "Die Datei konnte nicht gefunden werden.")
 
 
+def parse_timestamp(text):
+    """
+    Wandelt einen Zeitstempel im langen Datumsformat der Systemsprache in Sekunden seit der Epoche um.
+
+    Args:
+        text (str): Der Zeitstempel, wie er in moved_files.txt gespeichert wurde.
+
+    Returns:
+        float: Der Zeitpunkt in Sekunden seit der Epoche oder None, falls der Text ungültig ist.
+    """
+    date_time = QDateTime.fromString(text, Qt.DefaultLocaleLongDate)
+    if not date_time.isValid():
+        return None
+    return date_time.toMSecsSinceEpoch() / 1000
+
+
 """
 Die verwendeten Bibliotheken, APIs und Module sind:
 
 - os: Eine Python-Bibliothek, die Funktionen für die Interaktion mit dem Betriebssystem bereitstellt, z. B. Datei- und Ordneroperationen.
 
-- shutil: Eine Python-Bibliothek, die Funktionen zum Kopieren, Verschieben und Löschen von Dateien und Ordnern bereitstellt.
-
 - subprocess: Eine Python-Bibliothek, mit der externe Prozesse gestartet und gesteuert werden können, z. B. das Öffnen von Dateien mit dem Standardprogramm.
 
 - sys: Ein Modul, das Funktionen und Variablen zur Interaktion mit dem Python-Interpreter bereitstellt, z. B. System-spezifische Parameter und Funktionen.
 
+- automatisierungskern: Das Modul des Qt-unabhängigen Kerns, der Regeln, Ordnerüberwachung, Verschiebe-Engine,
+  Duplikat-Index und Verlauf verbindet und auch vom Hintergrunddienst verwendet wird.
+
+- modelle: Das Modul der Qt-Tabellenmodelle, die den Verlauf seitenweise und ohne Widgets pro Zeile anzeigen.
+
+- vorschau: Das Modul der Vorschaubilder, die in Worker-Prozessen erzeugt und auf der Festplatte zwischengespeichert werden.
+
+- verschiebung: Das Modul der Verschiebe-Engine, aus dem die Standardzahl der parallelen Verschiebungen übernommen wird.
+
+- zeitplaner: Das Modul des Zeitplaners, der die geplanten Aufgaben aus aufgaben.json in einem Thread-Pool ausführt;
+  das Fenster stellt dafür einen QTimer auf die nächste fällige Aufgabe und zeigt die Ergebnisse in der Statusleiste.
+
 - PyQt5.QtCore: Ein Modul von PyQt5, das die Kernfunktionalität von Qt enthält, einschließlich Datentypen, Signalen und Slots sowie Ereignisverarbeitung.
 
 - PyQt5.QtWidgets: Ein Modul von PyQt5, das die Widgets und Funktionen für die Erstellung von GUI-Anwendungen bereitstellt, z. B. Fenster, Layouts und Steuerelemente.
@@ -162,7 +357,7 @@ Die verwendeten APIs sind:
 
 PyQt5 API: Eine API für die Entwicklung von GUI-Anwendungen unter Verwendung von PyQt5, einer Python-Bindung für das Qt-Framework.
 Zusammen bieten diese Bibliotheken, APIs und Module die erforderlichen Funktionen zum Erstellen des Hauptfensters, 
-des Table Widgets, zum Überwachen von Ordnern, zum Verschieben von Dateien, zum Anzeigen von Dateien in der Tabelle 
+der Tabellenansicht, zum Überwachen von Ordnern, zum Verschieben von Dateien, zum Anzeigen von Dateien in der Tabelle 
 und zum Öffnen von Dateien mit dem Standardprogramm des Betriebssystems.
 
 """
@@ -0,0 +1,175 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Automatisierungsdienst Modul:
+
+Dieses Modul startet die Downloads-Automatisierung ohne GUI als schlanken Hintergrunddienst. Es verwendet
+denselben Kern (`AutomationCore`) wie die `AutomatisierungApp`, importiert aber kein PyQt5.
+
+Aufruf:
+    python -m automatisierungsdienst [--rules regeln.json] [--history verlauf.db] [--tasks aufgaben.json]
+                                     [--workers 4] [--durable] [--once]
+
+Signale:
+- SIGTERM, SIGINT: Laufende Verschiebungen abschließen, Verlauf schreiben und beenden.
+- SIGHUP: Die Regeldatei und die Aufgabendatei neu laden.
+
+Unter systemd (Type=notify) meldet der Dienst über NOTIFY_SOCKET, wann er bereit ist und wann er sich beendet.
+
+Funktionen:
+- main(argv): Startet den Dienst.
+"""
+import argparse
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+from automatisierungskern import AutomationCore
+from duplikate import DEFAULT_DEDUP_FILE
+from regeln import DEFAULT_RULES_FILE
+from verlauf import DEFAULT_HISTORY_FILE
+from verschiebung import DEFAULT_MAX_WORKERS
+from zeitplaner import DEFAULT_TASKS_FILE, STATUS_FAILED, Scheduler
+
+logger = logging.getLogger("automatisierungsdienst")
+
+
+def notify_systemd(state):
+    """
+    Sendet eine Statusmeldung an systemd, falls der Dienst unter systemd mit Type=notify läuft.
+
+    Args:
+        state (str): Die Meldung, z. B. "READY=1" oder "STOPPING=1".
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as notify_socket:
+            notify_socket.sendto(state.encode(), address)
+    except OSError as error:
+        logger.warning("systemd-Benachrichtigung fehlgeschlagen: %s", error)
+
+
+def parse_arguments(argv):
+    """
+    Liest die Kommandozeilenargumente.
+    """
+    parser = argparse.ArgumentParser(prog="automatisierungsdienst",
+                                     description="Downloads-Automatisierung als Hintergrunddienst ohne GUI.")
+    parser.add_argument("--rules", default=DEFAULT_RULES_FILE, help="Pfad der Regeldatei")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_FILE, help="Pfad der Verlaufsdatenbank")
+    parser.add_argument("--dedup", default=DEFAULT_DEDUP_FILE, help="Pfad der Datenbank des Duplikat-Index")
+    parser.add_argument("--tasks", default=DEFAULT_TASKS_FILE, help="Pfad der Datei mit den geplanten Aufgaben")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Gleichzeitige Verschiebungen")
+    parser.add_argument("--durable", action="store_true", help="Jeden Commit des Verlaufs mit fsync sichern")
+    parser.add_argument("--once", action="store_true",
+                        help="Nur einmal die Quellordner abarbeiten und beenden (ohne geplante Aufgaben)")
+    parser.add_argument("--verbose", action="store_true", help="Jede Verschiebung protokollieren")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Startet den Dienst und wartet ereignisgesteuert auf neue Dateien, bis SIGTERM oder SIGINT eintrifft.
+
+    Args:
+        argv (list): Die Kommandozeilenargumente (Standard: sys.argv[1:]).
+
+    Returns:
+        int: Der Exit-Code.
+    """
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(name)s: %(levelname)s: %(message)s", stream=sys.stderr)
+
+    def log_moved(entries):
+        for _entry_id, filename, target_path, _moved_at in entries:
+            logger.info("%s -> %s", filename, target_path)
+
+    def log_failed(filename, message):
+        logger.error("%s konnte nicht verschoben werden: %s", filename, message)
+
+    def log_task(name, status, message):
+        if status == STATUS_FAILED:
+            logger.error("Aufgabe %s fehlgeschlagen: %s", name, message)
+        else:
+            logger.info("Aufgabe %s: %s %s", name, status, message or "")
+
+    core = AutomationCore(args.rules, args.history, args.dedup, args.workers, args.durable,
+                          on_moved=log_moved, on_failed=log_failed)
+    core.import_legacy_history()
+
+    if args.once:
+        core.sweep()
+        # Auf Dateien warten, die gerade noch geschrieben werden.
+        while core.next_timeout() is not None:
+            time.sleep(core.next_timeout())
+            core.process_settled()
+        core.stop()
+        return 0
+
+    # Signale wecken die select-Schleife über eine Pipe, statt sie nur zu unterbrechen.
+    wakeup_read, wakeup_write = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    signal.set_wakeup_fd(wakeup_write, warn_on_full_buffer=False)
+    received = []
+    for signal_number in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signal_number, lambda number, _frame: received.append(number))
+
+    watcher = core.start_watching()
+    core.sweep()
+    scheduler = Scheduler(args.tasks, on_finished=log_task)
+    notify_systemd("READY=1")
+
+    running = True
+    try:
+        while running:
+            watcher_fd = watcher.fileno()
+            readable_fds = [wakeup_read] if watcher_fd is None else [wakeup_read, watcher_fd]
+            timeout = watcher.poll_interval / 1000 if watcher_fd is None else None
+            for next_timeout in (core.next_timeout(), scheduler.next_timeout()):
+                if next_timeout is not None:
+                    timeout = next_timeout if timeout is None else min(timeout, next_timeout)
+            readable, _writable, _errors = select.select(readable_fds, [], [], timeout)
+
+            if wakeup_read in readable:
+                try:
+                    while os.read(wakeup_read, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+            while received:
+                signal_number = received.pop(0)
+                if signal_number == signal.SIGHUP:
+                    notify_systemd("RELOADING=1")
+                    watcher = core.reload_rules()
+                    core.sweep()
+                    scheduler.reload()
+                    notify_systemd("READY=1")
+                    logger.warning("Regeln aus %s und Aufgaben aus %s neu geladen", args.rules, args.tasks)
+                else:
+                    running = False
+
+            if running and (watcher_fd is None or watcher_fd in readable):
+                core.handle_watcher_changes()
+            if running:
+                core.process_settled()
+                scheduler.run_due()
+    finally:
+        notify_systemd("STOPPING=1")
+        scheduler.shutdown()
+        core.stop()
+        signal.set_wakeup_fd(-1)
+        os.close(wakeup_read)
+        os.close(wakeup_write)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
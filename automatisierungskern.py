@@ -0,0 +1,300 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Automatisierungskern Modul:
+
+Dieses Modul enthält den Kern der Automatisierung ohne Abhängigkeit von PyQt5. Er verbindet Regeln,
+Ordnerüberwachung, Entprellung, Verschiebe-Engine, Duplikat-Index, Metadaten und Verlauf. Die GUI (`AutomatisierungApp`) und der
+Hintergrunddienst (`automatisierungsdienst`) verwenden denselben Kern und unterscheiden sich nur darin,
+wie sie auf den Watcher warten und die Ergebnisse anzeigen.
+
+Klassen:
+- AutomationCore: Der Kern der Downloads-Automatisierung.
+"""
+import atexit
+import logging
+import os
+import re
+import time
+
+import messung
+from dateisperre import InstanceLock
+from duplikate import DEFAULT_DEDUP_FILE, DedupIndex
+from entprellung import Debouncer
+from metadaten import read_capture_time
+from ordnerstand import DEFAULT_SNAPSHOT_FILE, DirectorySnapshot
+from regeln import DEFAULT_RULES_FILE, RuleSet, load_rules
+from ueberwachung import create_watcher
+from verlauf import DEFAULT_HISTORY_FILE, HistoryStore, HistoryWriter
+from verschiebung import DEFAULT_MAX_WORKERS, MoveEngine
+
+LEGACY_TARGET_DIR = "~/Documents/Bilder"
+
+logger = logging.getLogger(__name__)
+
+
+class AutomationCore:
+    """
+    Der Kern der Downloads-Automatisierung.
+
+    Alle Callbacks werden in Hintergrund-Threads aufgerufen (Verschiebe-Worker bzw. Verlaufs-Schreiber).
+
+    Parameter:
+        rules_file (str): Der Pfad der Regeldatei.
+        history_file (str): Der Pfad der Verlaufsdatenbank.
+        dedup_file (str): Der Pfad der Datenbank des Duplikat-Index.
+        snapshot_file (str): Der Pfad der Datenbank mit dem Stand der Quellordner.
+        move_workers (int): Die maximale Anzahl gleichzeitiger Verschiebungen.
+        durable_history (bool): Ob jeder Commit des Verlaufs mit fsync gesichert wird.
+        on_moved (callable): Wird mit einer Liste von Tupeln (id, filename, target_path, moved_at)
+            aufgerufen, sobald Verschiebungen im Verlauf gespeichert sind.
+        on_failed (callable): Wird mit (filename, message) aufgerufen, wenn eine Verschiebung fehlschlägt.
+        on_progress (callable): Wird mit (completed, total) des aktuellen Stapels aufgerufen.
+        on_history_error (callable): Wird mit dem Fehler aufgerufen, wenn der Verlauf nicht geschrieben werden
+            kann; die Einträge werden später erneut geschrieben.
+
+    Methoden:
+        import_legacy_history(parse_timestamp): Übernimmt einmalig die alte moved_files.txt.
+        recover_interrupted_moves(): Schließt die bei einem Absturz unterbrochenen Verschiebungen ab.
+        start_watching(): Startet die Überwachung der Quellordner.
+        sweep(): Merkt die seit dem letzten Durchlauf neuen passenden Dateien zum Verschieben vor.
+        handle_watcher_changes(): Merkt die vom Watcher gemeldeten Dateien zum Verschieben vor.
+        next_timeout(): Gibt die Zeit bis zur nächsten Prüfung der vorgemerkten Dateien zurück.
+        process_settled(): Verschiebt die vorgemerkten Dateien, die fertig geschrieben sind.
+        move_files(paths): Plant die Verschiebung passender Dateien ein.
+        reload_rules(): Lädt die Regeldatei neu.
+        stop(): Beendet Überwachung und Verschiebungen und schreibt den Verlauf.
+    """
+
+    def __init__(self, rules_file=DEFAULT_RULES_FILE, history_file=DEFAULT_HISTORY_FILE, dedup_file=DEFAULT_DEDUP_FILE,
+                 move_workers=DEFAULT_MAX_WORKERS, durable_history=False, on_moved=None, on_failed=None,
+                 on_progress=None, snapshot_file=DEFAULT_SNAPSHOT_FILE, on_history_error=None):
+        self.rules_file = rules_file
+        self.on_moved = on_moved
+        self.on_failed = on_failed
+        # Mit einer fehlerhaften Regeldatei startet der Kern ohne Regeln, statt Dateien falsch zu verschieben.
+        self.rules = self._load_rules()
+        if self.rules is None:
+            self.rules = RuleSet([])
+        for directory in self.rules.targets:
+            os.makedirs(directory, exist_ok=True)
+
+        # Jeder Kern hält für seine Laufzeit eine Sperre neben der Verlaufsdatenbank; nur wer sie beim Start
+        # exklusiv bekommt, darf unterbrochene Verschiebungen abschließen, ohne laufende anderer zu stören.
+        self._instance_lock = InstanceLock(history_file)
+        self.history = HistoryStore(history_file, durable=durable_history)
+        self.history_writer = HistoryWriter(self.history, on_committed=self._handle_history_committed,
+                                            on_error=on_history_error)
+        self.dedup_index = DedupIndex(dedup_file, directories=self.rules.targets)
+        self.move_engine = MoveEngine(move_workers, self._handle_move_finished, on_progress,
+                                      dedup_index=self.dedup_index, prepare=self._route_by_date,
+                                      journal=self.history)
+        self.debouncer = Debouncer()
+        self.snapshot = DirectorySnapshot(snapshot_file)
+        self.watcher = None
+        self._stopped = False
+        # Auch ohne geordnetes stop() (z. B. bei app.quit()) werden die gepufferten Einträge geschrieben.
+        atexit.register(self.stop)
+        if self._instance_lock.exclusive:
+            self.recover_interrupted_moves()
+        self._instance_lock.share()
+
+    def import_legacy_history(self, parse_timestamp=None):
+        """
+        Übernimmt einmalig die Einträge der alten moved_files.txt in den Verlauf.
+
+        Args:
+            parse_timestamp (callable): Wandelt die alten Zeitstempel-Texte in Sekunden seit der Epoche um.
+        """
+        self.history.import_legacy_file(target_dir=os.path.expanduser(LEGACY_TARGET_DIR),
+                                        parse_timestamp=parse_timestamp)
+
+    def recover_interrupted_moves(self):
+        """
+        Schließt die bei einem Absturz unterbrochenen Verschiebungen ab, damit Verlauf und Dateisystem
+        übereinstimmen. Wird beim Erstellen des Kerns aufgerufen, aber nur, wenn kein anderer Kern (z. B. die
+        GUI neben dem Dienst) dieselbe Verlaufsdatenbank verwendet; dessen Vermerke gehören zu laufenden
+        Verschiebungen. Geprüft werden nur die Vermerke im Journal.
+
+        Returns:
+            int: Die Anzahl nachgetragener Verlaufseinträge.
+        """
+        completed = self.move_engine.recover()
+        for _source_path, target_path, started_at, journal_id in completed:
+            self.history_writer.append(os.path.basename(target_path), target_path, started_at, journal_id)
+        self.history_writer.flush()
+        return len(completed)
+
+    def start_watching(self):
+        """
+        Startet die Überwachung aller vorhandenen Quellordner der Regeln.
+
+        Returns:
+            InotifyWatcher | PollingWatcher: Der Watcher, auf dessen `fileno()` der Aufrufer warten kann.
+        """
+        self.watcher = create_watcher([source for source in self.rules.sources if os.path.isdir(source)])
+        return self.watcher
+
+    def sweep(self):
+        """
+        Merkt die bereits vorhandenen passenden Dateien der Quellordner zum Verschieben vor. Sie werden bei
+        der nächsten Prüfung verschoben, sofern sie nicht gerade noch geschrieben werden.
+
+        Über den gespeicherten Ordnerstand werden unveränderte Quellordner gar nicht und geänderte nur auf
+        neue Einträge hin geprüft.
+
+        Sollte nach `start_watching()` aufgerufen werden, damit keine Datei dazwischen verloren geht.
+        """
+        for source in self.rules.sources:
+            with messung.span("start.ordnerdurchlauf"):
+                paths = self.snapshot.scan(source, self.rules.fingerprint, self._is_relevant)
+            self.debouncer.add(paths, delay=0)
+
+    def handle_watcher_changes(self):
+        """
+        Liest die vom Watcher gemeldeten Änderungen und merkt die betroffenen Dateien zum Verschieben vor.
+        """
+        changes = self.watcher.read_changes()
+        if changes:
+            self.debouncer.add(self._matching(changes))
+
+    def next_timeout(self):
+        """
+        Gibt die Zeit bis zur nächsten Prüfung der vorgemerkten Dateien zurück.
+
+        Returns:
+            float: Die Wartezeit in Sekunden oder None, falls keine Datei wartet.
+        """
+        return self.debouncer.next_timeout()
+
+    def process_settled(self):
+        """
+        Verschiebt die vorgemerkten Dateien, deren Größe und Änderungszeit stabil sind.
+        """
+        settled = self.debouncer.advance()
+        if settled:
+            self.move_files(settled)
+
+    def _matching(self, paths):
+        """
+        Filtert die Pfade, für die eine Regel einen Zielordner festlegt.
+        """
+        return [path for path in paths if self._is_relevant(path)]
+
+    def _is_relevant(self, path):
+        """
+        Gibt an, ob eine Regel für einen Pfad einen Zielordner festlegt.
+        """
+        return self.rules.target_for(path) is not None
+
+    def move_files(self, paths):
+        """
+        Plant die Verschiebung der Dateien ein, für die eine Regel einen Zielordner festlegt.
+
+        Args:
+            paths (iterable): Die Pfade der zu prüfenden Dateien in den Quellordnern.
+        """
+        for file_path in paths:
+            target_path = self.rules.target_for(file_path)
+            if target_path is not None and os.path.isfile(file_path):
+                self.move_engine.submit(file_path, target_path)
+
+    def reload_rules(self):
+        """
+        Lädt die Regeldatei neu. Ein laufender Watcher wird durch einen neuen für die neuen Quellordner ersetzt.
+        Ist die Datei fehlerhaft, wird der Fehler protokolliert und die bisherigen Regeln und der bisherige
+        Watcher bleiben.
+
+        Returns:
+            InotifyWatcher | PollingWatcher: Der aktuelle Watcher oder None, falls keiner läuft.
+        """
+        rules = self._load_rules()
+        if rules is None:
+            return self.watcher
+        self.rules = rules
+        for directory in self.rules.targets:
+            os.makedirs(directory, exist_ok=True)
+        self.dedup_index.directories = list(self.rules.targets)
+        if self.watcher is None:
+            return None
+        self.watcher.close()
+        return self.start_watching()
+
+    def _load_rules(self):
+        """
+        Lädt und kompiliert die Regeldatei.
+
+        Returns:
+            RuleSet: Die Regeln oder None, falls die Datei fehlerhaft ist (der Fehler wird protokolliert).
+        """
+        try:
+            return load_rules(self.rules_file)
+        except (OSError, ValueError, KeyError, TypeError, re.error) as error:
+            logger.error("Regeln aus %s konnten nicht geladen werden: %s", self.rules_file, error)
+            return None
+
+    def _route_by_date(self, source_path, target_path):
+        """
+        Sortiert die Dateien von Regeln mit `date_folders` im Worker-Thread der Engine nach Aufnahmedatum in
+        Unterordner JJJJ/MM des Zielordners ein.
+        """
+        rule = self.rules.match(*os.path.split(source_path))
+        if rule is None or not rule.date_folders:
+            return target_path
+        captured_at = self._capture_time(source_path)
+        if captured_at is None:
+            return target_path
+        captured = time.localtime(captured_at)
+        directory = os.path.join(os.path.dirname(target_path), f"{captured.tm_year:04d}", f"{captured.tm_mon:02d}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, os.path.basename(target_path))
+
+    def _capture_time(self, source_path):
+        """
+        Gibt den Aufnahmezeitpunkt einer Datei zurück. Jede Datei wird nur einmal ausgewertet; das Ergebnis
+        steht danach im Verlaufsspeicher.
+        """
+        stat = os.stat(source_path)
+        key = (os.path.basename(source_path), stat.st_size, stat.st_mtime_ns)
+        cached = self.history.get_capture_time(*key)
+        if cached is not None:
+            return cached[0]
+        with messung.span("metadaten.lesen"):
+            captured_at = read_capture_time(source_path)
+        self.history.put_capture_time(*key, captured_at)
+        return captured_at
+
+    def _handle_move_finished(self, source_path, target_path, error, journal_id):
+        """
+        Verarbeitet das Ergebnis einer Verschiebung im Worker-Thread der Engine.
+        """
+        if error is not None:
+            if self.on_failed:
+                self.on_failed(os.path.basename(source_path), str(error))
+            return
+        self.history_writer.append(os.path.basename(target_path), target_path, time.time(), journal_id)
+
+    def _handle_history_committed(self, entries):
+        """
+        Meldet die geschriebenen Verlaufseinträge im Schreib-Thread weiter.
+        """
+        if self.on_moved:
+            self.on_moved(entries)
+
+    def stop(self):
+        """
+        Beendet Überwachung und Verschiebungen, schreibt den Verlauf und schließt alle Datenbanken.
+        Mehrfache Aufrufe sind erlaubt.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        atexit.unregister(self.stop)
+        if self.watcher is not None:
+            self.watcher.close()
+        self.move_engine.shutdown(wait=True)
+        self.history_writer.close()
+        self.history.close()
+        self.dedup_index.close()
+        self.snapshot.close()
+        self._instance_lock.close()
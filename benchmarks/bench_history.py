@@ -0,0 +1,98 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Benchmark: Schreiben des Verlaufs
+
+Misst, wie viele Verlaufseinträge pro Sekunde geschrieben werden können:
+- vorher: moved_files.txt mit open/append/close pro Eintrag (alte save_moved_file-Methode),
+- HistoryStore.append mit einer Transaktion pro Eintrag,
+- HistoryWriter mit Group Commit, jeweils mit und ohne Dauerhaftigkeitsmodus.
+
+Aufruf:
+    python benchmarks/bench_history.py [--records N] [--json DATEI]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verlauf import HistoryStore, HistoryWriter  # noqa: E402
+
+
+def bench_legacy_text_file(directory, records):
+    """
+    Die alte Methode: pro Eintrag open, write und close auf moved_files.txt.
+    """
+    path = os.path.join(directory, "moved_files.txt")
+    start = time.perf_counter()
+    for index in range(records):
+        with open(path, "a") as file:
+            file.write(f"IMG_{index}.jpg,Samstag, 17. Oktober 2026 12:00:00 MESZ\n")
+    return time.perf_counter() - start
+
+
+def bench_store_append(directory, records, durable):
+    """
+    Eine SQLite-Transaktion pro Eintrag.
+    """
+    store = HistoryStore(os.path.join(directory, f"append_{durable}.db"), durable=durable)
+    start = time.perf_counter()
+    for index in range(records):
+        store.append(f"IMG_{index}.jpg", f"/Bilder/IMG_{index}.jpg")
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed
+
+
+def bench_writer(directory, records, durable):
+    """
+    Group Commit über den HistoryWriter, gemessen bis alle Einträge geschrieben sind.
+    """
+    store = HistoryStore(os.path.join(directory, f"writer_{durable}.db"), durable=durable)
+    writer = HistoryWriter(store)
+    start = time.perf_counter()
+    for index in range(records):
+        writer.append(f"IMG_{index}.jpg", f"/Bilder/IMG_{index}.jpg")
+    writer.close()
+    elapsed = time.perf_counter() - start
+    assert store.count() == records
+    store.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schreibdurchsatz des Verlaufs messen.")
+    parser.add_argument("--records", type=int, default=10000, help="Anzahl der Einträge pro Variante")
+    parser.add_argument("--json", default=None, help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_history_")
+    variants = [
+        ("moved_files.txt (open/append/close)", lambda: bench_legacy_text_file(directory, args.records)),
+        ("HistoryStore.append", lambda: bench_store_append(directory, args.records, False)),
+        ("HistoryStore.append (durable)", lambda: bench_store_append(directory, args.records, True)),
+        ("HistoryWriter", lambda: bench_writer(directory, args.records, False)),
+        ("HistoryWriter (durable)", lambda: bench_writer(directory, args.records, True)),
+    ]
+    results = {}
+    try:
+        print(f"{'Variante':<40} {'Einträge/s':>14}")
+        for name, run in variants:
+            elapsed = run()
+            results[name] = args.records / elapsed
+            print(f"{name:<40} {results[name]:>14.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"records": args.records, "records_per_second": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
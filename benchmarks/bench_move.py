@@ -0,0 +1,107 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Benchmark: Verschieben über Dateisystemgrenzen
+
+Vergleicht den Durchsatz von `shutil.move` mit dem `FastMover` aus `verschiebung.py` für Dateien
+von 1 KB bis 2 GB. Quell- und Zielordner sollten auf unterschiedlichen Dateisystemen liegen
+(Standard: ein temporärer Ordner unter /tmp und einer unter /dev/shm).
+
+Aufruf:
+    python benchmarks/bench_move.py [--source-dir DIR] [--target-dir DIR] [--max-size BYTES] [--json DATEI]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verschiebung import FastMover  # noqa: E402
+
+SIZES = [1024, 1024 ** 2, 64 * 1024 ** 2, 512 * 1024 ** 2, 2 * 1024 ** 3]
+
+
+def create_file(path, size):
+    """
+    Erstellt eine Datei der angegebenen Größe mit zufälligem Inhalt.
+    """
+    block = os.urandom(min(size, 4 * 1024 ** 2))
+    with open(path, "wb") as file:
+        remaining = size
+        while remaining > 0:
+            file.write(block[:remaining])
+            remaining -= len(block)
+
+
+def measure(move, source_dir, target_dir, size, repeat):
+    """
+    Misst die beste Laufzeit einer Verschiebung in Sekunden.
+    """
+    best = None
+    for index in range(repeat):
+        source_path = os.path.join(source_dir, f"bench_{index}.bin")
+        target_path = os.path.join(target_dir, f"bench_{index}.bin")
+        create_file(source_path, size)
+        start = time.perf_counter()
+        move(source_path, target_path)
+        elapsed = time.perf_counter() - start
+        os.unlink(target_path)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durchsatz von shutil.move und FastMover vergleichen.")
+    parser.add_argument("--source-dir", default=None, help="Quellordner (Standard: temporärer Ordner in /tmp)")
+    parser.add_argument("--target-dir", default=None, help="Zielordner (Standard: temporärer Ordner in /dev/shm)")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1], help="Größte getestete Dateigröße in Bytes")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen pro Größe")
+    parser.add_argument("--json", default=None, help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    source_dir = args.source_dir or tempfile.mkdtemp(prefix="bench_src_")
+    target_dir = args.target_dir or tempfile.mkdtemp(prefix="bench_dst_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    same_device = os.stat(source_dir).st_dev == os.stat(target_dir).st_dev
+
+    def fast_move(source_path, target_path):
+        mover.move(source_path, target_path)
+        mover.flush()
+
+    mover = FastMover()
+    results = []
+    print(f"Quelle: {source_dir}\nZiel:   {target_dir}\nGleiches Dateisystem: {same_device}\n")
+    print(f"{'Größe':>12} {'shutil.move MB/s':>18} {'FastMover MB/s':>16} {'Faktor':>8}")
+    try:
+        for size in SIZES:
+            if size > args.max_size:
+                break
+            repeat = args.repeat if size <= 64 * 1024 ** 2 else 1
+            shutil_time = measure(shutil.move, source_dir, target_dir, size, repeat)
+            fast_time = measure(fast_move, source_dir, target_dir, size, repeat)
+            shutil_rate = size / shutil_time / 1024 ** 2
+            fast_rate = size / fast_time / 1024 ** 2
+            results.append({
+                "size": size,
+                "shutil_move_seconds": shutil_time,
+                "fast_mover_seconds": fast_time,
+                "shutil_move_mb_s": shutil_rate,
+                "fast_mover_mb_s": fast_rate,
+            })
+            print(f"{size:>12} {shutil_rate:>18.1f} {fast_rate:>16.1f} {shutil_time / fast_time:>8.2f}")
+    finally:
+        if not args.source_dir:
+            shutil.rmtree(source_dir, ignore_errors=True)
+        if not args.target_dir:
+            shutil.rmtree(target_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"same_device": same_device, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
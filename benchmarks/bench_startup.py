@@ -0,0 +1,110 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Benchmark: Startzeit der Anwendung
+
+Startet MainApp mehrmals in einem frischen Python-Prozess unter der Qt-Plattform "offscreen" und misst:
+
+- import: Dauer des Imports von MainApp (inklusive PyQt5),
+- login_dialog: Zeit vom Prozessstart bis der Anmeldedialog angezeigt wird,
+- main_window: Zeit vom Prozessstart bis das Hauptfenster nach der Anmeldung angezeigt wird.
+
+Der Anmeldedialog wird dabei automatisch bestätigt. Mit --importtime wird zusätzlich die Ausgabe von
+`python -X importtime` nach den teuersten Modulen sortiert ausgegeben.
+
+Aufruf:
+    python benchmarks/bench_startup.py [--runs 10] [--importtime] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Wird im Unterprozess ausgeführt; die Zeiten werden relativ zum Prozessstart gemessen.
+_DRIVER = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from PyQt5.QtWidgets import QApplication, QDialog
+app = QApplication([])
+import MainApp
+imported = time.perf_counter()
+times = {{}}
+
+def exec_(self):
+    self.show()
+    app.processEvents()
+    times["login_dialog"] = time.perf_counter()
+    self.username, self.password = "bench", "bench"
+    self.logged_in = True
+    return QDialog.Accepted
+
+MainApp.LoginWindow.exec_ = exec_
+window = MainApp.MainApp()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({{"import": imported - start, "login_dialog": times["login_dialog"] - start,
+                  "main_window": shown - start}}))
+"""
+
+
+def measure_once(work_dir):
+    """
+    Startet die Anwendung einmal und gibt die gemessenen Zeiten in Sekunden zurück.
+    """
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-c", _DRIVER.format(root=ROOT)], cwd=work_dir, env=environment,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(limit=15):
+    """
+    Gibt die Module mit der größten kumulierten Importzeit aus `python -X importtime` zurück.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import MainApp"], cwd=ROOT,
+                            capture_output=True, text=True, env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_time, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append((int(cumulative), module))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startzeit bis Anmeldedialog und Hauptfenster messen.")
+    parser.add_argument("--runs", type=int, default=10, help="Anzahl der Starts")
+    parser.add_argument("--importtime", action="store_true", help="Teuerste Importe ausgeben")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        runs = [measure_once(work_dir) for _ in range(args.runs)]
+    results = {stage: statistics.median(run[stage] for run in runs) for stage in runs[0]}
+
+    if args.json:
+        output = {"runs": args.runs, "median_seconds": results}
+        if args.importtime:
+            output["importtime_us"] = import_profile()
+        print(json.dumps(output, indent=2))
+        return
+
+    print(f"Median aus {args.runs} Starts:")
+    for stage, seconds in results.items():
+        print(f"  {stage:<14} {seconds * 1000:8.1f} ms")
+    if args.importtime:
+        print("\nTeuerste Importe (kumuliert):")
+        for cumulative, module in import_profile():
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
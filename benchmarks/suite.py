@@ -0,0 +1,370 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Benchmark-Suite der Automatisierung
+
+Erzeugt reproduzierbare synthetische Downloads-Ordner (Standard: 1k, 100k und 1M Dateien mit gemischten
+Endungen und Größen) und misst jede Stufe einzeln:
+
+- listing: os.listdir und os.scandir über den Ordner,
+- matching: die alte endswith-Kette und das kompilierte RuleSet,
+- move_same_fs / move_cross_fs: FastMover innerhalb eines Dateisystems und über Dateisystemgrenzen,
+- history_append / history_reload: HistoryWriter und die erste Seite des Verlaufs, verglichen mit moved_files.txt,
+- table_population: QTableWidget mit insertRow gegen MovedFilesModel unter der Qt-Plattform "offscreen".
+
+Die Ergebnisse werden als JSON geschrieben; mit --compare werden sie einem früheren Lauf gegenübergestellt.
+
+Aufruf:
+    python benchmarks/suite.py [--sizes 1000,100000,1000000] [--work-dir DIR] [--output DATEI] [--compare ALT.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from regeln import Rule, RuleSet  # noqa: E402
+from verlauf import HistoryStore, HistoryWriter  # noqa: E402
+from verschiebung import FastMover  # noqa: E402
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+SEED = 20231017
+
+# Gewichtete Endungen, ungefähr wie in einem typischen Downloads-Ordner.
+EXTENSIONS = [
+    (".jpg", 20), (".JPG", 5), (".jpeg", 5), (".png", 10), (".heic", 5), (".pdf", 15), (".txt", 10),
+    (".zip", 10), (".mp4", 5), (".docx", 5), (".crdownload", 3), (".part", 2), ("", 5),
+]
+# Größenverteilung der Dateien im Verschiebe-Test in Bytes (Gewicht).
+MOVE_SIZES = [(1024, 30), (64 * 1024, 30), (1024 ** 2, 25), (8 * 1024 ** 2, 15)]
+
+
+def weighted_choices(rng, choices, count):
+    """
+    Zieht `count` Werte aus einer Liste von (Wert, Gewicht).
+    """
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=count)
+
+
+def build_tree(directory, count):
+    """
+    Erzeugt einen synthetischen Downloads-Ordner mit `count` Dateien, falls er noch nicht existiert.
+
+    Die Dateien werden per truncate als dünn besetzte Dateien mit realistischen Größen angelegt, damit auch
+    1M Einträge schnell erzeugt werden. Ein vorhandener Ordner mit derselben Anzahl wird wiederverwendet.
+    """
+    marker = os.path.join(directory, ".complete")
+    if os.path.exists(marker):
+        return
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    rng = random.Random(SEED + count)
+    extensions = weighted_choices(rng, EXTENSIONS, count)
+    for index, extension in enumerate(extensions):
+        path = os.path.join(directory, f"download_{index:07d}{extension}")
+        with open(path, "wb") as file:
+            file.truncate(rng.randint(0, 8 * 1024 ** 2))
+    with open(marker, "w") as file:
+        file.write(str(count))
+
+
+def timed(function, *args):
+    """
+    Führt eine Funktion aus und gibt (Laufzeit in Sekunden, Ergebnis) zurück.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_listing(directory):
+    """
+    Misst os.listdir und os.scandir über den Ordner.
+    """
+    listdir_time, names = timed(os.listdir, directory)
+
+    def scandir_files():
+        with os.scandir(directory) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+
+    scandir_time, _ = timed(scandir_files)
+    return {"listdir": listdir_time, "scandir": scandir_time, "entries": len(names)}, names
+
+
+def bench_matching(directory, names):
+    """
+    Vergleicht die alte endswith-Kette mit dem kompilierten RuleSet.
+    """
+    def legacy():
+        return sum(1 for filename in names
+                   if filename.lower().endswith(".jpg") or filename.lower().endswith(".heic")
+                   or filename.lower().endswith(".jpeg") or filename.lower().endswith(".png"))
+
+    rules = RuleSet([Rule("Fotos", [directory], "/Bilder", extensions=[".jpg", ".heic", ".jpeg", ".png"])])
+
+    def compiled():
+        return sum(1 for filename in names if rules.match(directory, filename) is not None)
+
+    many_rules = RuleSet(
+        [Rule("Fotos", [directory], "/Bilder", extensions=[".jpg", ".heic", ".jpeg", ".png"])]
+        + [Rule(f"Regel {index}", [directory], f"/Ziel{index}", globs=[f"projekt{index}_*.pdf"]) for index in range(200)]
+    )
+
+    def compiled_many():
+        return sum(1 for filename in names if many_rules.match(directory, filename) is not None)
+
+    legacy_time, legacy_count = timed(legacy)
+    compiled_time, compiled_count = timed(compiled)
+    many_time, _ = timed(compiled_many)
+    assert legacy_count == compiled_count
+    return {"legacy_endswith": legacy_time, "ruleset": compiled_time, "ruleset_200_rules": many_time,
+            "matches": compiled_count}
+
+
+def bench_move(source_dir, target_dir, count):
+    """
+    Erzeugt `count` Dateien mit echtem Inhalt und misst das Verschieben mit dem FastMover.
+    """
+    os.makedirs(source_dir, exist_ok=True)
+    os.makedirs(target_dir, exist_ok=True)
+    rng = random.Random(SEED)
+    sizes = weighted_choices(rng, MOVE_SIZES, count)
+    block = os.urandom(max(size for size, _weight in MOVE_SIZES))
+    paths = []
+    for index, size in enumerate(sizes):
+        path = os.path.join(source_dir, f"IMG_{index:06d}.jpg")
+        with open(path, "wb") as file:
+            file.write(block[:size])
+        paths.append(path)
+
+    mover = FastMover()
+
+    def move_all():
+        for path in paths:
+            mover.move(path, os.path.join(target_dir, os.path.basename(path)))
+        mover.flush()
+
+    elapsed, _ = timed(move_all)
+    total_bytes = sum(sizes)
+    shutil.rmtree(source_dir, ignore_errors=True)
+    shutil.rmtree(target_dir, ignore_errors=True)
+    return {
+        "seconds": elapsed,
+        "files": count,
+        "bytes": total_bytes,
+        "files_per_second": count / elapsed,
+        "mb_per_second": total_bytes / elapsed / 1024 ** 2,
+        "same_device": None,
+    }
+
+
+def bench_history(directory, count):
+    """
+    Misst das Schreiben und das erneute Laden des Verlaufs, verglichen mit moved_files.txt.
+    """
+    legacy_path = os.path.join(directory, "moved_files.txt")
+
+    def legacy_append():
+        for index in range(count):
+            with open(legacy_path, "a") as file:
+                file.write(f"IMG_{index}.jpg,Samstag 17. Oktober 2026 12:00:00\n")
+
+    def legacy_reload():
+        with open(legacy_path, "r") as file:
+            return [line.strip().split(",") for line in file.readlines()]
+
+    history_path = os.path.join(directory, "verlauf.db")
+    store = HistoryStore(history_path)
+
+    def writer_append():
+        writer = HistoryWriter(store)
+        for index in range(count):
+            writer.append(f"IMG_{index}.jpg", f"/Bilder/IMG_{index}.jpg")
+        writer.close()
+
+    legacy_append_time, _ = timed(legacy_append)
+    legacy_reload_time, _ = timed(legacy_reload)
+    append_time, _ = timed(writer_append)
+    store.close()
+
+    def reload_first_page():
+        reopened = HistoryStore(history_path)
+        page = reopened.page(limit=200)
+        reopened.close()
+        return page
+
+    reload_time, _ = timed(reload_first_page)
+    return {
+        "append": {"legacy_text_file": legacy_append_time, "history_writer": append_time},
+        "reload": {"legacy_text_file": legacy_reload_time, "history_store_first_page": reload_time},
+    }
+
+
+def bench_table_population(directory, count):
+    """
+    Misst das Befüllen der Tabelle in einem eigenen Prozess unter der Qt-Plattform "offscreen".
+    """
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--table-worker", os.path.join(directory, "verlauf.db"), str(count)],
+        capture_output=True, text=True, env=environment,
+    )
+    if result.returncode != 0:
+        return {"skipped": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Fehler"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def table_worker(history_path, count):
+    """
+    Läuft im Unterprozess: befüllt ein QTableWidget zeilenweise und ein MovedFilesModel über eine QTableView.
+    """
+    from PyQt5.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+
+    from modelle import MovedFilesModel
+
+    app = QApplication([])
+    store = HistoryStore(history_path)
+    rows = store.page(limit=count)
+
+    def widget_population():
+        table = QTableWidget()
+        table.setColumnCount(2)
+        for _entry_id, filename, _target_path, moved_at in rows:
+            row_count = table.rowCount()
+            table.insertRow(row_count)
+            table.setItem(row_count, 0, QTableWidgetItem(filename))
+            table.setItem(row_count, 1, QTableWidgetItem(str(moved_at)))
+        table.show()
+        app.processEvents()
+        return table
+
+    def model_population():
+        model = MovedFilesModel(store)
+        view = QTableView()
+        view.setModel(model)
+        if model.canFetchMore():
+            model.fetchMore()
+        view.show()
+        app.processEvents()
+        return view
+
+    widget_time, widget = timed(widget_population)
+    model_time, view = timed(model_population)
+    widget.close()
+    view.close()
+    store.close()
+    print(json.dumps({"qtablewidget_insert_rows": widget_time, "model_first_page": model_time, "rows": len(rows)}))
+
+
+def run(args):
+    """
+    Führt alle Stufen für alle Größen aus und gibt die Ergebnisse zurück.
+    """
+    work_dir = args.work_dir or os.path.join(tempfile.gettempdir(), "automatisierung_bench")
+    cross_dir = args.cross_target_dir or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    results = {}
+    for size in args.sizes:
+        print(f"== {size} Dateien ==", flush=True)
+        tree = os.path.join(work_dir, f"downloads_{size}")
+        build_seconds, _ = timed(build_tree, tree, size)
+        stage_results = {"build_tree": build_seconds}
+
+        stage_results["listing"], names = bench_listing(tree)
+        names = [name for name in names if not name.startswith(".")]
+        stage_results["matching"] = bench_matching(tree, names)
+
+        move_count = min(size, args.move_limit)
+        scratch = tempfile.mkdtemp(prefix="move_", dir=work_dir)
+        same = bench_move(os.path.join(scratch, "src"), os.path.join(scratch, "dst"), move_count)
+        same["same_device"] = True
+        stage_results["move_same_fs"] = same
+        cross_scratch = tempfile.mkdtemp(prefix="move_", dir=cross_dir)
+        cross = bench_move(os.path.join(scratch, "src"), os.path.join(cross_scratch, "dst"), move_count)
+        cross["same_device"] = os.stat(scratch).st_dev == os.stat(cross_scratch).st_dev
+        stage_results["move_cross_fs"] = cross
+        shutil.rmtree(cross_scratch, ignore_errors=True)
+
+        history_count = min(size, args.history_limit)
+        history_results = bench_history(scratch, history_count)
+        stage_results["history_append"] = history_results["append"]
+        stage_results["history_reload"] = history_results["reload"]
+        stage_results["table_population"] = bench_table_population(scratch, min(size, args.table_limit))
+        shutil.rmtree(scratch, ignore_errors=True)
+
+        for stage, values in stage_results.items():
+            print(f"  {stage:<18} {json.dumps(values)}", flush=True)
+        results[str(size)] = stage_results
+        if not args.keep_trees:
+            shutil.rmtree(tree, ignore_errors=True)
+    return results
+
+
+def compare(previous, current):
+    """
+    Gibt für jede numerische Messung das Verhältnis neu/alt aus (kleiner als 1 ist schneller).
+    """
+    def flatten(values, prefix=""):
+        for key, value in values.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict):
+                yield from flatten(value, name + ".")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield name, value
+
+    old_values = dict(flatten(previous["results"]))
+    print(f"{'Messung':<60} {'alt':>12} {'neu':>12} {'neu/alt':>8}")
+    for name, value in flatten(current["results"]):
+        if name in old_values and old_values[name]:
+            print(f"{name:<60} {old_values[name]:>12.6g} {value:>12.6g} {value / old_values[name]:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark-Suite der Downloads-Automatisierung.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Kommagetrennte Anzahl Dateien pro synthetischem Downloads-Ordner")
+    parser.add_argument("--work-dir", default=None, help="Arbeitsordner für die synthetischen Ordner")
+    parser.add_argument("--cross-target-dir", default=None,
+                        help="Ordner auf einem anderen Dateisystem für move_cross_fs (Standard: /dev/shm)")
+    parser.add_argument("--move-limit", type=int, default=2000, help="Maximale Anzahl verschobener Dateien")
+    parser.add_argument("--history-limit", type=int, default=100000, help="Maximale Anzahl Verlaufseinträge")
+    parser.add_argument("--table-limit", type=int, default=100000, help="Maximale Anzahl Tabellenzeilen")
+    parser.add_argument("--keep-trees", action="store_true", help="Synthetische Ordner für spätere Läufe behalten")
+    parser.add_argument("--output", default="benchmark_results.json", help="Ausgabedatei für die Ergebnisse")
+    parser.add_argument("--compare", default=None, help="Früheres Ergebnis, mit dem verglichen wird")
+    parser.add_argument("--table-worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.table_worker:
+        table_worker(args.table_worker[0], int(args.table_worker[1]))
+        return
+
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+        },
+        "results": run(args),
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Ergebnisse gespeichert in {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            compare(json.load(file), results)
+
+
+if __name__ == "__main__":
+    main()
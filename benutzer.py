@@ -0,0 +1,270 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Benutzer Modul:
+
+Dieses Modul enthält die Benutzerverwaltung, die vom Anmelde- und vom Registrierungsfenster gemeinsam
+verwendet wird. Die Benutzer werden in einem Dictionary nach Benutzernamen gehalten, sodass eine Anmeldung
+nur einen Dictionary-Zugriff kostet.
+
+Gespeichert werden die Benutzer als JSON-Lines-Datei (eine Zeile pro Eintrag). Eine Registrierung hängt genau
+eine Zeile an und sichert sie mit fsync; eine spätere Zeile für denselben Benutzernamen ersetzt die frühere.
+Beim Lesen werden nur die seit dem letzten Lesen angehängten Zeilen verarbeitet. Eine unvollständige letzte
+Zeile (z. B. nach einem Absturz mitten im Schreiben) wird ignoriert und beim nächsten Anhängen abgeschnitten.
+Sobald die Datei überwiegend aus überholten Zeilen besteht, wird sie in eine temporäre Datei verdichtet und
+atomar ersetzt. Die alte users.json wird beim ersten Start einmalig übernommen und danach überschrieben und
+gelöscht, da sie ungesalzene SHA-256-Hashes enthält. Aus demselben Grund wird die Datei sofort verdichtet,
+wenn ein veralteter Hash nach einer Anmeldung ersetzt wurde, damit die überholte Zeile nicht auf der Platte
+bleibt.
+
+Mehrere Prozesse dürfen die Datei gleichzeitig verwenden: Angehängt und verdichtet wird unter der Sperre aus
+`dateisperre`, und vor jedem Lesen wird nur deren Änderungszähler geprüft. Eine Registrierung berechnet den
+Hash ohne Sperre und prüft erst unter der Sperre, ob ein anderer Prozess den Namen inzwischen vergeben hat.
+
+Die Passwörter werden mit dem Modul `passwort_hash` gehasht. `check_password` und `register_user` sind daher
+bewusst langsam und werden von den Dialogen über den HashingService in einem Worker-Thread aufgerufen.
+
+Klassen:
+- UserRepository: Die Benutzerverwaltung.
+"""
+import json
+import logging
+import os
+import threading
+
+from dateisperre import VersionedLock
+from passwort_hash import hash_password, verify_password
+from passwortspeicher import remove_securely
+
+DEFAULT_USERS_FILE = "users.jsonl"
+LEGACY_USERS_FILE = "users.json"
+MIGRATED_SUFFIX = ".migrated"
+# Verdichtet wird erst ab dieser Zeilenzahl und nur, wenn mehr als die Hälfte der Zeilen überholt ist.
+COMPACT_MIN_LINES = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync_directory(path):
+    """
+    Sichert den Verzeichniseintrag einer Datei nach dem Anlegen oder Umbenennen.
+    """
+    directory_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+class UserRepository:
+    """
+    Die Benutzerverwaltung.
+
+    Parameter:
+        path (str): Der Pfad der JSON-Lines-Benutzerdatei.
+        legacy_path (str): Der Pfad der alten users.json, die einmalig übernommen wird.
+
+    Methoden:
+        get(username): Gibt den Eintrag eines Benutzers zurück.
+        user_exists(username): Überprüft, ob ein Benutzer existiert.
+        check_password(username, password): Überprüft das Passwort eines Benutzers.
+        register_user(username, password, email): Registriert einen neuen Benutzer.
+        compact(): Schreibt die Datei ohne überholte Zeilen neu.
+    """
+
+    def __init__(self, path=DEFAULT_USERS_FILE, legacy_path=LEGACY_USERS_FILE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.RLock()
+        self._users = {}
+        self._inode = None
+        self._offset = 0
+        self._lines = 0
+        self._seen_version = None
+        self._file_lock = VersionedLock(path)
+        with self._lock, self._file_lock.locked():
+            self._migrate_legacy_file()
+
+    def _migrate_legacy_file(self):
+        """
+        Übernimmt einmalig die Benutzer aus der alten users.json und löscht sie danach mit `remove_securely`.
+        Eine `<legacy_path>.migrated` früherer Versionen wird ebenfalls gelöscht.
+        """
+        if not self.legacy_path:
+            return
+        if not os.path.exists(self.path) and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, "r") as file:
+                users = json.load(file)
+            self._write_atomically(users)
+            self._file_lock.bump()
+        if os.path.exists(self.path):
+            # Erst löschen, wenn alle Einträge sicher in der neuen Datei stehen.
+            remove_securely(self.legacy_path)
+            remove_securely(self.legacy_path + MIGRATED_SUFFIX)
+
+    def _write_atomically(self, users):
+        """
+        Schreibt alle Einträge in eine temporäre Datei und ersetzt die Benutzerdatei atomar.
+        """
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            for user in users:
+                file.write(json.dumps(user) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        _fsync_directory(self.path)
+
+    def _refresh(self):
+        """
+        Liest die seit dem letzten Lesen angehängten Zeilen, sofern der Änderungszähler sich geändert hat.
+        Wurde die Datei ersetzt oder gekürzt, wird sie vollständig neu gelesen.
+        """
+        version = self._file_lock.version()
+        if version == self._seen_version:
+            return
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            self._users, self._inode, self._offset, self._lines = {}, None, 0, 0
+            self._seen_version = version
+            return
+        with file:
+            # Der Status wird über den geöffneten Deskriptor gelesen, damit er zur gelesenen Datei gehört.
+            status = os.fstat(file.fileno())
+            if status.st_ino != self._inode or status.st_size < self._offset:
+                self._users, self._inode, self._offset, self._lines = {}, status.st_ino, 0, 0
+            file.seek(self._offset)
+            data = file.read(status.st_size - self._offset)
+        self._seen_version = version
+        # Nur vollständige Zeilen verarbeiten; ein unvollständiges Ende wird später erneut gelesen.
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                user = json.loads(line)
+            except ValueError:
+                logger.warning("Beschädigte Zeile in %s übersprungen", self.path)
+                continue
+            self._users[user["username"]] = user
+            self._lines += 1
+        self._offset += len(complete)
+
+    def get(self, username):
+        """
+        Gibt den Eintrag eines Benutzers zurück.
+
+        Args:
+            username (str): Der Benutzername.
+
+        Returns:
+            dict: Der Eintrag mit username, password und email oder None.
+        """
+        with self._lock:
+            self._refresh()
+            return self._users.get(username)
+
+    def user_exists(self, username):
+        """
+        Überprüft, ob ein Benutzer existiert.
+
+        Args:
+            username (str): Der Benutzername.
+
+        Returns:
+            bool: True, falls der Benutzer existiert, ansonsten False.
+        """
+        return self.get(username) is not None
+
+    def check_password(self, username, password):
+        """
+        Überprüft das Passwort eines Benutzers. Ein Hash in einem veralteten Format (z. B. der alte
+        ungesalzene SHA-256-Hash) wird nach erfolgreicher Prüfung durch einen neuen ersetzt und die Datei
+        anschließend verdichtet, damit der alte Hash nicht in der überholten Zeile erhalten bleibt.
+
+        Args:
+            username (str): Der Benutzername.
+            password (str): Das Passwort.
+
+        Returns:
+            bool: True, falls der Benutzer existiert und das Passwort korrekt ist, ansonsten False.
+        """
+        user = self.get(username)
+        if user is None:
+            return False
+        correct, needs_rehash = verify_password(password, user["password"])
+        if correct and needs_rehash:
+            upgraded = dict(user, password=hash_password(password))
+            with self._lock:
+                self._append(upgraded)
+                self.compact()
+        return correct
+
+    def register_user(self, username, password, email):
+        """
+        Registriert einen neuen Benutzer.
+
+        Args:
+            username (str): Der Benutzername.
+            password (str): Das Passwort.
+            email (str): Die E-Mail-Adresse.
+
+        Raises:
+            ValueError: Wenn der Benutzername bereits vergeben ist.
+        """
+        if self.user_exists(username):
+            raise ValueError(f"Benutzername {username!r} ist bereits vergeben.")
+        # Der langsame Hash wird ohne Sperre berechnet; `_append` prüft den Namen unter der Sperre erneut.
+        user_data = {
+            "username": username,
+            "password": hash_password(password),
+            "email": email
+        }
+        with self._lock:
+            self._append(user_data, new_user=True)
+
+    def _append(self, user, new_user=False):
+        """
+        Holt unter der Sperre die Änderungen anderer Prozesse nach, hängt einen Eintrag als eine Zeile an,
+        sichert ihn mit fsync und erhöht den Änderungszähler.
+
+        Raises:
+            ValueError: Wenn `new_user` gesetzt ist und ein anderer Prozess den Namen inzwischen vergeben hat.
+        """
+        line = (json.dumps(user) + "\n").encode()
+        with self._file_lock.locked():
+            self._refresh()
+            if new_user and user["username"] in self._users:
+                raise ValueError(f"Benutzername {user['username']!r} ist bereits vergeben.")
+            file_descriptor = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                created = self._inode is None
+                # Eine unvollständige letzte Zeile eines abgebrochenen Schreibvorgangs wird verworfen.
+                if os.fstat(file_descriptor).st_size > self._offset:
+                    os.truncate(file_descriptor, self._offset)
+                os.write(file_descriptor, line)
+                os.fsync(file_descriptor)
+                self._inode = os.fstat(file_descriptor).st_ino
+            finally:
+                os.close(file_descriptor)
+            if created:
+                _fsync_directory(self.path)
+            self._users[user["username"]] = user
+            self._offset += len(line)
+            self._lines += 1
+            self._seen_version = self._file_lock.bump()
+
+        if self._lines >= COMPACT_MIN_LINES and self._lines > 2 * len(self._users):
+            self.compact()
+
+    def compact(self):
+        """
+        Schreibt die Benutzerdatei ohne überholte Zeilen neu und ersetzt sie atomar.
+        """
+        with self._lock, self._file_lock.locked():
+            self._refresh()
+            self._write_atomically(self._users.values())
+            self._file_lock.bump()
+            self._users, self._inode, self._offset, self._lines = {}, None, 0, 0
+            self._refresh()
@@ -0,0 +1,150 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Dateisperre Modul:
+
+Dieses Modul enthält die Abstimmung zwischen mehreren Prozessen, die dieselbe Speicherdatei verwenden
+(z. B. zwei gleichzeitig laufende MainApp-Instanzen). Neben der Speicherdatei liegt eine kleine Datei
+`<datei>.lock`, die zwei Aufgaben hat:
+
+- Sie trägt eine beratende fcntl-Sperre, die ein Schreiber nur für das eigentliche Anhängen hält.
+  Aufwendige Vorbereitungen (Hashen, Verschlüsseln) laufen vorher ohne Sperre; unter der Sperre holt der
+  Schreiber die Änderungen anderer Prozesse nach, prüft auf Konflikte und hängt dann an (optimistisch).
+- Ihre ersten 8 Bytes sind ein Änderungszähler, den jeder Schreiber erhöht. Leser vergleichen ihn mit dem
+  zuletzt gesehenen Stand (ein pread) und lesen die Speicherdatei nur, wenn er sich geändert hat.
+
+Ohne fcntl (z. B. unter Windows) ist die Sperre wirkungslos; der Zähler funktioniert weiterhin.
+
+Für Aufräumarbeiten, die nur ohne andere laufende Prozesse sicher sind (z. B. das Löschen halber Kopien nach
+einem Absturz), hält jeder Prozess mit `InstanceLock` für seine gesamte Laufzeit eine geteilte Sperre.
+
+Klassen:
+- VersionedLock: Sperre und Änderungszähler einer Speicherdatei.
+- InstanceLock: Zeigt an, ob ein Prozess eine Speicherdatei als einziger verwendet.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+_COUNTER_BYTES = 8
+
+
+class VersionedLock:
+    """
+    Sperre und Änderungszähler einer Speicherdatei.
+
+    Parameter:
+        path (str): Der Pfad der Speicherdatei; die Sperrdatei liegt unter `<path>.lock`.
+
+    Methoden:
+        version(): Gibt den aktuellen Stand des Änderungszählers zurück.
+        locked(): Kontextmanager, der die Sperre für die Dauer des Blocks hält.
+        bump(): Erhöht den Änderungszähler; nur innerhalb von `locked()` aufrufen.
+        close(): Schließt die Sperrdatei.
+    """
+
+    def __init__(self, path):
+        self.path = path + LOCK_SUFFIX
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_CLOEXEC", 0), 0o600)
+
+    def version(self):
+        """
+        Gibt den aktuellen Stand des Änderungszählers zurück.
+
+        Returns:
+            int: Der Zähler (0, solange noch kein Schreiber etwas geändert hat).
+        """
+        data = os.pread(self._fd, _COUNTER_BYTES, 0)
+        return int.from_bytes(data, "little") if len(data) == _COUNTER_BYTES else 0
+
+    @contextmanager
+    def locked(self):
+        """
+        Hält die Sperre für die Dauer des Blocks. Verschachtelte Aufrufe im selben Thread sind erlaubt.
+        """
+        with self._thread_lock:
+            if self._depth == 0 and fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def bump(self):
+        """
+        Erhöht den Änderungszähler, damit andere Prozesse die Änderung bemerken.
+
+        Returns:
+            int: Der neue Stand.
+        """
+        version = self.version() + 1
+        os.pwrite(self._fd, version.to_bytes(_COUNTER_BYTES, "little"), 0)
+        return version
+
+    def close(self):
+        """
+        Schließt die Sperrdatei.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class InstanceLock:
+    """
+    Zeigt an, ob ein Prozess eine Speicherdatei als einziger verwendet.
+
+    Beim Erstellen wird ohne Warten eine exklusive Sperre auf `<path>.lock` versucht. Gelingt sie, läuft kein
+    anderer Prozess mit dieser Datei, und `exclusive` ist True; nach dem Aufräumen gibt `share()` sie als geteilte
+    Sperre weiter. Gelingt sie nicht, wird eine geteilte Sperre genommen. Die Sperre wird bis `close()` gehalten,
+    sodass später startende Prozesse die laufenden bemerken.
+
+    Ohne fcntl ist `exclusive` immer True.
+
+    Parameter:
+        path (str): Der Pfad der Speicherdatei; die Sperrdatei liegt unter `<path>.lock`.
+
+    Attribute:
+        exclusive (bool): Ob beim Erstellen kein anderer Prozess die Datei verwendet hat.
+
+    Methoden:
+        share(): Wandelt die exklusive in eine geteilte Sperre um.
+        close(): Gibt die Sperre frei.
+    """
+
+    def __init__(self, path):
+        self.path = path + LOCK_SUFFIX
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_CLOEXEC", 0), 0o600)
+        self.exclusive = True
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.exclusive = False
+                fcntl.flock(self._fd, fcntl.LOCK_SH)
+
+    def share(self):
+        """
+        Wandelt die exklusive Sperre in eine geteilte um, damit weitere Prozesse starten können.
+        """
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+
+    def close(self):
+        """
+        Gibt die Sperre frei. Mehrfache Aufrufe sind erlaubt.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,245 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Duplikate Modul:
+
+Dieses Modul enthält den Duplikat-Index für den Zielordner der Automatisierung. Dateien werden zuerst über
+ihre Größe verglichen; nur bei gleicher Größe wird ein Teil-Hash (Anfang und Ende der Datei) und erst bei
+gleichem Teil-Hash der vollständige BLAKE2-Hash berechnet. Alle Hashes werden zusammen mit Inode,
+Änderungszeit und Größe gespeichert, sodass eine unveränderte Datei nie zweimal gehasht wird.
+
+Klassen:
+- DedupIndex: Der persistente Duplikat-Index.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+
+from verschiebung import PARTIAL_SUFFIX
+
+DEFAULT_DEDUP_FILE = "duplikate.db"
+PARTIAL_HASH_BLOCK = 64 * 1024
+FULL_HASH_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial_hash BLOB,
+    full_hash BLOB
+);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+"""
+
+
+class DedupIndex:
+    """
+    Der persistente Duplikat-Index für einen oder mehrere Zielordner.
+
+    Beim ersten Zugriff werden die Zielordner einmal abgeglichen: neue Dateien werden ohne Hash aufgenommen,
+    verschwundene entfernt. Hashes entstehen erst, wenn zwei Dateien dieselbe Größe haben.
+
+    Parameter:
+        path (str): Der Pfad der Datenbankdatei.
+        directories (list): Die Zielordner, deren Dateien im Index geführt werden.
+
+    Methoden:
+        find_duplicate(source_path): Sucht eine inhaltsgleiche Datei im Index.
+        add(path, hashes): Nimmt eine Datei in den Index auf.
+        remove(path): Entfernt eine Datei aus dem Index.
+        close(): Schließt die Datenbank.
+    """
+
+    def __init__(self, path=DEFAULT_DEDUP_FILE, directories=()):
+        self.path = path
+        self.directories = list(directories)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced = False
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def find_duplicate(self, source_path):
+        """
+        Sucht eine inhaltsgleiche Datei im Index.
+
+        Gibt es keine Datei derselben Größe, kostet die Suche nur einen Indexzugriff. Die Hashes der
+        Quelldatei werden höchstens einmal berechnet und für `add` zurückgegeben.
+
+        Args:
+            source_path (str): Der Pfad der zu prüfenden Datei.
+
+        Returns:
+            tuple: (Pfad des Duplikats oder None, Hashes der Quelldatei als dict).
+        """
+        self._ensure_synced()
+        stat = os.stat(source_path)
+        hashes = {}
+
+        with self._lock:
+            candidates = self._connection.execute(
+                "SELECT path, inode, mtime_ns, partial_hash, full_hash FROM files WHERE size = ?", (stat.st_size,)
+            ).fetchall()
+
+        for path, inode, mtime_ns, partial_hash, full_hash in candidates:
+            try:
+                candidate_stat = os.stat(path)
+            except FileNotFoundError:
+                self.remove(path)
+                continue
+            if (candidate_stat.st_ino, candidate_stat.st_mtime_ns, candidate_stat.st_size) != \
+                    (inode, mtime_ns, stat.st_size):
+                # Die Datei wurde verändert: zwischengespeicherte Hashes sind ungültig.
+                partial_hash = full_hash = None
+                self._store(path, candidate_stat, None, None)
+                if candidate_stat.st_size != stat.st_size:
+                    continue
+            if candidate_stat.st_ino == stat.st_ino and candidate_stat.st_dev == stat.st_dev:
+                return path, hashes
+
+            if "partial" not in hashes:
+                hashes["partial"] = _partial_hash(source_path, stat.st_size)
+            if partial_hash is None:
+                partial_hash = _partial_hash(path, stat.st_size)
+                self._store(path, candidate_stat, partial_hash, full_hash)
+            if partial_hash != hashes["partial"]:
+                continue
+
+            if "full" not in hashes:
+                hashes["full"] = _full_hash(source_path)
+            if full_hash is None:
+                full_hash = _full_hash(path)
+                self._store(path, candidate_stat, partial_hash, full_hash)
+            if full_hash == hashes["full"]:
+                return path, hashes
+
+        return None, hashes
+
+    def add(self, path, hashes=None):
+        """
+        Nimmt eine Datei in den Index auf.
+
+        Args:
+            path (str): Der Pfad der Datei.
+            hashes (dict): Bereits berechnete Hashes ("partial", "full") derselben Datei.
+        """
+        hashes = hashes or {}
+        self._store(path, os.stat(path), hashes.get("partial"), hashes.get("full"))
+
+    def remove(self, path):
+        """
+        Entfernt eine Datei aus dem Index.
+
+        Args:
+            path (str): Der Pfad der Datei.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _store(self, path, stat, partial_hash, full_hash):
+        """
+        Speichert eine Datei mit ihrer Signatur und den bekannten Hashes.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, inode, mtime_ns, partial_hash, full_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_ino, stat.st_mtime_ns, partial_hash, full_hash),
+            )
+
+    def _ensure_synced(self):
+        """
+        Gleicht die Zielordner beim ersten Zugriff einmal mit dem Index ab.
+        """
+        if self._synced:
+            return
+        with self._sync_lock:
+            if self._synced:
+                return
+            for directory in self.directories:
+                self._sync_directory(directory)
+            self._synced = True
+
+    def _sync_directory(self, directory):
+        """
+        Nimmt neue Dateien eines Ordners und seiner Unterordner (z. B. JJJJ/MM) ohne Hash auf und entfernt
+        verschwundene aus dem Index.
+        """
+        prefix = os.path.join(directory, "")
+        with self._lock:
+            known = {
+                path: (inode, mtime_ns, size)
+                for path, inode, mtime_ns, size in self._connection.execute(
+                    "SELECT path, inode, mtime_ns, size FROM files WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            }
+
+        rows = []
+        pending = [directory]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False) or entry.name.endswith(PARTIAL_SUFFIX):
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                        signature = known.pop(entry.path, None)
+                        if signature != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                            rows.append((entry.path, stat.st_size, stat.st_ino, stat.st_mtime_ns))
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO files (path, size, inode, mtime_ns) VALUES (?, ?, ?, ?)", rows
+                )
+                self._connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in known))
+
+    def close(self):
+        """
+        Schließt die Datenbank.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+def _partial_hash(path, size):
+    """
+    Berechnet einen BLAKE2-Hash über Größe, Anfang und Ende einer Datei.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as file:
+        digest.update(file.read(PARTIAL_HASH_BLOCK))
+        if size > 2 * PARTIAL_HASH_BLOCK:
+            file.seek(-PARTIAL_HASH_BLOCK, os.SEEK_END)
+            digest.update(file.read(PARTIAL_HASH_BLOCK))
+        elif size > PARTIAL_HASH_BLOCK:
+            digest.update(file.read())
+    return digest.digest()
+
+
+def _full_hash(path):
+    """
+    Berechnet den vollständigen BLAKE2-Hash einer Datei.
+    """
+    digest = hashlib.blake2b()
+    buffer = bytearray(FULL_HASH_CHUNK)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        while True:
+            read = file.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.digest()
@@ -0,0 +1,153 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Entprellung Modul:
+
+Dieses Modul enthält die Entprellung der Watcher-Ereignisse. Ein Browser erzeugt für einen Download mehrere
+Ereignisse, und eine Datei kann schon gemeldet werden, während sie noch geschrieben wird. Die Entprellung
+fasst die Ereignisse pro Pfad zusammen und gibt eine Datei erst frei, wenn sich Größe und Änderungszeit
+zwischen zwei Prüfungen nicht mehr ändern (oder die letzte Änderung länger als `SETTLE_DELAY` zurückliegt).
+
+Temporäre Download-Dateien (`.part`, `.crdownload`, ...) werden ignoriert. Solange neben einer Datei noch ihre
+temporäre Datei liegt (Firefox legt z. B. `foto.jpg` leer an und schreibt in `foto.jpg.part`), wird sie nicht
+freigegeben.
+
+Alle wartenden Pfade liegen in einem einzigen Timer-Rad mit `WHEEL_SLOTS` Fächern zu je `TICK_SECONDS`. Ein neues
+Ereignis verschiebt einen Pfad nur in ein anderes Fach; der Aufrufer braucht genau einen Timer (bzw. ein
+select-Timeout), unabhängig davon, wie viele Downloads gleichzeitig laufen.
+
+Klassen:
+- Debouncer: Das Timer-Rad der wartenden Pfade.
+"""
+import os
+import time
+
+TICK_SECONDS = 0.25
+WHEEL_SLOTS = 64
+SETTLE_DELAY = 1.0
+TEMPORARY_SUFFIXES = (".part", ".crdownload", ".download", ".partial", ".tmp")
+
+
+def _is_temporary(path):
+    """
+    Gibt an, ob ein Pfad eine temporäre Download-Datei ist.
+    """
+    return path.lower().endswith(TEMPORARY_SUFFIXES)
+
+
+class Debouncer:
+    """
+    Das Timer-Rad der Pfade, die auf eine stabile Größe und Änderungszeit warten.
+
+    Parameter:
+        settle_delay (float): Die Wartezeit in Sekunden nach dem letzten Ereignis und zwischen zwei Prüfungen.
+        tick_seconds (float): Die Dauer eines Fachs des Timer-Rads.
+        slots (int): Die Anzahl der Fächer.
+
+    Methoden:
+        add(paths, delay): Merkt Pfade vor oder verschiebt ihre Prüfung nach einem neuen Ereignis.
+        next_timeout(): Gibt die Zeit bis zum nächsten fälligen Fach zurück.
+        advance(): Prüft alle fälligen Pfade und gibt die stabilen zurück.
+    """
+
+    def __init__(self, settle_delay=SETTLE_DELAY, tick_seconds=TICK_SECONDS, slots=WHEEL_SLOTS):
+        self.settle_delay = settle_delay
+        self.tick_seconds = tick_seconds
+        self._slots = [set() for _ in range(slots)]
+        # Pfad -> [Fach, verbleibende Umläufe, zuletzt gesehene (Größe, Änderungszeit)]
+        self._entries = {}
+        self._cursor = 0
+        self._next_tick_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, paths, delay=None):
+        """
+        Merkt Pfade vor. Ist ein Pfad schon vorgemerkt, wird seine Prüfung nach hinten verschoben.
+
+        Args:
+            paths (iterable): Die gemeldeten Pfade.
+            delay (float): Die Wartezeit bis zur ersten Prüfung (Standard: `settle_delay`). Mit 0 wird beim
+                nächsten Fach geprüft, z. B. für die Dateien, die beim Start bereits vorhanden sind.
+        """
+        if self._next_tick_at is None:
+            self._next_tick_at = time.monotonic() + self.tick_seconds
+        delay = self.settle_delay if delay is None else delay
+        ticks = max(1, round(delay / self.tick_seconds))
+        for path in paths:
+            if _is_temporary(path):
+                continue
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._slots[entry[0]].discard(path)
+                # Ein neues Ereignis bedeutet eine neue Änderung; die letzte Prüfung gilt nicht mehr.
+                entry[2] = None
+            else:
+                entry = self._entries[path] = [0, 0, None]
+            self._schedule(path, entry, ticks)
+
+    def _schedule(self, path, entry, ticks):
+        """
+        Legt einen Pfad in das Fach, das in `ticks` Schritten fällig wird.
+        """
+        slot = (self._cursor + ticks) % len(self._slots)
+        entry[0] = slot
+        entry[1] = (ticks - 1) // len(self._slots)
+        self._slots[slot].add(path)
+
+    def next_timeout(self):
+        """
+        Gibt die Zeit bis zum nächsten fälligen Fach zurück.
+
+        Returns:
+            float: Die Wartezeit in Sekunden oder None, falls kein Pfad wartet.
+        """
+        if not self._entries:
+            return None
+        return max(0.0, self._next_tick_at - time.monotonic())
+
+    def advance(self):
+        """
+        Dreht das Timer-Rad bis zur aktuellen Zeit weiter und prüft die Pfade der fälligen Fächer.
+
+        Returns:
+            list: Die Pfade, deren Größe und Änderungszeit stabil sind.
+        """
+        settled = []
+        now = time.monotonic()
+        while self._entries and self._next_tick_at <= now:
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            self._next_tick_at += self.tick_seconds
+            slot = self._slots[self._cursor]
+            if slot:
+                self._slots[self._cursor] = set()
+                for path in slot:
+                    self._check(path, settled)
+        if not self._entries:
+            self._next_tick_at = None
+        return settled
+
+    def _check(self, path, settled):
+        """
+        Prüft einen fälligen Pfad: stabil, verschwunden oder erneut einplanen.
+        """
+        entry = self._entries[path]
+        if entry[1] > 0:
+            entry[1] -= 1
+            self._slots[entry[0]].add(path)
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            del self._entries[path]
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        busy = any(os.path.lexists(path + suffix) for suffix in TEMPORARY_SUFFIXES)
+        quiet = time.time() - stat.st_mtime >= self.settle_delay
+        if not busy and (signature == entry[2] or (entry[2] is None and quiet)):
+            del self._entries[path]
+            settled.append(path)
+            return
+        entry[2] = signature
+        self._schedule(path, entry, max(1, round(self.settle_delay / self.tick_seconds)))
@@ -0,0 +1,237 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Messung Modul:
+
+Dieses Modul enthält eine schlanke Zeitmessung für die kritischen Pfade der Anwendung (Start, Anmeldung,
+Laden des Passwortmanagers, Verschiebungen, Verlaufs-Commits). Sie wird über die Umgebungsvariable
+`AUTOMATISIERUNG_MESSUNG` eingeschaltet:
+
+    AUTOMATISIERUNG_MESSUNG=1 python MainApp.py                # schreibt nach messung.jsonl
+    AUTOMATISIERUNG_MESSUNG=/tmp/start.jsonl python MainApp.py  # schreibt in die angegebene Datei
+
+Jede Messung wird als JSON-Zeile in eine rotierende Datei geschrieben (höchstens `MAX_FILE_BYTES`, danach
+wird sie in `<datei>.1` bis `<datei>.<BACKUP_COUNT>` umbenannt). Beim Beenden wird eine Übersicht mit
+Anzahl, p50 und p95 je Messpunkt sowie den Zählerständen auf stderr ausgegeben. Für p50 und p95 wird je
+Messpunkt nur eine Stichprobe von höchstens `RESERVOIR_SIZE` Dauern gehalten, damit der Speicher auch in einem
+lange laufenden Dienst begrenzt bleibt; Anzahl und Summe sind exakt.
+
+Ist die Messung ausgeschaltet, gibt `span` ein gemeinsames Objekt ohne Wirkung zurück, `count` und `mark`
+kehren sofort zurück, und `timed` gibt die Funktion unverändert zurück.
+
+Funktionen:
+- span(name): Kontextmanager, der die Dauer eines Blocks misst.
+- timed(name): Dekorator, der die Dauer jedes Aufrufs misst.
+- count(name, value): Erhöht einen Zähler.
+- mark(name): Misst die Zeit seit dem Prozessstart bis zu diesem Punkt.
+"""
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from functools import wraps
+
+ENV_VAR = "AUTOMATISIERUNG_MESSUNG"
+DEFAULT_METRICS_FILE = "messung.jsonl"
+MAX_FILE_BYTES = 5 * 1024 ** 2
+BACKUP_COUNT = 3
+WRITE_BATCH_SIZE = 100
+RESERVOIR_SIZE = 1024
+
+PROCESS_START = time.perf_counter()
+
+
+class _NullSpan:
+    """
+    Ein Kontextmanager ohne Wirkung für die ausgeschaltete Messung.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        return False
+
+
+class _Span:
+    """
+    Misst die Dauer eines Blocks und meldet sie dem Recorder.
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc_info):
+        _recorder.record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Reservoir:
+    """
+    Anzahl, Summe und eine gleichverteilte Stichprobe fester Größe der Dauern eines Messpunkts (Algorithm R).
+    """
+
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = []
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(seconds)
+        else:
+            index = random.randrange(self.count)
+            if index < RESERVOIR_SIZE:
+                self.samples[index] = seconds
+
+
+class _Recorder:
+    """
+    Sammelt Messungen, schreibt sie gebündelt in die rotierende Datei und gibt beim Beenden die Übersicht aus.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._durations = {}
+        self._counters = {}
+
+    def record_span(self, name, seconds):
+        with self._lock:
+            reservoir = self._durations.get(name)
+            if reservoir is None:
+                reservoir = self._durations[name] = _Reservoir()
+            reservoir.add(seconds)
+            self._add({"type": "span", "name": name, "ms": round(seconds * 1000, 3)})
+
+    def record_count(self, name, value):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            self._add({"type": "count", "name": name, "value": value})
+
+    def _add(self, record):
+        record["ts"] = time.time()
+        record["thread"] = threading.current_thread().name
+        self._buffer.append(json.dumps(record))
+        if len(self._buffer) >= WRITE_BATCH_SIZE:
+            self._write()
+
+    def _write(self):
+        """
+        Hängt die gepufferten Zeilen an die Datei an und rotiert sie, sobald sie zu groß wird.
+        """
+        if not self._buffer:
+            return
+        data = "\n".join(self._buffer) + "\n"
+        self._buffer = []
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > MAX_FILE_BYTES:
+                for index in range(BACKUP_COUNT - 1, 0, -1):
+                    if os.path.exists(f"{self.path}.{index}"):
+                        os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a") as file:
+                file.write(data)
+        except OSError as error:
+            print(f"Messung: {self.path} konnte nicht geschrieben werden: {error}", file=sys.stderr)
+
+    def close(self):
+        """
+        Schreibt die restlichen Messungen und gibt die Übersicht auf stderr aus.
+        """
+        with self._lock:
+            self._write()
+            durations = {name: (reservoir.count, reservoir.total, sorted(reservoir.samples))
+                         for name, reservoir in self._durations.items()}
+            counters = dict(self._counters)
+        if not durations and not counters:
+            return
+
+        lines = [f"{'Messpunkt':<40} {'Anzahl':>7} {'p50 ms':>10} {'p95 ms':>10} {'Summe ms':>11}"]
+        for name, (number, total, values) in sorted(durations.items()):
+            p50 = values[int(0.50 * (len(values) - 1))]
+            p95 = values[int(0.95 * (len(values) - 1))]
+            lines.append(f"{name:<40} {number:>7} {p50 * 1000:>10.2f} {p95 * 1000:>10.2f} "
+                         f"{total * 1000:>11.2f}")
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name:<40} {value:>7}")
+        print("\n".join(lines), file=sys.stderr)
+
+
+def _null_span(_name):
+    return _NULL_SPAN
+
+
+def _null_timed(_name):
+    return lambda function: function
+
+
+def _null_count(_name, _value=1):
+    return None
+
+
+def _null_mark(_name):
+    return None
+
+
+def _span(name):
+    """
+    Gibt einen Kontextmanager zurück, der die Dauer eines Blocks unter `name` misst.
+    """
+    return _Span(name)
+
+
+def _timed(name):
+    """
+    Gibt einen Dekorator zurück, der die Dauer jedes Aufrufs unter `name` misst.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _count(name, value=1):
+    """
+    Erhöht den Zähler `name` um `value`.
+    """
+    _recorder.record_count(name, value)
+
+
+def _mark(name):
+    """
+    Misst die Zeit seit dem Prozessstart (genauer: seit dem Import dieses Moduls) bis zu diesem Punkt.
+    """
+    _recorder.record_span(name, time.perf_counter() - PROCESS_START)
+
+
+_NULL_SPAN = _NullSpan()
+_setting = os.environ.get(ENV_VAR, "")
+ENABLED = _setting not in ("", "0")
+
+if ENABLED:
+    _recorder = _Recorder(DEFAULT_METRICS_FILE if _setting == "1" else _setting)
+    atexit.register(_recorder.close)
+    span, timed, count, mark = _span, _timed, _count, _mark
+else:
+    span, timed, count, mark = _null_span, _null_timed, _null_count, _null_mark
@@ -0,0 +1,258 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Metadaten Modul:
+
+Dieses Modul liest das Aufnahmedatum von Fotos, ohne die Bilddaten zu lesen. Es werden nur die Köpfe der
+Dateien ausgewertet:
+
+- JPEG: die Segmente vor den Bilddaten (Start of Scan), darin das APP1-Segment mit den EXIF-Daten,
+- PNG: die Chunks vor dem ersten IDAT-Chunk, darin ein eXIf-Chunk,
+- HEIC/HEIF: die meta-Box am Dateianfang; das darin verzeichnete Exif-Element wird gezielt gelesen.
+
+Gelesen werden höchstens `HEADER_BYTES` am Dateianfang (bei HEIC bis zu `MAX_META_BYTES` für eine große
+meta-Box) und bei HEIC zusätzlich nur das kleine Exif-Element. Aus den EXIF-Daten wird DateTimeOriginal
+verwendet, ersatzweise DateTime.
+
+Funktionen:
+- read_capture_time(path): Gibt den Aufnahmezeitpunkt einer Bilddatei zurück.
+- parse_exif(data): Liest den Aufnahmezeitpunkt aus einem TIFF-/EXIF-Block.
+"""
+import struct
+import time
+
+HEADER_BYTES = 64 * 1024
+MAX_META_BYTES = 1024 * 1024
+MAX_EXIF_BYTES = 256 * 1024
+
+_TAG_DATE_TIME = 0x0132
+_TAG_EXIF_IFD = 0x8769
+_TAG_DATE_TIME_ORIGINAL = 0x9003
+_TYPE_ASCII = 2
+_TYPE_LONG = 4
+_HEIF_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1", b"avif"}
+
+
+def read_capture_time(path):
+    """
+    Gibt den Aufnahmezeitpunkt einer Bilddatei zurück.
+
+    Args:
+        path (str): Der Pfad einer JPEG-, PNG- oder HEIC-Datei.
+
+    Returns:
+        float: Der Aufnahmezeitpunkt (lokale Zeit) in Sekunden seit der Epoche oder None, falls die Datei
+        kein lesbares Aufnahmedatum enthält.
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER_BYTES)
+        try:
+            if header.startswith(b"\xff\xd8"):
+                return _jpeg_capture_time(header)
+            if header.startswith(b"\x89PNG\r\n\x1a\n"):
+                return _png_capture_time(header)
+            if header[4:8] == b"ftyp" and header[8:12] in _HEIF_BRANDS:
+                return _heif_capture_time(file, header)
+        except (struct.error, ValueError, IndexError):
+            # Beschädigte oder abgeschnittene Köpfe werden wie Dateien ohne Datum behandelt.
+            return None
+    return None
+
+
+def _jpeg_capture_time(header):
+    """
+    Durchsucht die JPEG-Segmente vor den Bilddaten nach dem EXIF-Segment.
+    """
+    offset = 2
+    while offset + 4 <= len(header):
+        if header[offset] != 0xFF:
+            return None
+        marker = header[offset + 1]
+        if marker == 0xFF:
+            # Füllbytes zwischen Segmenten.
+            offset += 1
+            continue
+        if marker == 0xDA:
+            return None
+        length = struct.unpack_from(">H", header, offset + 2)[0]
+        segment = header[offset + 4:offset + 2 + length]
+        if marker == 0xE1 and segment.startswith(b"Exif\0\0"):
+            return parse_exif(segment[6:])
+        offset += 2 + length
+    return None
+
+
+def _png_capture_time(header):
+    """
+    Durchsucht die PNG-Chunks vor den Bilddaten nach einem eXIf-Chunk.
+    """
+    offset = 8
+    while offset + 8 <= len(header):
+        length, chunk_type = struct.unpack_from(">I4s", header, offset)
+        if chunk_type == b"IDAT":
+            return None
+        if chunk_type == b"eXIf":
+            return parse_exif(header[offset + 8:offset + 8 + length])
+        offset += 12 + length
+    return None
+
+
+def _iter_boxes(data, offset=0, end=None):
+    """
+    Liefert (Typ, Beginn des Inhalts, Ende) der ISO-BMFF-Boxen eines Bereichs.
+    """
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _heif_capture_time(file, header):
+    """
+    Sucht in der meta-Box das Exif-Element, liest nur dieses und wertet es aus.
+    """
+    for box_type, start, end in _iter_boxes(header):
+        if box_type != b"meta":
+            continue
+        if end > len(header):
+            if end > MAX_META_BYTES:
+                return None
+            header += file.read(end - len(header))
+        # meta ist eine FullBox: Version und Flags überspringen.
+        exif_id, locations = None, {}
+        for child_type, child_start, child_end in _iter_boxes(header, start + 4, end):
+            if child_type == b"iinf":
+                exif_id = _heif_exif_item(header, child_start, child_end)
+            elif child_type == b"iloc":
+                locations = _heif_locations(header, child_start)
+        extents = locations.get(exif_id)
+        if not extents:
+            return None
+        offset, length = extents[0]
+        if length > MAX_EXIF_BYTES:
+            return None
+        file.seek(offset)
+        item = file.read(length)
+        # Das Exif-Element beginnt mit dem Abstand bis zum TIFF-Kopf (meist nach "Exif\0\0").
+        tiff_offset = struct.unpack_from(">I", item, 0)[0] + 4
+        return parse_exif(item[tiff_offset:])
+    return None
+
+
+def _heif_exif_item(data, start, end):
+    """
+    Gibt die ID des Elements vom Typ "Exif" aus der iinf-Box zurück.
+    """
+    version = data[start]
+    offset = start + 4 + (2 if version == 0 else 4)
+    for box_type, entry_start, _entry_end in _iter_boxes(data, offset, end):
+        if box_type != b"infe" or data[entry_start] < 2:
+            continue
+        if data[entry_start] == 2:
+            item_id, item_type = struct.unpack_from(">H2x4s", data, entry_start + 4)
+        else:
+            item_id, item_type = struct.unpack_from(">I2x4s", data, entry_start + 4)
+        if item_type == b"Exif":
+            return item_id
+    return None
+
+
+def _heif_locations(data, start):
+    """
+    Liest die iloc-Box und gibt für jedes Element die Liste (Dateiposition, Länge) seiner Bereiche zurück.
+    """
+    def read_number(offset, size):
+        return (int.from_bytes(data[offset:offset + size], "big"), offset + size)
+
+    version = data[start]
+    offset = start + 4
+    offset_size, length_size = data[offset] >> 4, data[offset] & 0x0F
+    base_offset_size = data[offset + 1] >> 4
+    index_size = data[offset + 1] & 0x0F if version in (1, 2) else 0
+    offset += 2
+    item_count, offset = read_number(offset, 2 if version < 2 else 4)
+
+    locations = {}
+    for _ in range(item_count):
+        item_id, offset = read_number(offset, 2 if version < 2 else 4)
+        construction_method = 0
+        if version in (1, 2):
+            construction_method, offset = read_number(offset, 2)
+            construction_method &= 0x0F
+        offset += 2  # data_reference_index
+        base_offset, offset = read_number(offset, base_offset_size)
+        extent_count, offset = read_number(offset, 2)
+        extents = []
+        for _ in range(extent_count):
+            offset += index_size
+            extent_offset, offset = read_number(offset, offset_size)
+            extent_length, offset = read_number(offset, length_size)
+            extents.append((base_offset + extent_offset, extent_length))
+        # Nur Elemente mit Dateiposition (construction_method 0) können gezielt gelesen werden.
+        if construction_method == 0:
+            locations[item_id] = extents
+    return locations
+
+
+def parse_exif(data):
+    """
+    Liest den Aufnahmezeitpunkt aus einem TIFF-/EXIF-Block.
+
+    Args:
+        data (bytes): Der Block ab dem TIFF-Kopf ("II*\\0" oder "MM\\0*").
+
+    Returns:
+        float: Der Aufnahmezeitpunkt (lokale Zeit) in Sekunden seit der Epoche oder None.
+    """
+    if data[:4] == b"II*\0":
+        order = "<"
+    elif data[:4] == b"MM\0*":
+        order = ">"
+    else:
+        return None
+    ifd0 = _read_ifd(data, order, struct.unpack_from(order + "I", data, 4)[0])
+    exif_pointer = ifd0.get(_TAG_EXIF_IFD)
+    if exif_pointer is not None:
+        exif_ifd = _read_ifd(data, order, exif_pointer)
+        captured_at = _parse_date(exif_ifd.get(_TAG_DATE_TIME_ORIGINAL))
+        if captured_at is not None:
+            return captured_at
+    return _parse_date(ifd0.get(_TAG_DATE_TIME))
+
+
+def _read_ifd(data, order, offset):
+    """
+    Gibt die für das Datum benötigten Einträge eines IFD als {Tag: Wert} zurück.
+    """
+    values = {}
+    count = struct.unpack_from(order + "H", data, offset)[0]
+    for index in range(count):
+        tag, value_type, value_count, value = struct.unpack_from(order + "HHI4s", data, offset + 2 + 12 * index)
+        if tag == _TAG_EXIF_IFD and value_type == _TYPE_LONG:
+            values[tag] = struct.unpack(order + "I", value)[0]
+        elif tag in (_TAG_DATE_TIME, _TAG_DATE_TIME_ORIGINAL) and value_type == _TYPE_ASCII and value_count > 4:
+            start = struct.unpack(order + "I", value)[0]
+            values[tag] = data[start:start + value_count].rstrip(b"\0 ").decode("ascii", "replace")
+    return values
+
+
+def _parse_date(text):
+    """
+    Wandelt ein EXIF-Datum ("2024:05:17 14:03:22") in Sekunden seit der Epoche um.
+    """
+    if not text:
+        return None
+    try:
+        return time.mktime(time.strptime(text[:19], "%Y:%m:%d %H:%M:%S"))
+    except (ValueError, OverflowError):
+        # Kameras ohne gestellte Uhr schreiben z. B. "0000:00:00 00:00:00".
+        return None
@@ -0,0 +1,290 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Modelle Modul:
+
+Dieses Modul enthält die Qt-Modelle für die Tabellen der Anwendung. Die Modelle halten nur die Daten,
+die die Ansicht tatsächlich angefordert hat, und erzeugen keine Widgets pro Zeile.
+
+Klassen:
+- MovedFilesModel: Das Tabellenmodell für den Verlauf der verschobenen Dateien.
+- PasswordListModel: Das filterbare Tabellenmodell für die gespeicherten Passwörter.
+"""
+from PyQt5.QtCore import QAbstractTableModel, QDateTime, QModelIndex, Qt, QTimer
+
+INSERT_BATCH_DELAY = 50
+# Wird statt eines Passworts angezeigt, das nicht entschlüsselt werden kann.
+UNREADABLE_PASSWORD = "(nicht lesbar)"
+
+
+class MovedFilesModel(QAbstractTableModel):
+    """
+    Das Tabellenmodell für den Verlauf der verschobenen Dateien, die neuesten zuerst.
+
+    Ältere Einträge werden seitenweise über `canFetchMore`/`fetchMore` aus dem Verlaufsspeicher geladen,
+    sobald die Ansicht bis ans Ende scrollt. Neue Verschiebungen werden gesammelt und gebündelt oben eingefügt.
+    Vorschaubilder werden nur für die Zeilen angefordert, die die Ansicht tatsächlich zeichnet.
+
+    Parameter:
+        history (HistoryStore): Der Verlaufsspeicher.
+        page_size (int): Die Anzahl Einträge, die pro `fetchMore` geladen werden.
+        thumbnails (ThumbnailService): Liefert die Vorschaubilder der ersten Spalte (optional).
+
+    Methoden:
+        add_moved_file(entry_id, filename, target_path, moved_at): Fügt eine neue Verschiebung hinzu.
+        target_path(row): Gibt den Zielpfad der Datei in einer Zeile zurück.
+    """
+
+    HEADERS = ["Dateiname", "Verschiebungszeitpunkt"]
+
+    def __init__(self, history, page_size=200, parent=None, thumbnails=None):
+        super().__init__(parent)
+        self.history = history
+        self.page_size = page_size
+        self.thumbnails = thumbnails
+        self._rows = []
+        self._exhausted = False
+        self._oldest_id = None
+        self._newest_fetched_id = None
+        self._pending = []
+        self._insert_timer = QTimer(self)
+        self._insert_timer.setSingleShot(True)
+        self._insert_timer.setInterval(INSERT_BATCH_DELAY)
+        self._insert_timer.timeout.connect(self._insert_pending)
+        self._decoration_timer = QTimer(self)
+        self._decoration_timer.setSingleShot(True)
+        self._decoration_timer.setInterval(INSERT_BATCH_DELAY)
+        self._decoration_timer.timeout.connect(self._update_decorations)
+        if thumbnails is not None:
+            thumbnails.thumbnail_ready.connect(self._decoration_timer.start)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _entry_id, filename, target_path, moved_at = self._rows[index.row()]
+        if role == Qt.DecorationRole and index.column() == 0 and self.thumbnails is not None and target_path:
+            return self.thumbnails.pixmap(target_path)
+        if role != Qt.DisplayRole:
+            return None
+        if index.column() == 0:
+            return filename
+        return QDateTime.fromMSecsSinceEpoch(int(moved_at * 1000)).toString(Qt.DefaultLocaleLongDate)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        page = self.history.page(before_id=self._oldest_id, limit=self.page_size)
+        if self._newest_fetched_id is None:
+            self._newest_fetched_id = page[0][0] if page else 0
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        self._oldest_id = page[-1][0]
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def add_moved_file(self, entry_id, filename, target_path, moved_at):
+        """
+        Fügt eine neue Verschiebung hinzu. Die Zeilen werden gesammelt und gebündelt eingefügt.
+
+        Args:
+            entry_id (int): Die ID des Eintrags im Verlaufsspeicher.
+            filename (str): Der Name der verschobenen Datei.
+            target_path (str): Der Zielpfad der Datei.
+            moved_at (float): Der Zeitpunkt der Verschiebung in Sekunden seit der Epoche.
+        """
+        self._pending.append((entry_id, filename, target_path, moved_at))
+        if not self._insert_timer.isActive():
+            self._insert_timer.start()
+
+    def _insert_pending(self):
+        """
+        Fügt alle gesammelten Verschiebungen mit einem einzigen Insert oben in die Tabelle ein.
+
+        Einträge, die bereits mit der ersten Seite aus dem Verlaufsspeicher geladen wurden, werden übersprungen.
+        """
+        newest_fetched_id = self._newest_fetched_id or 0
+        batch = sorted((entry for entry in self._pending if entry[0] > newest_fetched_id), reverse=True)
+        self._pending = []
+        if not batch:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(batch) - 1)
+        self._rows[0:0] = batch
+        self.endInsertRows()
+
+    def _update_decorations(self):
+        """
+        Meldet der Ansicht gebündelt, dass neue Vorschaubilder bereitstehen. Die Ansicht zeichnet daraufhin
+        nur die sichtbaren Zeilen neu.
+        """
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, 0), [Qt.DecorationRole])
+
+    def target_path(self, row):
+        """
+        Gibt den Zielpfad der Datei in einer Zeile zurück.
+
+        Args:
+            row (int): Die Zeilennummer.
+
+        Returns:
+            str: Der Zielpfad oder None, falls er nicht gespeichert wurde.
+        """
+        return self._rows[row][2]
+
+
+class PasswordListModel(QAbstractTableModel):
+    """
+    Das filterbare Tabellenmodell für die gespeicherten Passwörter, nach Benutzernamen sortiert.
+
+    Das Modell zeigt einen zusammenhängenden Bereich des sortierten Präfix-Index des PasswordManager.
+    Ein Filter verschiebt nur die Bereichsgrenzen (zwei binäre Suchen), und ein Passwort wird erst
+    entschlüsselt, wenn die Ansicht seine Zeile anzeigt.
+
+    Parameter:
+        password_manager (PasswordManager): Der Passwortmanager mit dem Präfix-Index `usernames`.
+
+    Methoden:
+        set_filter(prefix): Zeigt nur Benutzernamen mit diesem Präfix an.
+        refresh(): Übernimmt die Änderungen anderer Prozesse.
+        save_password(username, password): Speichert ein Passwort und fügt die Zeile ein.
+        username(row): Gibt den Benutzernamen einer Zeile zurück.
+    """
+
+    HEADERS = ["Benutzername", "Passwort"]
+
+    def __init__(self, password_manager, parent=None):
+        super().__init__(parent)
+        self.password_manager = password_manager
+        self._prefix = ""
+        self._start, self._end = password_manager.usernames.range("")
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._end - self._start
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        username = self.username(index.row())
+        if index.column() == 0:
+            return username
+        try:
+            return self.password_manager.get_password(username)
+        except ValueError:
+            # Ein beschädigter oder fremder Eintrag darf das Zeichnen der Tabelle nicht abbrechen.
+            return UNREADABLE_PASSWORD
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def set_filter(self, prefix):
+        """
+        Zeigt nur Benutzernamen an, die mit dem Präfix beginnen (ohne Beachtung der Groß- und Kleinschreibung).
+
+        Args:
+            prefix (str): Das Präfix; ein leeres Präfix zeigt alle Einträge.
+        """
+        self.beginResetModel()
+        self._prefix = prefix.casefold()
+        self.password_manager.refresh()
+        self._start, self._end = self.password_manager.usernames.range(self._prefix)
+        self.endResetModel()
+
+    def refresh(self):
+        """
+        Übernimmt die Änderungen anderer Prozesse. Das Modell wird nur zurückgesetzt, wenn es welche gab.
+        """
+        if self.password_manager.store.has_changes():
+            self._reset_range()
+
+    def _reset_range(self):
+        """
+        Gleicht den Präfix-Index ab und berechnet den angezeigten Bereich neu.
+        """
+        self.beginResetModel()
+        self.password_manager.refresh()
+        self._start, self._end = self.password_manager.usernames.range(self._prefix)
+        self.endResetModel()
+
+    def save_password(self, username, password):
+        """
+        Speichert ein Passwort über den PasswordManager und fügt die Zeile an der sortierten Position ein,
+        falls sie zum aktuellen Filter passt. Hatte ein anderer Prozess inzwischen Einträge geändert, wird das
+        Modell danach zurückgesetzt.
+
+        Args:
+            username (str): Der Benutzername.
+            password (str): Das Passwort.
+        """
+        usernames = self.password_manager.usernames
+        position = usernames.position(username)
+        if username in usernames:
+            if self.password_manager.save_password(username, password):
+                self._reset_range()
+            elif self._start <= position < self._end:
+                row = position - self._start
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+            return
+
+        if username.casefold().startswith(self._prefix):
+            row = position - self._start
+            # Der Präfix-Index wird erst zwischen beginInsertRows und endInsertRows geändert.
+            self.beginInsertRows(QModelIndex(), row, row)
+            try:
+                merged = self.password_manager.save_password(username, password)
+            except BaseException:
+                # Die Einfügung muss abgeschlossen werden; das Zurücksetzen danach gleicht die Ansicht wieder ab.
+                self.endInsertRows()
+                self._reset_range()
+                raise
+            self._end += 1
+            self.endInsertRows()
+        else:
+            merged = self.password_manager.save_password(username, password)
+            if position < self._start:
+                self._start += 1
+                self._end += 1
+        if merged:
+            self._reset_range()
+
+    def username(self, row):
+        """
+        Gibt den Benutzernamen einer Zeile zurück.
+
+        Args:
+            row (int): Die Zeilennummer.
+
+        Returns:
+            str: Der Benutzername.
+        """
+        return self.password_manager.usernames[self._start + row]
@@ -0,0 +1,144 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Ordnerstand Modul:
+
+Dieses Modul enthält den gespeicherten Stand der Quellordner für den Durchlauf beim Start. Ohne ihn wird bei
+jedem Start der ganze Downloads-Ordner gelistet und jeder Name gegen die Regeln geprüft, obwohl sich in einem
+großen Ordner meist nichts Passendes geändert hat.
+
+Pro Quellordner werden seine Änderungszeit und die bereits gesehenen, nicht passenden Einträge mit ihrer Inode
+gespeichert:
+
+- Hat sich die Änderungszeit des Ordners nicht geändert (und passten beim letzten Mal keine Einträge), wird der
+  Ordner gar nicht gelistet.
+- Sonst wird er mit `os.scandir` gelistet. Name und Inode stammen direkt aus dem Verzeichniseintrag; ein
+  bekannter Eintrag mit derselben Inode wird ohne weiteren Systemaufruf und ohne Regelprüfung übersprungen.
+  Nur neue Einträge werden gegen die Regeln geprüft.
+
+Die Regeln entscheiden allein anhand des Namens. Ändern sich die Regeln, wird der Stand des Ordners verworfen.
+
+Die Einträge eines Ordners werden als zwei Blöcke gespeichert (die Namen durch Nullbytes getrennt und die Inodes
+als Zahlenfeld), da das Einlesen hunderttausender einzelner Tabellenzeilen länger dauern würde als das Listen.
+
+Klassen:
+- DirectorySnapshot: Der gespeicherte Stand der Quellordner.
+"""
+import os
+import sqlite3
+import threading
+from array import array
+
+DEFAULT_SNAPSHOT_FILE = "ordnerstand.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    rules_key TEXT NOT NULL,
+    clean INTEGER NOT NULL,
+    names BLOB NOT NULL,
+    inodes BLOB NOT NULL
+);
+"""
+
+
+class DirectorySnapshot:
+    """
+    Der gespeicherte Stand der Quellordner.
+
+    Parameter:
+        path (str): Der Pfad der Datenbankdatei.
+
+    Methoden:
+        scan(directory, rules_key, is_relevant): Gibt die neuen passenden Einträge eines Ordners zurück.
+        close(): Schließt die Datenbank.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def scan(self, directory, rules_key, is_relevant):
+        """
+        Gibt die Einträge eines Ordners zurück, die seit dem letzten Durchlauf hinzugekommen sind und zu den
+        Regeln passen. Nicht passende Einträge werden in den Stand übernommen.
+
+        Passende Einträge werden nicht übernommen; sie werden bei jedem Durchlauf erneut zurückgegeben, solange
+        sie im Ordner liegen (z. B. weil ihre Verschiebung fehlgeschlagen ist).
+
+        Args:
+            directory (str): Der Quellordner.
+            rules_key (str): Ein Schlüssel der aktuellen Regeln (`RuleSet.fingerprint`).
+            is_relevant (callable): Gibt für einen Pfad an, ob eine Regel zu ihm passt.
+
+        Returns:
+            list: Die Pfade der passenden Einträge.
+        """
+        try:
+            # Die Änderungszeit wird vor dem Listen gelesen: Ändert sich der Ordner währenddessen, wird er beim
+            # nächsten Mal erneut gelistet.
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+        known = {}
+        with self._lock:
+            state = self._connection.execute(
+                "SELECT mtime_ns, rules_key, clean FROM directories WHERE path = ?", (directory,)
+            ).fetchone()
+            if state is not None and state[1] == rules_key:
+                if state[2] and state[0] == mtime_ns:
+                    return []
+                names, inodes = self._connection.execute(
+                    "SELECT names, inodes FROM directories WHERE path = ?", (directory,)
+                ).fetchone()
+                known = dict(zip(_decode_names(names), array("Q", inodes)))
+
+        relevant = []
+        names = []
+        inodes = array("Q")
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    inode = entry.inode()
+                    if known.get(entry.name) != inode and entry.is_file() and is_relevant(entry.path):
+                        relevant.append(entry.path)
+                    else:
+                        names.append(entry.name)
+                        inodes.append(inode)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns, rules_key, clean, names, inodes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (directory, mtime_ns, rules_key, not relevant, _encode_names(names), inodes.tobytes()),
+            )
+        return relevant
+
+    def close(self):
+        """
+        Schließt die Datenbank.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+def _encode_names(names):
+    """
+    Fügt die Namen eines Ordners durch Nullbytes getrennt zu einem Block zusammen.
+    """
+    return "\0".join(names).encode("utf-8", "surrogateescape")
+
+
+def _decode_names(data):
+    """
+    Zerlegt einen mit `_encode_names` erzeugten Block wieder in die Namen.
+    """
+    return data.decode("utf-8", "surrogateescape").split("\0") if data else []
@@ -0,0 +1,182 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Passwort-Hash Modul:
+
+Dieses Modul enthält das Hashing der Anmeldepasswörter. Passwörter werden mit scrypt, einem zufälligen Salt
+und einem versionierten Format gespeichert:
+
+    scrypt$1$<log2 n>$<r>$<p>$<salt base64>$<hash base64>
+
+Die Kosten (n) werden einmal pro Prozess auf dem Rechner so kalibriert, dass ein Hash ungefähr
+`TARGET_SECONDS` dauert, höchstens aber `MAX_COST` (128 MiB Speicher je Hash), damit ein schneller Rechner
+keine Hashes erzeugt, die ein kleinerer mit derselben users.jsonl nicht mehr prüfen kann. Da die Parameter
+im gespeicherten Hash stehen, bleiben ältere Hashes nach einer neuen Kalibrierung weiterhin prüfbar; Hashes
+mit höheren Kosten werden abgelehnt. Alte ungesalzene SHA-256-Hashes werden erkannt und als zu erneuern
+gemeldet.
+
+Weil ein Hash bewusst langsam ist, führt der HashingService die Berechnung in einem Worker-Thread aus und
+ruft danach einen Callback auf, den die Dialoge mit einem Qt-Signal verbinden.
+
+Klassen:
+- HashingService: Führt Hash-Berechnungen in einem Worker-Thread aus.
+
+Funktionen:
+- calibrate_cost(target_seconds): Ermittelt die scrypt-Kosten für die Zielzeit.
+- hash_password(password, cost): Berechnet einen gesalzenen, versionierten Hash.
+- verify_password(password, stored_hash): Prüft ein Passwort gegen einen gespeicherten Hash.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_SCHEME = "scrypt"
+HASH_VERSION = 1
+TARGET_SECONDS = 0.25
+MIN_COST = 14
+# Speicherbedarf je Hash: 128 * BLOCK_SIZE * 2 ** cost Bytes, bei MAX_COST also 128 MiB.
+MAX_COST = 17
+BLOCK_SIZE = 8
+PARALLELISM = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_calibrated_cost = None
+_calibration_lock = threading.Lock()
+
+
+def _scrypt(password, salt, cost, block_size, parallelism):
+    """
+    Berechnet scrypt mit n = 2 ** cost. Das Speicherlimit entspricht genau dem Bedarf (V: 128 * r * (n + 2),
+    B: 128 * r * p), damit das Standardlimit von OpenSSL (32 MiB) nicht greift.
+    """
+    n = 2 ** cost
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=block_size, p=parallelism,
+                          maxmem=128 * block_size * (n + 2 + parallelism), dklen=KEY_BYTES)
+
+
+def calibrate_cost(target_seconds=TARGET_SECONDS):
+    """
+    Ermittelt die scrypt-Kosten, bei denen ein Hash auf diesem Rechner mindestens `target_seconds` dauert.
+    Das Ergebnis wird für den Prozess zwischengespeichert.
+
+    Args:
+        target_seconds (float): Die angestrebte Dauer eines Hashes in Sekunden.
+
+    Returns:
+        int: Der Exponent der Kosten (n = 2 ** cost).
+    """
+    global _calibrated_cost
+    with _calibration_lock:
+        if _calibrated_cost is None:
+            cost = MIN_COST
+            while cost < MAX_COST:
+                start = time.perf_counter()
+                _scrypt("kalibrierung", b"\0" * SALT_BYTES, cost, BLOCK_SIZE, PARALLELISM)
+                elapsed = time.perf_counter() - start
+                # Jede Verdopplung von n verdoppelt ungefähr die Dauer.
+                if elapsed * 2 > target_seconds * 1.5:
+                    break
+                cost += 1
+            _calibrated_cost = cost
+        return _calibrated_cost
+
+
+def hash_password(password, cost=None):
+    """
+    Berechnet einen gesalzenen, versionierten scrypt-Hash.
+
+    Args:
+        password (str): Das Passwort.
+        cost (int): Der Exponent der Kosten (Standard: kalibrierter Wert).
+
+    Returns:
+        str: Der Hash im Format scrypt$1$<log2 n>$<r>$<p>$<salt>$<hash>.
+    """
+    if cost is None:
+        cost = calibrate_cost()
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, cost, BLOCK_SIZE, PARALLELISM)
+    return "$".join([HASH_SCHEME, str(HASH_VERSION), str(cost), str(BLOCK_SIZE), str(PARALLELISM),
+                     base64.b64encode(salt).decode(), base64.b64encode(key).decode()])
+
+
+def verify_password(password, stored_hash):
+    """
+    Prüft ein Passwort gegen einen gespeicherten Hash.
+
+    Args:
+        password (str): Das eingegebene Passwort.
+        stored_hash (str): Der gespeicherte Hash (scrypt-Format oder alter SHA-256-Hex-Text).
+
+    Returns:
+        tuple: (korrekt, erneuern). `erneuern` ist True, wenn der Hash in einem veralteten Format vorliegt
+            und nach erfolgreicher Prüfung neu berechnet werden sollte. Ein unlesbarer Hash oder einer mit
+            höheren Kosten als `MAX_COST` bzw. `BLOCK_SIZE` und `PARALLELISM` ergibt (False, False).
+    """
+    if _LEGACY_SHA256.match(stored_hash):
+        digest = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(digest, stored_hash), True
+
+    parts = stored_hash.split("$")
+    if len(parts) != 7 or parts[0] != HASH_SCHEME:
+        return False, False
+    try:
+        version, cost, block_size, parallelism = (int(part) for part in parts[1:5])
+        salt, expected = base64.b64decode(parts[5]), base64.b64decode(parts[6])
+    except ValueError:
+        return False, False
+    if not (1 <= cost <= MAX_COST and 1 <= block_size <= BLOCK_SIZE and 1 <= parallelism <= PARALLELISM):
+        return False, False
+    actual = _scrypt(password, salt, cost, block_size, parallelism)
+    return hmac.compare_digest(actual, expected), version < HASH_VERSION
+
+
+class HashingService:
+    """
+    Führt Hash-Berechnungen in einem Worker-Thread aus, damit die Dialoge nicht einfrieren.
+
+    Der Callback wird im Worker-Thread mit (result, error) aufgerufen; Qt-Dialoge übergeben dafür die
+    `emit`-Methode eines Signals, das dann im GUI-Thread zugestellt wird.
+
+    Methoden:
+        submit(function, *args, on_done): Führt eine Funktion im Worker-Thread aus.
+        warm_up(): Kalibriert die Kosten im Hintergrund vorab.
+        shutdown(): Beendet den Worker-Thread.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-hash")
+
+    def submit(self, function, *args, on_done=None):
+        """
+        Führt eine Funktion im Worker-Thread aus.
+
+        Args:
+            function (callable): Die auszuführende Funktion, z. B. `UserRepository.check_password`.
+            *args: Die Argumente der Funktion.
+            on_done (callable): Wird mit (result, error) aufgerufen; `error` ist None bei Erfolg.
+        """
+        future = self._executor.submit(function, *args)
+        if on_done is not None:
+            future.add_done_callback(
+                lambda done: on_done(None, done.exception()) if done.exception() else on_done(done.result(), None)
+            )
+
+    def warm_up(self):
+        """
+        Kalibriert die Kosten im Hintergrund, damit die erste Registrierung nicht darauf warten muss.
+        """
+        self._executor.submit(calibrate_cost)
+
+    def shutdown(self):
+        """
+        Beendet den Worker-Thread, nachdem laufende Berechnungen abgeschlossen sind.
+        """
+        self._executor.shutdown(wait=True)
@@ -1,27 +1,138 @@
 """
 Author: Taha Al-Bukhaiti
 """
-import json
+import bisect
+import logging
 import os
+from contextlib import suppress
+
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QMainWindow, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox, QDialog, \
-    QGridLayout, QTableWidget, QTableWidgetItem, QWidget
+    QGridLayout, QHeaderView, QTableView, QWidget
+
+from modelle import PasswordListModel
+import messung
+from dateisperre import LOCK_SUFFIX
+from passwortspeicher import LOG_SUFFIX, PasswordStore, remove_securely
+from tresor import Vault
+
+MIGRATED_SUFFIX = ".migrated"
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """
+    Ein sortierter Index über Benutzernamen für die Suche nach Präfixen.
+
+    Die Namen werden nach ihrer casefold-Form sortiert gehalten. Alle Namen mit einem gemeinsamen Präfix
+    liegen daher in einem zusammenhängenden Bereich, der mit zwei binären Suchen gefunden wird.
+
+    Methoden:
+        add(name): Fügt einen Namen an der sortierten Position ein.
+        remove(name): Entfernt einen Namen.
+        position(name): Gibt die sortierte Position eines Namens zurück.
+        range(prefix): Gibt den Bereich (start, end) aller Namen mit dem Präfix zurück.
+    """
+
+    def __init__(self, names=()):
+        self._keys = sorted((name.casefold(), name) for name in names)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, position):
+        return self._keys[position][1]
+
+    def __contains__(self, name):
+        position = self.position(name)
+        return position < len(self._keys) and self._keys[position][1] == name
+
+    def position(self, name):
+        """
+        Gibt die sortierte Position eines Namens zurück, auch wenn er noch nicht enthalten ist.
+
+        Args:
+            name (str): Der Name.
+
+        Returns:
+            int: Die Position im Index.
+        """
+        return bisect.bisect_left(self._keys, (name.casefold(), name))
+
+    def add(self, name):
+        """
+        Fügt einen Namen an der sortierten Position ein, falls er noch nicht enthalten ist.
+
+        Args:
+            name (str): Der Name.
+        """
+        if name not in self:
+            self._keys.insert(self.position(name), (name.casefold(), name))
+
+    def remove(self, name):
+        """
+        Entfernt einen Namen, falls er enthalten ist.
+
+        Args:
+            name (str): Der Name.
+        """
+        if name in self:
+            del self._keys[self.position(name)]
+
+    def range(self, prefix):
+        """
+        Gibt den Bereich aller Namen zurück, deren casefold-Form mit dem Präfix beginnt.
+
+        Args:
+            prefix (str): Das Präfix in casefold-Form.
+
+        Returns:
+            tuple: (start, end) als halboffener Bereich der Positionen.
+        """
+        start = bisect.bisect_left(self._keys, (prefix,))
+        end = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",))
+        return start, end
 
 
 class PasswordManager:
     """
     Eine Klasse zum Verwalten von Passwörtern.
 
+    Die Passwörter werden über einen PasswordStore gespeichert: Jede Änderung wird an ein Write-Ahead-Log
+    angehängt, und der Snapshot in `filename` wird nur im Hintergrund neu geschrieben.
+
+    Jedes Passwort wird einzeln über den Vault versiegelt. `passwords` enthält nur die versiegelten Werte;
+    entschlüsselt wird erst beim Abruf eines Eintrags.
+
+    Attribute:
+        usernames (PrefixIndex): Der sortierte Index aller Benutzernamen für die Suche.
+
     Parameter:
         filename (str): Der Dateiname der Datei, in der die Passwörter gespeichert werden.
+        legacy_filename (str): Eine alte unverschlüsselte Passwortdatei. Sie enthält keine Zuordnung zu einem
+            Benutzer und wird daher nur übernommen, wenn der Benutzer das bestätigt (`import_legacy_passwords`);
+            bis dahin bleibt sie unverändert für alle Benutzer liegen.
 
     Methoden:
+        unlock(master_password):
+            Leitet den Hauptschlüssel des Tresors ab.
+
         save_password(username, password):
             Speichert ein Passwort für einen Benutzernamen.
 
         load_passwords_from_file():
             Lädt die gespeicherten Passwörter aus der Datei.
 
+        legacy_password_count():
+            Gibt die Anzahl der Einträge in der alten unverschlüsselten Passwortdatei zurück.
+
+        import_legacy_passwords():
+            Übernimmt die alte unverschlüsselte Passwortdatei in den Tresor und löscht sie.
+
+        refresh():
+            Übernimmt die Änderungen anderer Prozesse.
+
         get_password(username):
             Ruft das Passwort für einen Benutzernamen ab.
 
@@ -29,33 +140,127 @@ class PasswordManager:
             Ruft alle gespeicherten Passwörter ab.
 
         save_passwords_to_file():
-            Speichert die Passwörter in der Datei.
+            Schreibt sofort einen vollständigen Snapshot der Passwörter in die Datei.
+
+        close():
+            Wartet auf eine laufende Verdichtung des Logs und gibt die Sperrdatei frei.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, legacy_filename=None):
         self.filename = filename
-        self.passwords = {}
+        self.legacy_filename = legacy_filename
+        self.store = PasswordStore(filename)
+        self.vault = Vault(filename)
+        self.passwords = self.store.data
+        self.usernames = PrefixIndex()
+
+    def unlock(self, master_password):
+        """
+        Leitet den Hauptschlüssel des Tresors ab. Muss vor allen anderen Methoden aufgerufen werden.
+
+        Args:
+            master_password (str): Das Anmeldepasswort.
+
+        Raises:
+            ValueError: Wenn das Passwort nicht zum Tresor passt.
+        """
+        self.vault.unlock(master_password)
 
     def save_password(self, username, password):
         """
-        Speichert ein Passwort für einen Benutzernamen.
+        Speichert ein Passwort für einen Benutzernamen. Änderungen anderer Prozesse werden dabei übernommen.
 
         Args:
             username (str): Der Benutzername.
             password (str): Das Passwort.
+
+        Returns:
+            list: Die Benutzernamen, die andere Prozesse inzwischen geändert hatten.
         """
-        self.passwords[username] = password
-        self.save_passwords_to_file()
+        merged = self.store.set(username, self.vault.seal(username, password))
+        self._update_index(merged)
+        self.usernames.add(username)
+        return merged
 
+    @messung.timed("passwortmanager.load_passwords_from_file")
     def load_passwords_from_file(self):
         """
-        Lädt die gespeicherten Passwörter aus der Datei.
+        Lädt die gespeicherten Passwörter aus der Datei und wendet die Änderungen aus dem Log an.
+        Eine alte unverschlüsselte Passwortdatei wird dabei nicht angefasst.
+        """
+        self.passwords = self.store.load()
+        self.usernames = PrefixIndex(self.passwords)
+
+    def legacy_password_count(self):
+        """
+        Gibt die Anzahl der Einträge in der alten unverschlüsselten Passwortdatei zurück.
+
+        Returns:
+            int: Die Anzahl der Einträge oder 0, falls es keine alte Datei gibt.
+        """
+        if not self.legacy_filename or not os.path.exists(self.legacy_filename):
+            return 0
+        return len(self._load_legacy_passwords())
+
+    def _load_legacy_passwords(self):
+        """
+        Liest die alte unverschlüsselte Passwortdatei mit ihrem Log.
         """
-        if os.path.exists(self.filename):
-            with open(self.filename, "r") as file:
-                file_content = file.read()
-                if file_content:
-                    self.passwords = json.loads(file_content)
+        legacy_store = PasswordStore(self.legacy_filename)
+        try:
+            return dict(legacy_store.load())
+        finally:
+            legacy_store.close()
+
+    def import_legacy_passwords(self):
+        """
+        Übernimmt die alte unverschlüsselte Passwortdatei versiegelt in den Tresor. Darf nur nach Bestätigung
+        durch den Benutzer aufgerufen werden, da die Datei danach anderen Benutzern nicht mehr zur Verfügung steht.
+
+        Erst wenn die versiegelten Einträge mit fsync im Log stehen (der Tresorkopf wurde schon beim Entsperren
+        gesichert), werden die Klartextdateien überschrieben und gelöscht. Reste früherer Versionen, die die
+        Datei nur in `.migrated` umbenannt haben, werden ebenso gelöscht. Bereits vorhandene Einträge des
+        Tresors werden nicht überschrieben.
+
+        Returns:
+            int: Die Anzahl übernommener Einträge.
+        """
+        if not self.legacy_filename or not os.path.exists(self.legacy_filename):
+            return 0
+        legacy_passwords = self._load_legacy_passwords()
+        imported = [(username, self.vault.seal(username, password))
+                    for username, password in legacy_passwords.items() if username not in self.passwords]
+        merged = self.store.set_many(imported)
+        self._update_index(list(merged) + [username for username, _sealed in imported])
+        logger.warning("%d Passwörter aus %s in den Tresor %s übernommen; die Datei wird gelöscht",
+                       len(imported), self.legacy_filename, self.filename)
+        for path in (self.legacy_filename, self.legacy_filename + LOG_SUFFIX):
+            remove_securely(path)
+            remove_securely(path + MIGRATED_SUFFIX)
+        with suppress(FileNotFoundError):
+            os.remove(self.legacy_filename + LOCK_SUFFIX)
+        return len(imported)
+
+    def refresh(self):
+        """
+        Übernimmt die Änderungen anderer Prozesse. Kostet nur ein pread, solange sich nichts geändert hat.
+
+        Returns:
+            list: Die Benutzernamen, die sich geändert haben.
+        """
+        changed = self.store.refresh()
+        self._update_index(changed)
+        return changed
+
+    def _update_index(self, changed):
+        """
+        Gleicht den Präfix-Index für geänderte oder gelöschte Benutzernamen ab.
+        """
+        for username in changed:
+            if username in self.passwords:
+                self.usernames.add(username)
+            else:
+                self.usernames.remove(username)
 
     def get_password(self, username):
         """
@@ -65,25 +270,34 @@ class PasswordManager:
             username (str): Der Benutzername.
 
         Returns:
-            str: Das Passwort für den angegebenen Benutzernamen.
+            str: Das Passwort für den angegebenen Benutzernamen oder None.
+
+        Raises:
+            ValueError: Wenn der Eintrag beschädigt ist oder nicht zu diesem Tresor gehört.
         """
-        return self.passwords.get(username)
+        sealed = self.passwords.get(username)
+        return None if sealed is None else self.vault.open(username, sealed)
 
     def get_all_passwords(self):
         """
-        Ruft alle gespeicherten Passwörter ab.
+        Ruft alle gespeicherten Passwörter ab. Entschlüsselt dafür jeden Eintrag.
 
         Returns:
             dict: Ein Dictionary mit allen gespeicherten Benutzernamen und Passwörtern.
         """
-        return self.passwords
+        return {username: self.vault.open(username, sealed) for username, sealed in self.passwords.items()}
 
     def save_passwords_to_file(self):
         """
-        Speichert die Passwörter in der Datei.
+        Schreibt sofort einen vollständigen Snapshot der Passwörter in die Datei.
+        """
+        self.store.compact()
+
+    def close(self):
+        """
+        Wartet auf eine laufende Verdichtung des Logs und gibt die Sperrdatei frei.
         """
-        with open(self.filename, "w") as file:
-            json.dump(self.passwords, file)
+        self.store.close()
 
 
 class PasswordManagerApp(QMainWindow):
@@ -101,7 +315,7 @@ class PasswordManagerApp(QMainWindow):
             Ruft das Passwort für den angegebenen Benutzernamen ab.
 
         show_all_passwords():
-            Zeigt alle gespeicherten Benutzernamen und Passwörter in einer Tabelle an.
+            Zeigt alle gespeicherten Benutzernamen und Passwörter in einer filterbaren Tabelle an.
 
         closeEvent(event):
             Behandelt das Ereignis des Schließens des Fensters.
@@ -121,6 +335,8 @@ class PasswordManagerApp(QMainWindow):
         self.setGeometry(100, 100, 300, 200)
 
         self.password_manager = password_manager
+        self.password_model = PasswordListModel(password_manager, self)
+        self.all_passwords_dialog = None
 
         self.username_label = QLabel("Benutzername:", self)
         self.username_input = QLineEdit(self)
@@ -162,10 +378,11 @@ class PasswordManagerApp(QMainWindow):
         if not username or not password:
             QMessageBox.warning(self, "Passwort speichern", "Bitte geben Sie Benutzernamen und Passwort ein.")
             return
-        if self.password_manager.get_password(username):
+        self.password_model.refresh()
+        if username in self.password_manager.usernames:
             QMessageBox.warning(self, "Passwort speichern", "Ein Passwort für diesen Benutzernamen existiert bereits.")
             return
-        self.password_manager.save_password(username, password)
+        self.password_model.save_password(username, password)
         self.username_input.clear()
         self.password_input.clear()
 
@@ -179,7 +396,12 @@ class PasswordManagerApp(QMainWindow):
         if not username:
             QMessageBox.warning(self, "Passwort abrufen", "Bitte geben Sie den Benutzernamen ein.")
             return
-        stored_password = self.password_manager.get_password(username)
+        self.password_model.refresh()
+        try:
+            stored_password = self.password_manager.get_password(username)
+        except ValueError as error:
+            QMessageBox.warning(self, "Passwort abrufen", str(error))
+            return
         if stored_password:
             QMessageBox.information(
                 self, "Passwort abrufen", f"Des Passwort des Benutzername {username} lautet:\n\n{stored_password}"
@@ -191,33 +413,32 @@ class PasswordManagerApp(QMainWindow):
 
     def show_all_passwords(self):
         """
-        Zeigt alle gespeicherten Benutzernamen und Passwörter in einer Tabelle an.
-        """
-        all_passwords = self.password_manager.get_all_passwords()
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Alle Passwörter anzeigen")
-        layout = QGridLayout()
-        dialog.setLayout(layout)
-
-        table_widget = QTableWidget(dialog)
-        table_widget.setColumnCount(2)
-        table_widget.setHorizontalHeaderLabels(["Benutzername", "Passwort"])
-        table_widget.setRowCount(len(all_passwords))
-
-        row = 0
-        for username, password in all_passwords.items():
-            username_item = QTableWidgetItem(username)
-            password_item = QTableWidgetItem(password)
-            table_widget.setItem(row, 0, username_item)
-            table_widget.setItem(row, 1, password_item)
-            row += 1
-
-        table_widget.resizeColumnsToContents()
-        table_widget.horizontalHeader().setStretchLastSection(True)
-        table_widget.verticalHeader().setVisible(False)
-
-        layout.addWidget(table_widget)
-        dialog.exec_()
+        Zeigt alle gespeicherten Benutzernamen und Passwörter in einer filterbaren Tabelle an.
+
+        Der Dialog und sein Modell werden nur einmal erstellt; jedes weitere Öffnen zeigt ihn nur erneut an.
+        """
+        self.password_model.refresh()
+        if self.all_passwords_dialog is None:
+            dialog = QDialog(self)
+            dialog.setWindowTitle("Alle Passwörter anzeigen")
+            layout = QGridLayout()
+            dialog.setLayout(layout)
+
+            filter_input = QLineEdit(dialog)
+            filter_input.setPlaceholderText("Benutzername suchen...")
+            filter_input.textChanged.connect(self.password_model.set_filter)
+
+            table_view = QTableView(dialog)
+            table_view.setModel(self.password_model)
+            # Feste Zeilenhöhen und Spaltenbreiten, damit Qt nicht jede Zelle ausmessen muss.
+            table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+            table_view.verticalHeader().setVisible(False)
+            table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+            layout.addWidget(filter_input)
+            layout.addWidget(table_view)
+            self.all_passwords_dialog = dialog
+        self.all_passwords_dialog.exec_()
 
     def closeEvent(self, event):
         """
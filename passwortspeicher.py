@@ -0,0 +1,373 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Passwortspeicher Modul:
+
+Dieses Modul enthält die Speicher-Engine des Passwortmanagers. Der Zustand besteht aus einem Snapshot
+(die bisherige passwords.json, ein JSON-Objekt) und einem Write-Ahead-Log daneben (`<snapshot>.log`).
+Jede Änderung wird als eine JSON-Zeile an das Log angehängt und mit fsync gesichert, statt die ganze
+Datei neu zu schreiben. Beim Laden wird das Log auf den Snapshot angewendet; eine unvollständige letzte
+Zeile eines abgebrochenen Schreibvorgangs wird ignoriert.
+
+Überschreitet das Log `COMPACT_LOG_BYTES`, wird im Hintergrund ein neuer Snapshot geschrieben (temporäre
+Datei, fsync, os.replace) und das Log danach auf die währenddessen angehängten Zeilen gekürzt. Da das
+erneute Anwenden bereits im Snapshot enthaltener Zeilen dasselbe Ergebnis liefert, ist jeder Absturz
+während der Verdichtung unkritisch.
+
+Mehrere Prozesse können denselben Speicher gleichzeitig verwenden. Jede Änderung wird unter der Sperre aus
+`dateisperre` angehängt, nachdem die Änderungen anderer Prozesse nachgeholt wurden; danach wird der
+Änderungszähler erhöht. `refresh()` prüft nur diesen Zähler und liest bei einer Änderung lediglich die neuen
+Zeilen des Logs. Wurde das Log von einem anderen Prozess verdichtet, wird unter der Sperre neu geladen.
+
+Klassen:
+- PasswordStore: Snapshot und Write-Ahead-Log eines Passwortmanagers.
+
+Funktionen:
+- remove_securely(path): Überschreibt eine Datei mit Nullbytes und löscht sie.
+"""
+import json
+import logging
+import os
+import threading
+
+from dateisperre import VersionedLock
+
+LOG_SUFFIX = ".log"
+COMPACT_LOG_BYTES = 1024 ** 2
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync_directory(path):
+    """
+    Sichert den Verzeichniseintrag einer Datei nach dem Anlegen oder Umbenennen.
+    """
+    directory_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+def _replace_atomically(path, data):
+    """
+    Schreibt Bytes in eine temporäre Datei, sichert sie mit fsync und ersetzt die Zieldatei atomar.
+    """
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    _fsync_directory(path)
+
+
+def remove_securely(path):
+    """
+    Überschreibt eine Datei mit Nullbytes, sichert das mit fsync und löscht sie, z. B. eine übernommene
+    unverschlüsselte Passwortdatei. Fehlt die Datei, passiert nichts.
+
+    Auf Dateisystemen mit Copy-on-Write oder Snapshots können alte Blöcke trotzdem erhalten bleiben; das
+    Überschreiben verhindert nur, dass der Klartext im gelöschten Bereich derselben Blöcke stehen bleibt.
+
+    Args:
+        path (str): Der Pfad der Datei.
+    """
+    try:
+        file_descriptor = os.open(path, os.O_WRONLY)
+    except FileNotFoundError:
+        return
+    try:
+        remaining = os.fstat(file_descriptor).st_size
+        zeros = bytes(min(remaining, 64 * 1024))
+        while remaining > 0:
+            remaining -= os.write(file_descriptor, zeros[:remaining])
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+    os.remove(path)
+    _fsync_directory(path)
+
+
+class PasswordStore:
+    """
+    Snapshot und Write-Ahead-Log eines Passwortmanagers.
+
+    Parameter:
+        path (str): Der Pfad des Snapshots, z. B. "passwords.json".
+        compact_log_bytes (int): Die Loggröße in Bytes, ab der im Hintergrund verdichtet wird.
+
+    Attribute:
+        data (dict): Der aktuelle Zustand. Darf nur über `set` und `delete` verändert werden.
+
+    Methoden:
+        load(): Liest Snapshot und Log und gibt den Zustand zurück.
+        has_changes(): Prüft über den Änderungszähler, ob andere Prozesse etwas geändert haben.
+        refresh(): Übernimmt die Änderungen anderer Prozesse.
+        set(key, value): Speichert einen Wert und hängt die Änderung an das Log an.
+        set_many(items): Speichert mehrere Werte mit einem einzigen fsync.
+        delete(key): Löscht einen Wert und hängt die Änderung an das Log an.
+        compact(): Schreibt sofort einen neuen Snapshot und kürzt das Log.
+        close(): Wartet auf eine laufende Verdichtung und gibt die Sperrdatei frei.
+    """
+
+    def __init__(self, path, compact_log_bytes=COMPACT_LOG_BYTES):
+        self.path = path
+        self.log_path = path + LOG_SUFFIX
+        self.compact_log_bytes = compact_log_bytes
+        self.data = {}
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._file_lock = VersionedLock(path)
+        self._log_size = 0
+        self._log_inode = None
+        self._seen_version = None
+        self._compaction = None
+
+    def load(self):
+        """
+        Liest den Snapshot und wendet das Log darauf an.
+
+        Returns:
+            dict: Der aktuelle Zustand (dasselbe Objekt wie `data`).
+        """
+        with self._lock, self._file_lock.locked():
+            self._seen_version = self._file_lock.version()
+            self._reload()
+        self._compact_if_needed()
+        return self.data
+
+    def has_changes(self):
+        """
+        Prüft über den Änderungszähler, ob andere Prozesse seit dem letzten Lesen etwas geändert haben.
+
+        Returns:
+            bool: True, falls `refresh()` Änderungen übernehmen würde.
+        """
+        return self._file_lock.version() != self._seen_version
+
+    def refresh(self):
+        """
+        Übernimmt die Änderungen anderer Prozesse. Solange sich der Änderungszähler nicht geändert hat,
+        kostet der Aufruf nur ein pread.
+
+        Returns:
+            list: Die Schlüssel, die sich geändert haben oder gelöscht wurden.
+        """
+        version = self._file_lock.version()
+        if version == self._seen_version:
+            return []
+        with self._lock:
+            changed = self._read_log_tail()
+            if changed is None:
+                with self._file_lock.locked():
+                    version = self._file_lock.version()
+                    changed = self._reload()
+            self._seen_version = version
+            return changed
+
+    def _reload(self):
+        """
+        Liest Snapshot und Log vollständig neu. Muss unter der Sperre aufgerufen werden, da ein anderer
+        Prozess sonst zwischen dem Lesen von Snapshot und Log verdichten könnte.
+
+        Returns:
+            list: Die Schlüssel, die sich gegenüber dem bisherigen Zustand geändert haben.
+        """
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as file:
+                file_content = file.read()
+                if file_content:
+                    data = json.loads(file_content)
+        self._log_size, self._log_inode = 0, None
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as file:
+                self._log_inode = os.fstat(file.fileno()).st_ino
+                log = file.read()
+            self._log_size = self._replay(log, data)
+
+        changed = [key for key in self.data.keys() | data.keys() if self.data.get(key) != data.get(key)]
+        self.data.clear()
+        self.data.update(data)
+        return changed
+
+    def _read_log_tail(self):
+        """
+        Wendet die seit dem letzten Lesen angehängten Zeilen des Logs an.
+
+        Returns:
+            list: Die geänderten Schlüssel oder None, falls das Log ersetzt wurde und neu geladen werden muss.
+        """
+        try:
+            file = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return [] if self._log_inode is None else None
+        with file:
+            status = os.fstat(file.fileno())
+            if self._log_inode is None and self._log_size == 0:
+                self._log_inode = status.st_ino
+            if status.st_ino != self._log_inode or status.st_size < self._log_size:
+                return None
+            file.seek(self._log_size)
+            tail = file.read(status.st_size - self._log_size)
+        changed = []
+        self._log_size += self._replay(tail, self.data, changed)
+        return changed
+
+    def _replay(self, log, data, changed=None):
+        """
+        Wendet alle vollständigen Zeilen eines Log-Ausschnitts auf `data` an.
+
+        Returns:
+            int: Die Länge der vollständigen Zeilen in Bytes.
+        """
+        complete = log[:log.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning("Beschädigte Zeile in %s übersprungen", self.log_path)
+                continue
+            if record["op"] == "set":
+                data[record["key"]] = record["value"]
+            elif record["op"] == "delete":
+                data.pop(record["key"], None)
+            if changed is not None:
+                changed.append(record["key"])
+        return len(complete)
+
+    def set(self, key, value):
+        """
+        Speichert einen Wert und hängt die Änderung an das Log an.
+
+        Args:
+            key (str): Der Schlüssel, z. B. der Benutzername.
+            value: Der JSON-serialisierbare Wert.
+
+        Returns:
+            list: Die Schlüssel, die andere Prozesse inzwischen geändert hatten und dabei übernommen wurden.
+        """
+        return self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """
+        Speichert mehrere Werte und hängt die Änderungen mit einem einzigen fsync an das Log an.
+
+        Args:
+            items (iterable): Paare (key, value).
+
+        Returns:
+            list: Die Schlüssel, die andere Prozesse inzwischen geändert hatten und dabei übernommen wurden.
+        """
+        items = list(items)
+        if not items:
+            return []
+        with self._lock:
+            merged = self._append(*({"op": "set", "key": key, "value": value} for key, value in items))
+            self.data.update(items)
+        self._compact_if_needed()
+        return merged
+
+    def delete(self, key):
+        """
+        Löscht einen Wert und hängt die Änderung an das Log an.
+
+        Args:
+            key (str): Der Schlüssel.
+
+        Returns:
+            list: Die Schlüssel, die andere Prozesse inzwischen geändert hatten und dabei übernommen wurden.
+        """
+        with self._lock:
+            merged = self._append({"op": "delete", "key": key})
+            self.data.pop(key, None)
+        self._compact_if_needed()
+        return merged
+
+    def _append(self, *records):
+        """
+        Holt unter der Sperre die Änderungen anderer Prozesse nach, hängt die Änderungen als je eine Zeile an
+        das Log an, sichert sie mit fsync und erhöht den Änderungszähler.
+
+        Returns:
+            list: Die dabei nachgeholten Schlüssel anderer Prozesse.
+        """
+        line = "".join(json.dumps(record) + "\n" for record in records).encode()
+        with self._file_lock.locked():
+            merged = self._read_log_tail()
+            if merged is None:
+                merged = self._reload()
+            file_descriptor = os.open(self.log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                status = os.fstat(file_descriptor)
+                # Eine unvollständige letzte Zeile eines abgebrochenen Schreibvorgangs wird verworfen.
+                if status.st_size > self._log_size:
+                    os.truncate(file_descriptor, self._log_size)
+                os.write(file_descriptor, line)
+                os.fsync(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+            if self._log_inode is None:
+                _fsync_directory(self.log_path)
+            self._log_inode = status.st_ino
+            self._log_size += len(line)
+            self._seen_version = self._file_lock.bump()
+        return merged
+
+    def _compact_if_needed(self):
+        """
+        Startet eine Verdichtung im Hintergrund, sobald das Log die Schwelle überschreitet.
+        """
+        if self._log_size < self.compact_log_bytes:
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, name="password-store-compaction")
+        self._compaction.start()
+
+    def compact(self):
+        """
+        Schreibt einen neuen Snapshot und entfernt die darin enthaltenen Zeilen aus dem Log.
+
+        Der Snapshot wird ohne Sperre geschrieben. Erst das Ersetzen von Snapshot und Log geschieht unter der
+        Sperre; hat ein anderer Prozess inzwischen selbst verdichtet, wird der eigene Snapshot verworfen.
+        """
+        with self._compact_lock:
+            with self._lock, self._file_lock.locked():
+                if self._read_log_tail() is None:
+                    self._reload()
+                snapshot = dict(self.data)
+                covered_size, covered_inode = self._log_size, self._log_inode
+            if covered_size == 0:
+                return
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as file:
+                file.write(json.dumps(snapshot).encode())
+                file.flush()
+                os.fsync(file.fileno())
+
+            with self._lock, self._file_lock.locked():
+                if self._read_log_tail() is None or self._log_inode != covered_inode:
+                    os.unlink(temporary_path)
+                    self._reload()
+                    return
+                os.replace(temporary_path, self.path)
+                _fsync_directory(self.path)
+                with open(self.log_path, "rb") as file:
+                    file.seek(covered_size)
+                    remaining = file.read(self._log_size - covered_size)
+                _replace_atomically(self.log_path, remaining)
+                self._log_size = len(remaining)
+                self._log_inode = os.stat(self.log_path).st_ino
+                self._seen_version = self._file_lock.bump()
+
+    def close(self):
+        """
+        Wartet auf eine laufende Verdichtung im Hintergrund und gibt die Sperrdatei frei.
+        """
+        if self._compaction is not None:
+            self._compaction.join()
+        self._file_lock.close()
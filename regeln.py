@@ -0,0 +1,246 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Regeln Modul:
+
+Dieses Modul enthält die Regel-Engine der Automatisierung. Die Regeln legen fest, welche Dateien aus welchen
+Quellordnern in welchen Zielordner verschoben werden, und werden aus einer JSON-Datei geladen.
+
+Pro Quellordner werden alle Regeln zu einer einzigen Endungs-Tabelle und einem einzigen kombinierten regulären
+Ausdruck kompiliert. Ein Dateiname wird dadurch genau einmal kleingeschrieben und mit einem Dictionary-Zugriff
+und einem Regex-Aufruf geprüft, unabhängig von der Anzahl der Regeln.
+
+Mit "date_folders" werden Fotos nach ihrem Aufnahmedatum in Unterordner `JJJJ/MM` des Zielordners einsortiert;
+Dateien ohne lesbares Aufnahmedatum landen direkt im Zielordner.
+
+Beispiel für regeln.json:
+    {
+        "rules": [
+            {"name": "Fotos", "sources": ["~/Downloads"], "extensions": [".jpg", ".png"],
+             "target": "~/Documents/Bilder", "date_folders": true},
+            {"name": "Rechnungen", "sources": ["~/Downloads"], "globs": ["rechnung*.pdf"],
+             "regexes": ["^invoice-\\\\d+"], "target": "~/Documents/Rechnungen"}
+        ]
+    }
+
+Klassen:
+- Rule: Eine einzelne Verschiebe-Regel.
+- RuleSet: Die kompilierten Regeln aller Quellordner.
+
+Funktionen:
+- load_rules(path): Lädt die Regeln aus einer JSON-Datei.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import re
+
+DEFAULT_RULES_FILE = "regeln.json"
+
+DEFAULT_RULES = [
+    {
+        "name": "Fotos",
+        "sources": ["~/Downloads"],
+        "extensions": [".jpg", ".heic", ".jpeg", ".png"],
+        "target": "~/Documents/Bilder",
+        "date_folders": True,
+    },
+]
+
+
+class Rule:
+    """
+    Eine einzelne Verschiebe-Regel.
+
+    Eine Datei passt zur Regel, wenn ihre Endung in `extensions` enthalten ist, ihr Name einem der
+    `globs` entspricht oder einer der `regexes` im Namen gefunden wird. Groß- und Kleinschreibung
+    spielt keine Rolle.
+
+    Attribute:
+        name (str): Der Name der Regel.
+        sources (list): Die Quellordner, für die die Regel gilt.
+        extensions (list): Die Dateiendungen inklusive Punkt, z. B. ".jpg".
+        globs (list): Die Glob-Muster für den Dateinamen, z. B. "IMG_*.jpg".
+        regexes (list): Reguläre Ausdrücke, die im Dateinamen gesucht werden.
+        target (str): Der Zielordner.
+        date_folders (bool): Ob Dateien nach Aufnahmedatum in Unterordner JJJJ/MM einsortiert werden.
+    """
+
+    def __init__(self, name, sources, target, extensions=(), globs=(), regexes=(), date_folders=False):
+        self.name = name
+        self.sources = [_normalize_dir(source) for source in sources]
+        self.target = _normalize_dir(target)
+        self.extensions = [extension.lower() if extension.startswith(".") else "." + extension.lower()
+                           for extension in extensions]
+        self.globs = list(globs)
+        self.regexes = list(regexes)
+        self.date_folders = bool(date_folders)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Erstellt eine Regel aus einem Eintrag der Konfigurationsdatei.
+
+        Args:
+            data (dict): Der Eintrag mit den Schlüsseln name, sources, target, extensions, globs, regexes
+                und date_folders.
+
+        Returns:
+            Rule: Die erstellte Regel.
+        """
+        return cls(
+            data.get("name", data["target"]),
+            data.get("sources", ["~/Downloads"]),
+            data["target"],
+            data.get("extensions", ()),
+            data.get("globs", ()),
+            data.get("regexes", ()),
+            data.get("date_folders", False),
+        )
+
+
+class _CompiledSource:
+    """
+    Die zu einer Endungs-Tabelle und einem kombinierten Regex kompilierten Regeln eines Quellordners.
+    """
+
+    def __init__(self, indexed_rules):
+        self.suffixes = {}
+        patterns = []
+        for index, rule in indexed_rules:
+            for extension in rule.extensions:
+                if extension.count(".") == 1:
+                    self.suffixes.setdefault(extension, index)
+                else:
+                    # Mehrteilige Endungen wie ".tar.gz" passen nicht in die Tabelle und landen im Regex.
+                    patterns.append((index, ".*" + re.escape(extension)))
+            for glob in rule.globs:
+                patterns.append((index, fnmatch.translate(glob.lower())))
+            for regex in rule.regexes:
+                patterns.append((index, f".*?(?:{regex}).*"))
+
+        # Die Alternativen werden in Regelreihenfolge geprüft; die erste passende ist die mit dem kleinsten Index.
+        patterns.sort(key=lambda pattern: pattern[0])
+        self.regex = None
+        if patterns:
+            self.regex = re.compile(
+                "|".join(f"(?P<r{name}>{pattern})" for name, pattern in _unique_groups(patterns)),
+                re.DOTALL | re.IGNORECASE,
+            )
+
+    def match(self, lowered_name):
+        """
+        Gibt den Index der ersten passenden Regel zurück oder None.
+        """
+        _stem, dot, extension = lowered_name.rpartition(".")
+        best = self.suffixes.get("." + extension) if dot else None
+        if self.regex is not None:
+            found = self.regex.fullmatch(lowered_name)
+            if found is not None:
+                index = int(found.lastgroup[1:].split("_")[0])
+                if best is None or index < best:
+                    best = index
+        return best
+
+
+def _unique_groups(patterns):
+    """
+    Vergibt eindeutige Gruppennamen, da eine Regel mehrere Muster haben kann (z. B. r3, r3_1, r3_2).
+    """
+    seen = {}
+    for index, pattern in patterns:
+        count = seen.get(index, 0)
+        seen[index] = count + 1
+        yield (f"{index}_{count}" if count else str(index)), pattern
+
+
+class RuleSet:
+    """
+    Die kompilierten Regeln aller Quellordner.
+
+    Attribute:
+        rules (list): Die Regeln in der Reihenfolge ihrer Priorität.
+        sources (list): Alle Quellordner, die überwacht werden müssen.
+        targets (list): Alle Zielordner.
+        fingerprint (str): Ein Hash über alles, was bestimmt, welche Dateinamen passen. Er ändert sich nur,
+            wenn sich die Auswahl der Dateien ändern kann.
+
+    Methoden:
+        match(source_dir, filename): Sucht die erste Regel, die zu einer Datei passt.
+        target_for(file_path): Gibt den Zielpfad für eine Datei zurück.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        by_source = {}
+        for index, rule in enumerate(self.rules):
+            for source in rule.sources:
+                by_source.setdefault(source, []).append((index, rule))
+        self._compiled = {source: _CompiledSource(indexed) for source, indexed in by_source.items()}
+        self.sources = list(self._compiled)
+        self.targets = list(dict.fromkeys(rule.target for rule in self.rules))
+        self.fingerprint = hashlib.sha1(repr([
+            (rule.sources, rule.extensions, rule.globs, rule.regexes) for rule in self.rules
+        ]).encode()).hexdigest()
+
+    def match(self, source_dir, filename):
+        """
+        Sucht die erste Regel, die zu einer Datei passt.
+
+        Args:
+            source_dir (str): Der Quellordner der Datei.
+            filename (str): Der Dateiname.
+
+        Returns:
+            Rule: Die passende Regel oder None.
+        """
+        compiled = self._compiled.get(source_dir)
+        if compiled is None:
+            return None
+        index = compiled.match(filename.lower())
+        return None if index is None else self.rules[index]
+
+    def target_for(self, file_path):
+        """
+        Gibt den Zielpfad für eine Datei zurück.
+
+        Args:
+            file_path (str): Der Pfad der Datei in einem Quellordner.
+
+        Returns:
+            str: Der Zielpfad oder None, falls keine Regel passt.
+        """
+        source_dir, filename = os.path.split(file_path)
+        rule = self.match(source_dir, filename)
+        return None if rule is None else os.path.join(rule.target, filename)
+
+
+def load_rules(path=DEFAULT_RULES_FILE):
+    """
+    Lädt die Regeln aus einer JSON-Datei. Existiert die Datei nicht, gelten die Standardregeln
+    (Fotos aus ~/Downloads nach ~/Documents/Bilder).
+
+    Args:
+        path (str): Der Pfad der Konfigurationsdatei.
+
+    Returns:
+        RuleSet: Die kompilierten Regeln.
+
+    Raises:
+        OSError: Wenn die Datei nicht gelesen werden kann.
+        ValueError, KeyError, TypeError: Wenn die Datei kein gültiges JSON ist oder ein Eintrag ungültig ist.
+        re.error: Wenn ein regulärer Ausdruck ungültig ist.
+    """
+    entries = DEFAULT_RULES
+    if os.path.exists(path):
+        with open(path, "r") as file:
+            entries = json.load(file)["rules"]
+    return RuleSet(Rule.from_dict(entry) for entry in entries)
+
+
+def _normalize_dir(directory):
+    """
+    Erweitert ~ und Umgebungsvariablen und gibt einen absoluten Pfad ohne abschließenden Trenner zurück.
+    """
+    return os.path.abspath(os.path.expandvars(os.path.expanduser(directory)))
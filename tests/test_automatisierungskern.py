@@ -0,0 +1,63 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für das Abschließen unterbrochener Verschiebungen beim Start des Kerns.
+"""
+import json
+
+import pytest
+
+from automatisierungskern import AutomationCore
+from dateisperre import InstanceLock
+from verlauf import HistoryStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    source, target = tmp_path / "Downloads", tmp_path / "Bilder"
+    source.mkdir()
+    target.mkdir()
+    rules_file = tmp_path / "regeln.json"
+    rules_file.write_text(json.dumps({"rules": [
+        {"name": "Fotos", "sources": [str(source)], "extensions": [".jpg"], "target": str(target)},
+    ]}))
+    return {"source": source, "target": target, "rules": str(rules_file), "history": str(tmp_path / "verlauf.db"),
+            "dedup": str(tmp_path / "duplikate.db"), "snapshot": str(tmp_path / "ordnerstand.db")}
+
+
+def _interrupted_move(paths):
+    (paths["target"] / "foto.jpg").write_bytes(b"1")
+    store = HistoryStore(paths["history"])
+    store.begin_move(str(paths["source"] / "foto.jpg"), str(paths["target"] / "foto.jpg"))
+    store.close()
+
+
+def _core(paths):
+    return AutomationCore(paths["rules"], paths["history"], paths["dedup"], move_workers=1,
+                          snapshot_file=paths["snapshot"])
+
+
+def test_start_completes_interrupted_moves(paths):
+    _interrupted_move(paths)
+
+    core = _core(paths)
+    try:
+        assert core.history.unfinished_moves() == []
+        assert [(filename, target_path) for _id, filename, target_path, _moved_at in core.history.page()] == \
+            [("foto.jpg", str(paths["target"] / "foto.jpg"))]
+    finally:
+        core.stop()
+
+
+def test_start_leaves_journal_alone_while_another_core_runs(paths):
+    _interrupted_move(paths)
+    running = InstanceLock(paths["history"])
+    running.share()
+
+    core = _core(paths)
+    try:
+        assert len(core.history.unfinished_moves()) == 1
+        assert core.history.count() == 0
+    finally:
+        core.stop()
+        running.close()
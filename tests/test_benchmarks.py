@@ -0,0 +1,29 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Rauchtest für die Benchmark-Suite: ein kleiner Lauf muss durchlaufen und vergleichbare Ergebnisse schreiben.
+"""
+import json
+import os
+import subprocess
+import sys
+
+SUITE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "suite.py")
+STAGES = {"build_tree", "listing", "matching", "move_same_fs", "move_cross_fs",
+          "history_append", "history_reload", "table_population"}
+
+
+def _run(*args):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    return subprocess.run([sys.executable, SUITE, *args], env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_small_run_writes_all_stages(tmp_path):
+    output = tmp_path / "ergebnis.json"
+    completed = _run("--sizes", "50", "--work-dir", str(tmp_path / "arbeit"), "--move-limit", "20",
+                     "--history-limit", "50", "--table-limit", "50", "--output", str(output))
+
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(output.read_text())
+    assert result["meta"]["sizes"] == [50]
+    assert set(result["results"]["50"]) == STAGES
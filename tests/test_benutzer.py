@@ -0,0 +1,86 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die Benutzerverwaltung: Übernahme der alten users.json, Erneuern alter Hashes und Verdichten.
+"""
+import hashlib
+import json
+
+import pytest
+
+import benutzer
+from benutzer import UserRepository
+from passwort_hash import MIN_COST, hash_password
+
+
+@pytest.fixture(autouse=True)
+def low_cost(monkeypatch):
+    # Feste niedrige Kosten statt der Kalibrierung, damit die Tests schnell und reproduzierbar sind.
+    monkeypatch.setattr(benutzer, "hash_password", lambda password: hash_password(password, cost=MIN_COST))
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_register_and_check(tmp_path):
+    users = UserRepository(str(tmp_path / "users.jsonl"), legacy_path=None)
+    users.register_user("anna", "geheim", "anna@example.org")
+
+    assert users.check_password("anna", "geheim")
+    assert not users.check_password("anna", "falsch")
+    assert not users.check_password("bernd", "geheim")
+    with pytest.raises(ValueError):
+        users.register_user("anna", "anderes", "")
+    assert UserRepository(str(tmp_path / "users.jsonl"), legacy_path=None).check_password("anna", "geheim")
+
+
+def test_legacy_hash_is_upgraded_and_removed_from_disk(tmp_path):
+    legacy_hash = hashlib.sha256(b"geheim").hexdigest()
+    legacy_path = tmp_path / "users.json"
+    legacy_path.write_text(json.dumps([{"username": "anna", "password": legacy_hash, "email": ""},
+                                       {"username": "bernd", "password": legacy_hash, "email": ""}]))
+    users_path = tmp_path / "users.jsonl"
+    users = UserRepository(str(users_path), str(legacy_path))
+
+    assert not legacy_path.exists()
+    assert not (tmp_path / "users.json.migrated").exists()
+    assert not users.check_password("anna", "falsch")
+    assert users.get("anna")["password"] == legacy_hash
+
+    assert users.check_password("anna", "geheim")
+    rows = _lines(users_path)
+    assert [row["username"] for row in rows] == ["anna", "bernd"]
+    assert rows[0]["password"].startswith("scrypt$")
+    # Nur der noch nicht angemeldete Benutzer hat den alten Hash.
+    assert rows[1]["password"] == legacy_hash
+    assert users.check_password("anna", "geheim")
+
+
+def test_compact_drops_superseded_rows(tmp_path):
+    users_path = tmp_path / "users.jsonl"
+    users = UserRepository(str(users_path), legacy_path=None)
+    users.register_user("anna", "geheim", "")
+    for number in range(3):
+        users._append({"username": "anna", "password": hash_password(f"neu{number}", cost=MIN_COST), "email": ""})
+    users.register_user("bernd", "geheim", "")
+    assert len(_lines(users_path)) == 5
+
+    users.compact()
+
+    assert [row["username"] for row in _lines(users_path)] == ["anna", "bernd"]
+    assert users.check_password("anna", "neu2")
+    reopened = UserRepository(str(users_path), legacy_path=None)
+    assert reopened.check_password("bernd", "geheim")
+
+
+def test_other_instance_sees_appended_user(tmp_path):
+    users_path = str(tmp_path / "users.jsonl")
+    first = UserRepository(users_path, legacy_path=None)
+    second = UserRepository(users_path, legacy_path=None)
+    assert not second.user_exists("anna")
+
+    first.register_user("anna", "geheim", "")
+    assert second.user_exists("anna")
+    with pytest.raises(ValueError):
+        second.register_user("anna", "anderes", "")
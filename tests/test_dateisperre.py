@@ -0,0 +1,111 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die Abstimmung mehrerer Prozesse über Sperrdateien und Änderungszähler.
+"""
+import multiprocessing
+import os
+
+import pytest
+
+from benutzer import UserRepository
+from dateisperre import InstanceLock, VersionedLock
+from passwortspeicher import PasswordStore
+
+fcntl = pytest.importorskip("fcntl")
+
+
+def _can_lock(path, operation=None):
+    """
+    Versucht über einen eigenen Dateideskriptor (wie ein anderer Prozess) ohne Warten zu sperren.
+    """
+    operation = fcntl.LOCK_EX if operation is None else operation
+    fd = os.open(path, os.O_RDWR)
+    try:
+        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def test_versioned_lock_counter_is_shared(tmp_path):
+    first, second = VersionedLock(str(tmp_path / "daten")), VersionedLock(str(tmp_path / "daten"))
+    assert first.version() == second.version() == 0
+
+    with first.locked():
+        assert first.bump() == 1
+    assert second.version() == 1
+    first.close()
+    second.close()
+
+
+def test_versioned_lock_excludes_others_and_nests(tmp_path):
+    lock = VersionedLock(str(tmp_path / "daten"))
+    with lock.locked():
+        with lock.locked():
+            assert not _can_lock(lock.path)
+        assert not _can_lock(lock.path)
+    assert _can_lock(lock.path)
+    lock.close()
+
+
+def test_instance_lock_is_exclusive_only_for_the_first(tmp_path):
+    path = str(tmp_path / "verlauf.db")
+    first = InstanceLock(path)
+    assert first.exclusive
+    assert not _can_lock(first.path, fcntl.LOCK_SH)
+
+    first.share()
+    second = InstanceLock(path)
+    assert not second.exclusive
+    first.close()
+    second.close()
+
+    third = InstanceLock(path)
+    assert third.exclusive
+    third.close()
+
+
+def _write_passwords(path, worker, count):
+    store = PasswordStore(path, compact_log_bytes=4096)
+    store.load()
+    for number in range(count):
+        store.set(f"{worker}-{number}", "x" * 50)
+    store.close()
+
+
+def _register_users(path, worker, count):
+    users = UserRepository(path, legacy_path=None)
+    for number in range(count):
+        # Ein fertiger Hash genügt; gehasht wird vor der Sperre und ist hier nicht Gegenstand des Tests.
+        users._append({"username": f"{worker}-{number}", "password": "-", "email": ""}, new_user=True)
+
+
+def _run_processes(target, path, workers=4, count=40):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=(path, worker, count)) for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+
+def test_concurrent_password_writers_lose_nothing(tmp_path):
+    path = str(tmp_path / "passwords.json")
+    # Die kleine Loggröße erzwingt Verdichtungen, während die anderen Prozesse weiter anhängen.
+    _run_processes(_write_passwords, path)
+
+    store = PasswordStore(path)
+    assert len(store.load()) == 160
+    store.close()
+
+
+def test_concurrent_registrations_lose_nothing(tmp_path):
+    path = str(tmp_path / "users.jsonl")
+    _run_processes(_register_users, path)
+
+    users = UserRepository(path, legacy_path=None)
+    assert all(users.user_exists(f"{worker}-{number}") for worker in range(4) for number in range(40))
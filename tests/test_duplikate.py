@@ -0,0 +1,97 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für den Duplikat-Index und die Behandlung von Duplikaten in der Verschiebe-Engine.
+"""
+import os
+
+import pytest
+
+import duplikate
+from duplikate import PARTIAL_HASH_BLOCK, DedupIndex
+from verschiebung import DUPLICATE_LINK, DUPLICATE_SKIP, MoveEngine
+
+
+@pytest.fixture
+def target(tmp_path):
+    directory = tmp_path / "Bilder"
+    (directory / "2024" / "05").mkdir(parents=True)
+    return directory
+
+
+@pytest.fixture
+def index(tmp_path, target):
+    dedup_index = DedupIndex(str(tmp_path / "duplikate.db"), directories=[str(target)])
+    yield dedup_index
+    dedup_index.close()
+
+
+def test_finds_identical_file_in_subfolder(tmp_path, target, index):
+    data = os.urandom(3 * PARTIAL_HASH_BLOCK)
+    (target / "2024" / "05" / "urlaub.jpg").write_bytes(data)
+    source = tmp_path / "kopie.jpg"
+    source.write_bytes(data)
+
+    duplicate, hashes = index.find_duplicate(str(source))
+
+    assert duplicate == str(target / "2024" / "05" / "urlaub.jpg")
+    assert set(hashes) == {"partial", "full"}
+
+
+def test_same_size_and_edges_but_different_middle(tmp_path, target, index):
+    data = bytearray(os.urandom(3 * PARTIAL_HASH_BLOCK))
+    (target / "a.jpg").write_bytes(bytes(data))
+    data[len(data) // 2] ^= 0xFF
+    source = tmp_path / "b.jpg"
+    source.write_bytes(bytes(data))
+
+    duplicate, hashes = index.find_duplicate(str(source))
+
+    # Der Teil-Hash stimmt überein, erst der vollständige Hash unterscheidet die Dateien.
+    assert duplicate is None
+    assert set(hashes) == {"partial", "full"}
+
+
+def test_unique_size_needs_no_hash(tmp_path, target, index, monkeypatch):
+    (target / "a.jpg").write_bytes(b"12345")
+    source = tmp_path / "b.jpg"
+    source.write_bytes(b"123456")
+    monkeypatch.setattr(duplikate, "_partial_hash", lambda *_args: pytest.fail("unnötiger Hash"))
+
+    assert index.find_duplicate(str(source)) == (None, {})
+
+
+def test_hashes_are_cached_until_file_changes(tmp_path, target, index, monkeypatch):
+    (target / "a.jpg").write_bytes(b"x" * 100)
+    source = tmp_path / "b.jpg"
+    source.write_bytes(b"x" * 100)
+    assert index.find_duplicate(str(source))[0] == str(target / "a.jpg")
+
+    hashed = []
+    full_hash = duplikate._full_hash
+    monkeypatch.setattr(duplikate, "_full_hash", lambda path: hashed.append(path) or full_hash(path))
+    assert index.find_duplicate(str(source))[0] == str(target / "a.jpg")
+    assert hashed == [str(source)]
+
+    (target / "a.jpg").write_bytes(b"y" * 100)
+    assert index.find_duplicate(str(source))[0] is None
+
+
+@pytest.mark.parametrize("policy", [DUPLICATE_SKIP, DUPLICATE_LINK])
+def test_engine_does_not_copy_duplicates(tmp_path, target, index, policy):
+    (target / "original.jpg").write_bytes(b"foto")
+    source = tmp_path / "IMG_0001.jpg"
+    source.write_bytes(b"foto")
+    finished = []
+    engine = MoveEngine(1, lambda *result: finished.append(result), dedup_index=index, duplicate_policy=policy)
+
+    engine.submit(str(source), str(target / "IMG_0001.jpg"))
+    engine.shutdown(wait=True)
+
+    assert not source.exists()
+    if policy == DUPLICATE_LINK:
+        assert finished[0][1] == str(target / "IMG_0001.jpg")
+        assert os.path.samefile(target / "IMG_0001.jpg", target / "original.jpg")
+    else:
+        assert finished[0][1] == str(target / "original.jpg")
+        assert not (target / "IMG_0001.jpg").exists()
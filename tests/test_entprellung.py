@@ -0,0 +1,133 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die Entprellung der Watcher-Ereignisse.
+"""
+import os
+import time
+
+import pytest
+
+import entprellung
+from entprellung import Debouncer
+
+
+class _Clock:
+    """
+    Eine steuerbare Uhr für `time.monotonic` und `time.time` des Moduls.
+    """
+
+    def __init__(self):
+        self.now = time.time()
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(entprellung, "time", fake)
+    return fake
+
+
+def _write(path, clock, data):
+    with open(path, "ab") as file:
+        file.write(data)
+    os.utime(path, (clock.now, clock.now))
+
+
+def _run_until(debouncer, clock, seconds):
+    settled = []
+    end = clock.now + seconds
+    while clock.now < end:
+        clock.advance(debouncer.tick_seconds)
+        settled.extend(debouncer.advance())
+    return settled
+
+
+def test_file_is_released_once_size_and_mtime_are_stable(tmp_path, clock):
+    download = tmp_path / "foto.jpg"
+    _write(download, clock, b"1")
+    debouncer = Debouncer(settle_delay=1.0)
+    debouncer.add([str(download)])
+
+    # Die Datei wird weiter geschrieben, ohne dass der Watcher erneut meldet.
+    assert _run_until(debouncer, clock, 0.5) == []
+    _write(download, clock, b"2")
+    assert _run_until(debouncer, clock, 1.0) == []
+    _write(download, clock, b"3")
+    assert _run_until(debouncer, clock, 1.0) == []
+    # Erst zwei Prüfungen mit gleicher Größe und Änderungszeit geben sie frei.
+    assert _run_until(debouncer, clock, 1.0) == [str(download)]
+    assert len(debouncer) == 0
+    assert debouncer.next_timeout() is None
+
+
+def test_new_event_postpones_the_check(tmp_path, clock):
+    download = tmp_path / "foto.jpg"
+    _write(download, clock, b"1")
+    debouncer = Debouncer(settle_delay=1.0)
+    debouncer.add([str(download)])
+    _run_until(debouncer, clock, 0.75)
+    debouncer.add([str(download)])
+
+    assert _run_until(debouncer, clock, 0.75) == []
+    assert len(debouncer) == 1
+
+
+def test_temporary_files_and_their_targets_wait(tmp_path, clock):
+    download = tmp_path / "foto.jpg"
+    partial = tmp_path / "foto.jpg.part"
+    _write(download, clock, b"")
+    _write(partial, clock, b"123")
+    debouncer = Debouncer(settle_delay=1.0)
+    debouncer.add([str(download), str(partial), str(tmp_path / "film.crdownload")])
+    assert len(debouncer) == 1
+
+    clock.advance(5)
+    assert _run_until(debouncer, clock, 3.0) == []
+    partial.unlink()
+    assert _run_until(debouncer, clock, 1.0) == [str(download)]
+
+
+def test_removed_file_is_dropped(tmp_path, clock):
+    download = tmp_path / "foto.jpg"
+    _write(download, clock, b"1")
+    debouncer = Debouncer(settle_delay=1.0)
+    debouncer.add([str(download)])
+    download.unlink()
+
+    assert _run_until(debouncer, clock, 1.0) == []
+    assert len(debouncer) == 0
+
+
+def test_existing_files_are_checked_on_next_tick(tmp_path, clock):
+    paths = []
+    for number in range(100):
+        path = tmp_path / f"{number}.jpg"
+        _write(path, clock, b"1")
+        paths.append(str(path))
+    clock.advance(10)
+    debouncer = Debouncer(settle_delay=1.0, tick_seconds=0.25)
+    debouncer.add(paths, delay=0)
+
+    assert debouncer.next_timeout() == pytest.approx(0.25)
+    assert sorted(_run_until(debouncer, clock, 0.25)) == sorted(paths)
+
+
+def test_delay_longer_than_one_wheel_turn(tmp_path, clock):
+    download = tmp_path / "foto.jpg"
+    _write(download, clock, b"1")
+    clock.advance(60)
+    debouncer = Debouncer(settle_delay=1.0, tick_seconds=0.25, slots=8)
+    debouncer.add([str(download)], delay=5.0)
+
+    assert _run_until(debouncer, clock, 4.75) == []
+    assert _run_until(debouncer, clock, 0.25) == [str(download)]
@@ -0,0 +1,51 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für den schnellen Start des Hauptfensters: verzögerte Importe und das Entsperren des Tresors.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import MainApp
+from passwortmanager import PasswordManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_heavy_modules():
+    # In einem eigenen Prozess, da die übrigen Tests diese Module bereits importiert haben.
+    code = ("import sys, MainApp; "
+            "print(','.join(sorted(m for m in MainApp.WARM_UP_MODULES + ['tresor'] if m in sys.modules)))")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                               timeout=60)
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == ""
+
+
+def test_unlock_returns_loaded_password_manager(tmp_path):
+    password_manager = PasswordManager(str(tmp_path / "passwords_a.json"))
+    password_manager.unlock("anmeldung")
+    password_manager.save_password("mail", "geheim")
+    password_manager.close()
+
+    unlocked = MainApp.MainApp._unlock_password_manager(PasswordManager(str(tmp_path / "passwords_a.json")),
+                                                        "anmeldung")
+    assert unlocked.get_password("mail") == "geheim"
+    unlocked.close()
+
+
+def test_failed_unlock_closes_password_manager(tmp_path):
+    PasswordManager(str(tmp_path / "passwords_a.json")).unlock("anmeldung")
+    password_manager = PasswordManager(str(tmp_path / "passwords_a.json"))
+    closed = []
+    close = password_manager.close
+    password_manager.close = lambda: closed.append(True) or close()
+
+    with pytest.raises(ValueError):
+        MainApp.MainApp._unlock_password_manager(password_manager, "falsch")
+    assert closed == [True]
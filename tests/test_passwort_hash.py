@@ -0,0 +1,51 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für das Hashing der Anmeldepasswörter.
+"""
+import hashlib
+
+from passwort_hash import MAX_COST, MIN_COST, calibrate_cost, hash_password, verify_password
+
+
+def _with_cost(stored_hash, cost):
+    parts = stored_hash.split("$")
+    parts[2] = str(cost)
+    return "$".join(parts)
+
+
+def test_calibrated_cost_is_capped():
+    assert MIN_COST <= calibrate_cost() <= MAX_COST
+
+
+def test_hash_with_max_cost_verifies():
+    assert verify_password("geheim", hash_password("geheim", cost=MAX_COST)) == (True, False)
+
+
+def test_cost_above_cap_is_rejected():
+    stored_hash = _with_cost(hash_password("geheim", cost=MIN_COST), MAX_COST + 3)
+    assert verify_password("geheim", stored_hash) == (False, False)
+
+
+def test_malformed_hash_is_rejected():
+    stored_hash = hash_password("geheim", cost=MIN_COST)
+    assert verify_password("geheim", _with_cost(stored_hash, "x")) == (False, False)
+    assert verify_password("geheim", stored_hash[:-3] + "%%%") == (False, False)
+    assert verify_password("geheim", "md5$abc") == (False, False)
+
+
+def test_round_trip():
+    stored_hash = hash_password("geheim", cost=MIN_COST)
+    assert stored_hash.startswith(f"scrypt$1${MIN_COST}$")
+    assert verify_password("geheim", stored_hash) == (True, False)
+    assert verify_password("Geheim", stored_hash) == (False, False)
+
+
+def test_salt_differs_per_hash():
+    assert hash_password("geheim", cost=MIN_COST) != hash_password("geheim", cost=MIN_COST)
+
+
+def test_legacy_sha256_needs_rehash():
+    legacy_hash = hashlib.sha256(b"geheim").hexdigest()
+    assert verify_password("geheim", legacy_hash) == (True, True)
+    assert verify_password("falsch", legacy_hash) == (False, True)
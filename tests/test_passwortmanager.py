@@ -0,0 +1,126 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für den verschlüsselten Passwortmanager und die Übernahme der alten passwords.json.
+"""
+import json
+
+import pytest
+from PyQt5.QtTest import QAbstractItemModelTester
+
+from modelle import UNREADABLE_PASSWORD, PasswordListModel
+from passwortmanager import PasswordManager
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    path = tmp_path / "passwords.json"
+    path.write_text(json.dumps({"mail": "geheim", "bank": "1234"}))
+    return path
+
+
+def _open(tmp_path, name, legacy_file=None, master_password="anmeldung"):
+    password_manager = PasswordManager(str(tmp_path / name), legacy_filename=legacy_file and str(legacy_file))
+    password_manager.unlock(master_password)
+    password_manager.load_passwords_from_file()
+    return password_manager
+
+
+def test_round_trip_and_reopen(tmp_path):
+    password_manager = _open(tmp_path, "passwords_a.json")
+    password_manager.save_password("mail", "geheim")
+    password_manager.close()
+
+    reopened = _open(tmp_path, "passwords_a.json")
+    assert reopened.get_password("mail") == "geheim"
+    assert reopened.get_password("fehlt") is None
+    assert "geheim" not in (tmp_path / "passwords_a.json.log").read_text()
+    reopened.close()
+
+
+def test_wrong_master_password_is_rejected(tmp_path):
+    _open(tmp_path, "passwords_a.json").close()
+    with pytest.raises(ValueError):
+        _open(tmp_path, "passwords_a.json", master_password="falsch")
+
+
+def test_legacy_file_stays_until_import_is_confirmed(tmp_path, legacy_file):
+    first = _open(tmp_path, "passwords_a.json", legacy_file)
+    assert first.legacy_password_count() == 2
+    assert first.get_password("mail") is None
+    first.close()
+
+    # Ein anderer Benutzer sieht die Datei weiterhin und übernimmt sie erst nach Bestätigung.
+    second = _open(tmp_path, "passwords_b.json", legacy_file)
+    second.save_password("bank", "eigenes")
+    assert second.import_legacy_passwords() == 1
+    assert second.get_password("mail") == "geheim"
+    assert second.get_password("bank") == "eigenes"
+    assert list(second.usernames) == ["bank", "mail"]
+    assert not legacy_file.exists()
+    assert second.legacy_password_count() == 0
+    second.close()
+
+
+def test_import_happens_once(tmp_path, legacy_file):
+    password_manager = _open(tmp_path, "passwords_a.json", legacy_file)
+    assert password_manager.import_legacy_passwords() == 2
+    assert not legacy_file.exists()
+    assert password_manager.import_legacy_passwords() == 0
+    password_manager.close()
+
+
+def test_unreadable_entry_does_not_break_the_list(tmp_path):
+    password_manager = _open(tmp_path, "passwords_a.json")
+    password_manager.save_password("bank", "1234")
+    password_manager.save_password("mail", "geheim")
+    # Ein unter einem anderen Namen versiegelter Wert passt nicht zum Eintrag "bank".
+    password_manager.store.set("bank", password_manager.vault.seal("mail", "fremd"))
+
+    with pytest.raises(ValueError):
+        password_manager.get_password("bank")
+    model = PasswordListModel(password_manager)
+    assert model.data(model.index(0, 1)) == UNREADABLE_PASSWORD
+    assert model.data(model.index(1, 1)) == "geheim"
+    password_manager.close()
+
+
+def test_insert_follows_model_contract(tmp_path):
+    password_manager = _open(tmp_path, "passwords_a.json")
+    for username in ("anna", "bernd", "carla"):
+        password_manager.save_password(username, "x")
+    model = PasswordListModel(password_manager)
+    model.set_filter("b")
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Warning)
+    seen = []
+    model.rowsAboutToBeInserted.connect(
+        lambda _parent, first, _last: seen.append((first, model.rowCount(), "berta" in password_manager.usernames)))
+
+    model.save_password("berta", "y")
+    model.save_password("dora", "z")
+
+    assert seen == [(1, 1, False)]
+    assert [model.data(model.index(row, 0)) for row in range(model.rowCount())] == ["bernd", "berta"]
+    model.set_filter("")
+    assert model.rowCount() == 5
+    del tester
+    password_manager.close()
+
+
+def test_failed_save_resets_model(tmp_path, monkeypatch):
+    password_manager = _open(tmp_path, "passwords_a.json")
+    password_manager.save_password("anna", "x")
+    model = PasswordListModel(password_manager)
+    resets = []
+    model.modelReset.connect(lambda: resets.append(model.rowCount()))
+
+    def fail(_key, _value):
+        raise OSError("Datenträger voll")
+    monkeypatch.setattr(password_manager.store, "set", fail)
+
+    with pytest.raises(OSError):
+        model.save_password("bernd", "y")
+    assert resets == [1]
+    assert model.rowCount() == 1
+    assert "bernd" not in password_manager.usernames
+    password_manager.close()
@@ -0,0 +1,123 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die kompilierten Regeln und das Neuladen der Regeldatei im Kern.
+"""
+import json
+import os
+import re
+
+import pytest
+
+from automatisierungskern import AutomationCore
+from regeln import Rule, RuleSet, load_rules
+
+
+def _rule(name, source, **patterns):
+    return Rule(name, [source], os.path.join(source, name), **patterns)
+
+
+def test_extensions_go_into_suffix_table(tmp_path):
+    source = str(tmp_path)
+    rules = RuleSet([_rule("Fotos", source, extensions=[".jpg", "PNG"]),
+                     _rule("Archive", source, extensions=[".tar.gz"])])
+
+    compiled = rules._compiled[source]
+    assert compiled.suffixes == {".jpg": 0, ".png": 0}
+    assert rules.match(source, "IMG_1.JPG").name == "Fotos"
+    assert rules.match(source, "bild.png").name == "Fotos"
+    # Mehrteilige Endungen stehen nur im kombinierten Regex.
+    assert rules.match(source, "sicherung.TAR.GZ").name == "Archive"
+    assert rules.match(source, "sicherung.gz") is None
+    assert rules.match(source, "ohne_endung") is None
+
+
+def test_combined_regex_matches_globs_and_regexes(tmp_path):
+    source = str(tmp_path)
+    rules = RuleSet([_rule("Rechnungen", source, globs=["rechnung*.pdf", "beleg_?.pdf"],
+                           regexes=[r"^invoice-\d+"])])
+
+    compiled = rules._compiled[source]
+    assert compiled.regex.groupindex.keys() == {"r0", "r0_1", "r0_2"}
+    assert rules.match(source, "Rechnung_Mai.pdf").name == "Rechnungen"
+    assert rules.match(source, "beleg_1.pdf").name == "Rechnungen"
+    assert rules.match(source, "INVOICE-42.txt").name == "Rechnungen"
+    assert rules.match(source, "beleg_12.pdf") is None
+    assert rules.match(source, "my-invoice-42.txt") is None
+
+
+def test_first_rule_wins_across_suffixes_and_regex(tmp_path):
+    source = str(tmp_path)
+    rules = RuleSet([_rule("Scans", source, globs=["scan*"]),
+                     _rule("Fotos", source, extensions=[".jpg"]),
+                     _rule("Alles", source, regexes=["."])])
+
+    assert rules.match(source, "scan_1.jpg").name == "Scans"
+    assert rules.match(source, "urlaub.jpg").name == "Fotos"
+    assert rules.match(source, "notiz.txt").name == "Alles"
+
+
+def test_rules_apply_only_to_their_sources(tmp_path):
+    downloads, desktop = str(tmp_path / "Downloads"), str(tmp_path / "Desktop")
+    rules = RuleSet([_rule("Fotos", downloads, extensions=[".jpg"])])
+
+    assert rules.sources == [downloads]
+    assert rules.target_for(os.path.join(downloads, "a.jpg")) == os.path.join(downloads, "Fotos", "a.jpg")
+    assert rules.target_for(os.path.join(desktop, "a.jpg")) is None
+
+
+def test_fingerprint_ignores_targets(tmp_path):
+    source = str(tmp_path)
+    first = RuleSet([Rule("Fotos", [source], str(tmp_path / "a"), extensions=[".jpg"])])
+    moved = RuleSet([Rule("Fotos", [source], str(tmp_path / "b"), extensions=[".jpg"])])
+    widened = RuleSet([Rule("Fotos", [source], str(tmp_path / "a"), extensions=[".jpg", ".png"])])
+
+    assert first.fingerprint == moved.fingerprint
+    assert first.fingerprint != widened.fingerprint
+
+
+def test_load_rules_reports_invalid_regex(tmp_path):
+    rules_file = tmp_path / "regeln.json"
+    rules_file.write_text(json.dumps({"rules": [{"target": str(tmp_path), "regexes": ["(offen"]}]}))
+
+    with pytest.raises(re.error):
+        load_rules(str(rules_file))
+
+
+@pytest.mark.parametrize("content", [
+    "{kein json",
+    '{"regeln": []}',
+    json.dumps({"rules": [{"sources": ["~/Downloads"], "extensions": [".jpg"]}]}),
+    json.dumps({"rules": [{"target": "/tmp", "regexes": ["[abc"]}]}),
+])
+def test_reload_keeps_previous_rules_when_file_is_malformed(tmp_path, content):
+    source, target = tmp_path / "Downloads", tmp_path / "Bilder"
+    source.mkdir()
+    rules_file = tmp_path / "regeln.json"
+    rules_file.write_text(json.dumps({"rules": [
+        {"name": "Fotos", "sources": [str(source)], "extensions": [".jpg"], "target": str(target)},
+    ]}))
+    core = AutomationCore(str(rules_file), str(tmp_path / "verlauf.db"), str(tmp_path / "duplikate.db"),
+                          move_workers=1, snapshot_file=str(tmp_path / "ordnerstand.db"))
+    try:
+        watcher = core.start_watching()
+        rules = core.rules
+        rules_file.write_text(content)
+
+        assert core.reload_rules() is watcher
+        assert core.rules is rules
+        assert core.rules.target_for(str(source / "a.jpg")) == str(target / "a.jpg")
+    finally:
+        core.stop()
+
+
+def test_core_starts_without_rules_when_file_is_malformed(tmp_path):
+    rules_file = tmp_path / "regeln.json"
+    rules_file.write_text("{kein json")
+    core = AutomationCore(str(rules_file), str(tmp_path / "verlauf.db"), str(tmp_path / "duplikate.db"),
+                          move_workers=1, snapshot_file=str(tmp_path / "ordnerstand.db"))
+    try:
+        assert core.rules.rules == []
+        assert core.rules.sources == []
+    finally:
+        core.stop()
@@ -0,0 +1,80 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die Ordnerüberwachung mit inotify und mit dem Polling-Watcher.
+"""
+import os
+import select
+import sys
+
+import pytest
+
+from ueberwachung import InotifyWatcher, PollingWatcher, create_watcher
+
+
+def _read(watcher, timeout=2.0):
+    if watcher.fileno() is not None:
+        select.select([watcher.fileno()], [], [], timeout)
+    return watcher.read_changes()
+
+
+def test_polling_reports_new_and_rewritten_files(tmp_path):
+    existing = tmp_path / "alt.jpg"
+    existing.write_bytes(b"alt")
+    watcher = PollingWatcher()
+    watcher.add_directory(str(tmp_path))
+    assert watcher.read_changes() == []
+
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(b"1")
+    assert watcher.read_changes() == [str(photo)]
+    assert watcher.read_changes() == []
+
+    # Überschreiben an Ort und Stelle behält den Inode und ändert die Änderungszeit des Ordners nicht.
+    inode = photo.stat().st_ino
+    with open(photo, "r+b") as file:
+        file.write(b"12345")
+    assert photo.stat().st_ino == inode
+    assert watcher.read_changes() == [str(photo)]
+
+    # Gleiche Größe, nur die Änderungszeit ist neuer.
+    with open(existing, "r+b") as file:
+        file.write(b"neu")
+    status = existing.stat()
+    os.utime(existing, ns=(status.st_atime_ns, status.st_mtime_ns + 1_000_000_000))
+    assert watcher.read_changes() == [str(existing)]
+    watcher.close()
+
+
+def test_polling_ignores_directories_and_removed_files(tmp_path):
+    watcher = PollingWatcher()
+    watcher.add_directory(str(tmp_path))
+    (tmp_path / "unterordner").mkdir()
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(b"1")
+    assert watcher.read_changes() == [str(photo)]
+
+    photo.unlink()
+    assert watcher.read_changes() == []
+    photo.write_bytes(b"1")
+    assert watcher.read_changes() == [str(photo)]
+    watcher.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify gibt es nur unter Linux")
+def test_inotify_reports_written_and_moved_in_files(tmp_path):
+    watched, outside = tmp_path / "Downloads", tmp_path / "anderswo"
+    watched.mkdir()
+    outside.mkdir()
+    watcher = create_watcher([str(watched)])
+    assert isinstance(watcher, InotifyWatcher)
+
+    photo = watched / "foto.jpg"
+    photo.write_bytes(b"1")
+    (outside / "verschoben.jpg").write_bytes(b"2")
+    os.rename(outside / "verschoben.jpg", watched / "verschoben.jpg")
+    (watched / "unterordner").mkdir()
+
+    assert _read(watcher) == [str(photo), str(watched / "verschoben.jpg")]
+    assert watcher.read_changes() == []
+    watcher.close()
@@ -0,0 +1,124 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für den gepufferten Schreiber des Verlaufs (Group Commit).
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from verlauf import HistoryStore, HistoryWriter
+
+
+@pytest.fixture
+def store(tmp_path):
+    history = HistoryStore(str(tmp_path / "verlauf.db"))
+    yield history
+    history.close()
+
+
+class _CountingStore:
+    """
+    Zählt die Commits und lässt die ersten `failures` mit einem SQLite-Fehler fehlschlagen.
+    """
+
+    def __init__(self, store, failures=0):
+        self.store = store
+        self.failures = failures
+        self.commits = []
+        self.committed = threading.Event()
+
+    def append_many(self, entries, completed_journal_ids=()):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        ids = self.store.append_many(entries, completed_journal_ids)
+        self.commits.append(len(entries))
+        self.committed.set()
+        return ids
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_entries_are_committed_in_batches(store):
+    counting = _CountingStore(store)
+    committed = []
+    writer = HistoryWriter(counting, batch_size=50, flush_interval=60, on_committed=committed.extend)
+
+    for number in range(120):
+        writer.append(f"{number}.jpg", f"/ziel/{number}.jpg", moved_at=float(number))
+    assert _wait_for(lambda: sum(counting.commits) >= 50)
+    writer.close()
+
+    # Im Hintergrund wird erst bei einem vollen Stapel geschrieben, der Rest beim Schließen.
+    assert sum(counting.commits) == 120
+    assert all(size >= 50 for size in counting.commits[:-1])
+    assert len(counting.commits) <= 3
+    assert store.count() == 120
+    assert [filename for _id, filename, _target, _moved_at in committed] == [f"{n}.jpg" for n in range(120)]
+
+
+def test_partial_batch_is_committed_after_interval(store):
+    counting = _CountingStore(store)
+    writer = HistoryWriter(counting, batch_size=100, flush_interval=0.05)
+
+    writer.append("foto.jpg", "/ziel/foto.jpg")
+    assert counting.committed.wait(5)
+    assert counting.commits == [1]
+    writer.close()
+
+
+def test_flush_writes_immediately_and_clears_journal_rows(store):
+    writer = HistoryWriter(store, batch_size=100, flush_interval=60)
+    journal_id = store.begin_move("/quelle/foto.jpg", "/ziel/foto.jpg")
+
+    writer.append("foto.jpg", "/ziel/foto.jpg", journal_id=journal_id)
+    writer.flush()
+
+    assert store.count() == 1
+    assert store.unfinished_moves() == []
+    writer.close()
+
+
+def test_failed_commit_is_retried_and_reported(store):
+    counting = _CountingStore(store, failures=2)
+    errors = []
+    writer = HistoryWriter(counting, batch_size=1, flush_interval=0, on_error=errors.append, retry_interval=0.05)
+
+    writer.append("foto.jpg", "/ziel/foto.jpg")
+    assert counting.committed.wait(5)
+
+    assert len(errors) == 2 and all(isinstance(error, sqlite3.OperationalError) for error in errors)
+    assert counting.commits == [1]
+    # Der Thread läuft nach den Fehlern weiter.
+    writer.append("zwei.jpg", "/ziel/zwei.jpg")
+    writer.close()
+    assert store.count() == 2
+
+
+def test_failed_flush_keeps_entries_pending(store):
+    counting = _CountingStore(store, failures=1)
+    writer = HistoryWriter(counting, batch_size=100, flush_interval=60, retry_interval=60)
+
+    writer.append("foto.jpg", "/ziel/foto.jpg")
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush()
+    writer.flush()
+
+    assert store.count() == 1
+    writer.close()
+
+
+def test_append_after_close_is_rejected(store):
+    writer = HistoryWriter(store)
+    writer.close()
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.append("foto.jpg", "/ziel/foto.jpg")
@@ -0,0 +1,296 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die Verschiebe-Engine, den FastMover und das Abgleichen des Journals nach einem Absturz.
+"""
+import errno
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from verlauf import HistoryStore
+from verschiebung import FastMover, MoveEngine, partial_path_for, unique_target_path
+
+
+class _Results:
+    """
+    Sammelt die Callbacks der Engine, die im Worker-Thread aufgerufen werden.
+    """
+
+    def __init__(self):
+        self.finished = []
+        self.progress = []
+        self._lock = threading.Lock()
+
+    def on_finished(self, source_path, target_path, error, journal_id):
+        with self._lock:
+            self.finished.append((source_path, target_path, error, journal_id))
+
+    def on_progress(self, completed, total):
+        with self._lock:
+            self.progress.append((completed, total))
+
+
+def _engine(results, **options):
+    return MoveEngine(3, results.on_finished, results.on_progress, **options)
+
+
+def test_moves_batch_in_pool_and_reports_progress(tmp_path):
+    source, target = tmp_path / "Downloads", tmp_path / "Bilder"
+    source.mkdir()
+    target.mkdir()
+    names = [f"foto_{number}.jpg" for number in range(20)]
+    for name in names:
+        (source / name).write_bytes(name.encode())
+    results = _Results()
+    engine = _engine(results)
+
+    for name in names:
+        assert engine.submit(str(source / name), str(target / name))
+    engine.shutdown(wait=True)
+
+    assert sorted(path.name for path in target.iterdir()) == sorted(names)
+    assert not list(source.iterdir())
+    assert all(error is None for _source, _target, error, _journal_id in results.finished)
+    # Ein Stapel endet, sobald nichts mehr aussteht; schnelle Verschiebungen können mehrere Stapel ergeben.
+    assert len(results.progress) == 20
+    assert all(0 < completed <= total <= 20 for completed, total in results.progress)
+    assert sum(1 for completed, total in results.progress if completed == total) >= 1
+
+
+def test_same_name_targets_are_not_overwritten(tmp_path):
+    source, target = tmp_path / "Downloads", tmp_path / "Bilder"
+    (source / "a").mkdir(parents=True)
+    (source / "b").mkdir()
+    target.mkdir()
+    (target / "foto.jpg").write_bytes(b"vorhanden")
+    (source / "a" / "foto.jpg").write_bytes(b"a")
+    (source / "b" / "foto.jpg").write_bytes(b"b")
+    results = _Results()
+    engine = _engine(results)
+
+    engine.submit(str(source / "a" / "foto.jpg"), str(target / "foto.jpg"))
+    engine.submit(str(source / "b" / "foto.jpg"), str(target / "foto.jpg"))
+    engine.shutdown(wait=True)
+
+    assert (target / "foto.jpg").read_bytes() == b"vorhanden"
+    assert sorted((target / name).read_bytes() for name in ("foto (1).jpg", "foto (2).jpg")) == [b"a", b"b"]
+    assert sorted(target_path for _source, target_path, _error, _id in results.finished) == \
+        [str(target / "foto (1).jpg"), str(target / "foto (2).jpg")]
+
+
+def test_failure_is_reported_and_source_released(tmp_path):
+    source = tmp_path / "foto.jpg"
+    target = tmp_path / "Bilder" / "foto.jpg"
+    target.parent.mkdir()
+    failures = []
+
+    def prepare(source_path, target_path):
+        if not failures:
+            failures.append(source_path)
+            raise RuntimeError("database is locked")
+        return target_path
+
+    results = _Results()
+    engine = _engine(results, prepare=prepare)
+    source.write_bytes(b"1")
+    engine.submit(str(source), str(target))
+    deadline = time.monotonic() + 5
+    while not results.progress and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert isinstance(results.finished[0][2], RuntimeError)
+
+    # Nach dem Fehler kann dieselbe Datei erneut eingeplant werden.
+    assert engine.submit(str(source), str(target))
+    engine.shutdown(wait=True)
+    assert results.finished[1][2] is None
+    assert target.read_bytes() == b"1"
+
+
+def test_duplicate_submit_is_ignored(tmp_path):
+    source = tmp_path / "foto.jpg"
+    source.write_bytes(b"1")
+    (tmp_path / "Bilder").mkdir()
+    started, release = threading.Event(), threading.Event()
+
+    def prepare(_source_path, target_path):
+        started.set()
+        release.wait(5)
+        return target_path
+
+    engine = _engine(_Results(), prepare=prepare)
+    assert engine.submit(str(source), str(tmp_path / "Bilder" / "foto.jpg"))
+    started.wait(5)
+    assert not engine.submit(str(source), str(tmp_path / "Bilder" / "foto.jpg"))
+    release.set()
+    engine.shutdown(wait=True)
+
+
+def test_unique_target_path(tmp_path):
+    (tmp_path / "foto.jpg").write_bytes(b"")
+    assert unique_target_path(str(tmp_path / "neu.jpg")) == str(tmp_path / "neu.jpg")
+    assert unique_target_path(str(tmp_path / "foto.jpg"), {str(tmp_path / "foto (1).jpg")}) == \
+        str(tmp_path / "foto (2).jpg")
+
+
+@pytest.fixture
+def cross_device(monkeypatch):
+    """
+    Lässt jedes rename einer Quelldatei mit EXDEV fehlschlagen, als läge das Ziel auf einem anderen Dateisystem.
+    """
+    sources = set()
+    rename = os.rename
+
+    def fake_rename(source_path, target_path):
+        if os.fspath(source_path) in sources:
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        rename(source_path, target_path)
+
+    monkeypatch.setattr(os, "rename", fake_rename)
+    return sources
+
+
+def _source_file(tmp_path, size=3 * 1024 * 1024 + 17):
+    source = tmp_path / "film.mov"
+    data = os.urandom(size)
+    source.write_bytes(data)
+    os.chmod(source, 0o640)
+    os.utime(source, ns=(1_600_000_000_000_000_000, 1_600_000_000_123_456_789))
+    return source, data
+
+
+def test_cross_device_move_keeps_source_until_flush(tmp_path, cross_device):
+    source, data = _source_file(tmp_path)
+    target = tmp_path / "Bilder" / "film.mov"
+    target.parent.mkdir()
+    cross_device.add(str(source))
+    mover = FastMover(chunk_size=1024 * 1024)
+
+    mover.move(str(source), str(target))
+
+    assert target.read_bytes() == data
+    assert not os.path.exists(partial_path_for(str(target)))
+    assert stat.S_IMODE(target.stat().st_mode) == 0o640
+    assert target.stat().st_mtime_ns == 1_600_000_000_123_456_789
+    # Die Quelle wird erst gelöscht, nachdem die Kopie mit fsync gesichert wurde.
+    assert source.exists()
+    mover.flush()
+    assert not source.exists()
+
+
+def test_cross_device_batch_flushes_automatically(tmp_path, cross_device):
+    mover = FastMover(sync_batch_size=2)
+    (tmp_path / "Bilder").mkdir()
+    sources = []
+    for number in range(2):
+        source = tmp_path / f"{number}.jpg"
+        source.write_bytes(b"x" * number)
+        cross_device.add(str(source))
+        sources.append(source)
+        mover.move(str(source), str(tmp_path / "Bilder" / source.name))
+    assert not any(source.exists() for source in sources)
+
+
+@pytest.mark.parametrize("missing", [["copy_file_range"], ["copy_file_range", "sendfile"]])
+def test_copy_falls_back_without_kernel_copy(tmp_path, monkeypatch, missing):
+    for name in missing:
+        monkeypatch.delattr(os, name, raising=False)
+    source, data = _source_file(tmp_path, size=2 * 1024 * 1024 + 5)
+    target = tmp_path / "kopie.mov"
+
+    FastMover(chunk_size=512 * 1024).copy_file(str(source), str(target))
+
+    assert target.read_bytes() == data
+    assert target.stat().st_mtime_ns == 1_600_000_000_123_456_789
+
+
+def test_failed_copy_leaves_no_partial_file(tmp_path, cross_device, monkeypatch):
+    source, _data = _source_file(tmp_path)
+    target = tmp_path / "Bilder" / "film.mov"
+    target.parent.mkdir()
+    cross_device.add(str(source))
+    mover = FastMover()
+
+    def fail(*_args):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    monkeypatch.setattr(mover, "_copy_data", fail)
+
+    with pytest.raises(OSError):
+        mover.move(str(source), str(target))
+    assert not target.exists()
+    assert not os.path.exists(partial_path_for(str(target)))
+    assert source.exists()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    store = HistoryStore(str(tmp_path / "verlauf.db"))
+    yield store
+    store.close()
+
+
+def test_recover_reconciles_each_crash_state(tmp_path, journal):
+    source_dir, target_dir = tmp_path / "Downloads", tmp_path / "Bilder"
+    source_dir.mkdir()
+    target_dir.mkdir()
+
+    # Umbenannt, aber der Verlaufseintrag fehlt noch.
+    (target_dir / "renamed.jpg").write_bytes(b"1")
+    journal.begin_move(str(source_dir / "renamed.jpg"), str(target_dir / "renamed.jpg"))
+    # Kopie über Dateisystemgrenzen abgebrochen: nur eine halbe Kopie im Ziel.
+    (source_dir / "partial.jpg").write_bytes(b"22")
+    with open(partial_path_for(str(target_dir / "partial.jpg")), "wb") as file:
+        file.write(b"2")
+    journal.begin_move(str(source_dir / "partial.jpg"), str(target_dir / "partial.jpg"))
+    # Kopie fertig umbenannt, die Quelle aber noch nicht gelöscht.
+    (source_dir / "copied.jpg").write_bytes(b"333")
+    (target_dir / "copied.jpg").write_bytes(b"333")
+    journal.begin_move(str(source_dir / "copied.jpg"), str(target_dir / "copied.jpg"))
+    # Duplikat: die Quelle wurde schon gelöscht, es entstand keine neue Datei.
+    (target_dir / "original.jpg").write_bytes(b"4")
+    journal.begin_move(str(source_dir / "duplicate.jpg"), None, str(target_dir / "original.jpg"))
+
+    completed = MoveEngine(1, journal=journal).recover()
+
+    assert [(source, target) for source, target, _started_at, _journal_id in completed] == [
+        (str(source_dir / "renamed.jpg"), str(target_dir / "renamed.jpg")),
+        (str(source_dir / "copied.jpg"), str(target_dir / "copied.jpg")),
+        (str(source_dir / "duplicate.jpg"), str(target_dir / "original.jpg")),
+    ]
+    assert sorted(path.name for path in source_dir.iterdir()) == ["partial.jpg"]
+    assert sorted(path.name for path in target_dir.iterdir()) == ["copied.jpg", "original.jpg", "renamed.jpg"]
+    # Der Vermerk der nicht stattgefundenen Verschiebung ist gelöscht, die übrigen warten auf den Verlauf.
+    assert [row[0] for row in journal.unfinished_moves()] == [journal_id for *_rest, journal_id in completed]
+
+
+def test_history_entry_clears_only_its_own_journal_row(tmp_path, journal):
+    source, target = tmp_path / "foto.jpg", tmp_path / "Bilder" / "foto.jpg"
+    target.parent.mkdir()
+    source.write_bytes(b"1")
+    results = _Results()
+    engine = MoveEngine(1, results.on_finished, journal=journal)
+    engine.submit(str(source), str(target))
+    engine.shutdown(wait=True)
+    _source, target_path, error, journal_id = results.finished[0]
+    assert error is None
+    # Ein erneuter Download derselben Quelle wird vermerkt, bevor der erste Verlaufseintrag geschrieben ist.
+    later_id = journal.begin_move(str(source), str(target.parent / "foto (1).jpg"))
+
+    journal.append_many([("foto.jpg", target_path, 0.0)], [journal_id])
+
+    assert [row[0] for row in journal.unfinished_moves()] == [later_id]
+    assert journal.count() == 1
+
+
+def test_failed_move_aborts_its_journal_row(tmp_path, journal):
+    results = _Results()
+    engine = MoveEngine(1, results.on_finished, journal=journal)
+    (tmp_path / "Bilder").mkdir()
+    engine.submit(str(tmp_path / "fehlt.jpg"), str(tmp_path / "Bilder" / "fehlt.jpg"))
+    engine.shutdown(wait=True)
+
+    assert isinstance(results.finished[0][2], FileNotFoundError)
+    assert journal.unfinished_moves() == []
@@ -0,0 +1,73 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tests für die cron-Auslöser des Zeitplaners.
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+from zeitplaner import CronTrigger, Scheduler, _parse_cron_field
+
+
+def _next_after(expression, moment):
+    timestamp = time.mktime(datetime.fromisoformat(moment).timetuple())
+    return datetime.fromtimestamp(CronTrigger(expression).next_after(timestamp))
+
+
+def test_step_without_range_runs_to_end_of_field():
+    assert _parse_cron_field("5/10", 0, 59) == {5, 15, 25, 35, 45, 55}
+    assert _parse_cron_field("*/20", 0, 59) == {0, 20, 40}
+    assert _parse_cron_field("0-30/15", 0, 59) == {0, 15, 30}
+    assert _parse_cron_field("5", 0, 59) == {5}
+
+
+def test_step_without_range_in_expression():
+    assert _next_after("5/10 * * * *", "2026-10-17 12:06") == datetime(2026, 10, 17, 12, 15)
+
+
+def test_day_and_weekday_match_either():
+    # Der 13. oder jeder Freitag; der 2. Oktober 2026 ist ein Freitag.
+    assert _next_after("0 12 13 * 5", "2026-10-01 00:00") == datetime(2026, 10, 2, 12, 0)
+
+
+def test_leap_day():
+    assert _next_after("0 0 29 2 *", "2026-03-01 00:00") == datetime(2028, 2, 29, 0, 0)
+
+
+def test_invalid_field():
+    with pytest.raises(ValueError):
+        CronTrigger("60 * * * *")
+
+
+@pytest.mark.parametrize("content", [
+    "{kein json",
+    '{"aufgaben": []}',
+    '{"tasks": [{"name": "Kaputt", "cron": "61 * * * *", "action": {"notify": "x"}}]}',
+])
+def test_reload_keeps_tasks_when_file_is_malformed(tmp_path, content):
+    tasks_file = tmp_path / "aufgaben.json"
+    tasks_file.write_text('{"tasks": [{"name": "Pause", "interval": 3600, "action": {"notify": "Pause"}}]}')
+    scheduler = Scheduler(str(tasks_file), str(tmp_path / "aufgabenverlauf.db"))
+    try:
+        next_run = scheduler.next_run("Pause")
+        tasks_file.write_text(content)
+
+        assert scheduler.reload() is False
+        assert list(scheduler.tasks) == ["Pause"]
+        assert scheduler.next_run("Pause") == next_run
+        assert scheduler.next_timeout() is not None
+    finally:
+        scheduler.shutdown()
+
+
+def test_scheduler_starts_without_tasks_when_file_is_malformed(tmp_path):
+    tasks_file = tmp_path / "aufgaben.json"
+    tasks_file.write_text("{kein json")
+    scheduler = Scheduler(str(tasks_file), str(tmp_path / "aufgabenverlauf.db"))
+    try:
+        assert scheduler.tasks == {}
+        assert scheduler.next_timeout() is None
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,182 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Tresor Modul:
+
+Dieses Modul enthält die Verschlüsselung des Passwortmanagers. Aus dem Anmeldepasswort wird einmal pro
+Sitzung mit scrypt ein Hauptschlüssel abgeleitet; die Parameter und das Salt stehen in einer kleinen
+Kopfdatei neben dem Tresor (`<tresor>.vault`). Jeder Eintrag wird einzeln mit AES-GCM versiegelt, wobei
+der Eintragsname als zusätzliche authentifizierte Daten dient, sodass versiegelte Werte nicht zwischen
+Einträgen vertauscht werden können.
+
+Beim Entsperren wird nur ein Prüfwert aus der Kopfdatei entschlüsselt. Die Dauer ist daher unabhängig von der
+Anzahl der Einträge, und ein Eintrag wird erst entschlüsselt, wenn er abgerufen wird.
+
+Format eines versiegelten Werts:
+    v1$<nonce base64>$<ciphertext base64>
+
+Klassen:
+- Vault: Der Hauptschlüssel eines Passworttresors.
+
+Funktionen:
+- vault_path_for(username): Gibt den Dateinamen des Tresors eines Benutzers zurück.
+"""
+import base64
+import hashlib
+import json
+import os
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from passwort_hash import BLOCK_SIZE, PARALLELISM, calibrate_cost
+
+VAULT_SUFFIX = ".vault"
+SEAL_VERSION = "v1"
+NONCE_BYTES = 12
+SALT_BYTES = 16
+KEY_BYTES = 32
+_CHECK_NAME = "\0check"
+_CHECK_VALUE = "tresor"
+
+
+def vault_path_for(username):
+    """
+    Gibt den Dateinamen des Tresors eines Benutzers zurück. Der Benutzername wird gehasht, damit beliebige
+    Zeichen keinen ungültigen Dateinamen ergeben.
+
+    Args:
+        username (str): Der angemeldete Benutzer.
+
+    Returns:
+        str: Der Dateiname, z. B. "passwords_1a2b3c4d5e6f7a8b.json".
+    """
+    return f"passwords_{hashlib.sha256(username.encode()).hexdigest()[:16]}.json"
+
+
+def _derive_key(password, header):
+    """
+    Leitet den Hauptschlüssel mit den Parametern der Kopfdatei ab.
+    """
+    n = 2 ** header["cost"]
+    return hashlib.scrypt(password.encode(), salt=base64.b64decode(header["salt"]), n=n, r=header["r"],
+                          p=header["p"], maxmem=256 * header["r"] * (n + header["p"]), dklen=KEY_BYTES)
+
+
+class Vault:
+    """
+    Der Hauptschlüssel eines Passworttresors.
+
+    Parameter:
+        path (str): Der Pfad des Tresors; die Kopfdatei liegt unter `<path>.vault`.
+
+    Methoden:
+        unlock(password): Leitet den Hauptschlüssel ab und prüft ihn.
+        seal(name, plaintext): Versiegelt einen Eintrag.
+        open(name, sealed): Entschlüsselt einen Eintrag.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header_path = path + VAULT_SUFFIX
+        self._cipher = None
+
+    @property
+    def unlocked(self):
+        """
+        Gibt an, ob der Hauptschlüssel abgeleitet wurde.
+        """
+        return self._cipher is not None
+
+    def unlock(self, password):
+        """
+        Leitet den Hauptschlüssel aus dem Passwort ab. Existiert noch keine Kopfdatei, wird sie mit einem neuen
+        Salt und kalibrierten Kosten angelegt.
+
+        Args:
+            password (str): Das Anmeldepasswort.
+
+        Raises:
+            ValueError: Wenn das Passwort nicht zum Tresor passt.
+        """
+        if os.path.exists(self.header_path):
+            with open(self.header_path, "r") as file:
+                header = json.load(file)
+            self._cipher = AESGCM(_derive_key(password, header))
+            try:
+                self.open(_CHECK_NAME, header["check"])
+            except ValueError:
+                self._cipher = None
+                raise ValueError("Das Passwort passt nicht zum Passworttresor.")
+            return
+
+        header = {
+            "kdf": "scrypt",
+            "cost": calibrate_cost(),
+            "r": BLOCK_SIZE,
+            "p": PARALLELISM,
+            "salt": base64.b64encode(os.urandom(SALT_BYTES)).decode(),
+        }
+        self._cipher = AESGCM(_derive_key(password, header))
+        header["check"] = self.seal(_CHECK_NAME, _CHECK_VALUE)
+        temporary_path = f"{self.header_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(header, file)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            # os.link schlägt fehl, falls ein anderer Prozess die Kopfdatei inzwischen angelegt hat.
+            os.link(temporary_path, self.header_path)
+        except FileExistsError:
+            self._cipher = None
+            self.unlock(password)
+        finally:
+            os.unlink(temporary_path)
+
+    def _require_unlocked(self):
+        """
+        Stellt sicher, dass der Hauptschlüssel abgeleitet wurde.
+        """
+        if self._cipher is None:
+            raise ValueError("Der Passworttresor ist gesperrt.")
+
+    def seal(self, name, plaintext):
+        """
+        Versiegelt einen Eintrag.
+
+        Args:
+            name (str): Der Name des Eintrags, an den der Wert gebunden wird.
+            plaintext (str): Der Klartext.
+
+        Returns:
+            str: Der versiegelte Wert.
+
+        Raises:
+            ValueError: Wenn der Tresor noch nicht entsperrt ist.
+        """
+        self._require_unlocked()
+        nonce = os.urandom(NONCE_BYTES)
+        ciphertext = self._cipher.encrypt(nonce, plaintext.encode(), name.encode())
+        return "$".join([SEAL_VERSION, base64.b64encode(nonce).decode(), base64.b64encode(ciphertext).decode()])
+
+    def open(self, name, sealed):
+        """
+        Entschlüsselt einen Eintrag.
+
+        Args:
+            name (str): Der Name des Eintrags.
+            sealed (str): Der versiegelte Wert.
+
+        Returns:
+            str: Der Klartext.
+
+        Raises:
+            ValueError: Wenn der Tresor gesperrt ist oder der Wert beschädigt ist oder nicht zu diesem Eintrag gehört.
+        """
+        self._require_unlocked()
+        _version, nonce, ciphertext = sealed.split("$")
+        try:
+            plaintext = self._cipher.decrypt(base64.b64decode(nonce), base64.b64decode(ciphertext), name.encode())
+        except InvalidTag:
+            raise ValueError(f"Der Eintrag {name!r} konnte nicht entschlüsselt werden.")
+        return plaintext.decode()
@@ -0,0 +1,264 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Ueberwachung Modul:
+
+Dieses Modul enthält die Ordnerüberwachung für die Automatisierung. Unter Linux werden die Ereignisse
+direkt über inotify empfangen, auf anderen Systemen (oder wenn inotify nicht verfügbar ist) wird
+ein sparsamer Polling-Watcher verwendet. Beide liefern nur die geänderten Pfade zurück.
+
+Klassen:
+- InotifyWatcher: Ereignisgesteuerte Überwachung über Linux inotify.
+- PollingWatcher: Überwachung durch periodisches Abfragen der Ordner.
+
+Funktionen:
+- create_watcher(directories): Erstellt den passenden Watcher für das aktuelle System.
+"""
+import ctypes
+import os
+import struct
+import sys
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_ONLYDIR = 0x01000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_ONLYDIR
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """
+    Überwacht Ordner ereignisgesteuert über Linux inotify.
+
+    Der Watcher blockiert nie: `fileno()` liefert den Dateideskriptor, der z. B. mit einem
+    QSocketNotifier oder `select` überwacht werden kann. Sobald er lesbar ist, liefert
+    `read_changes()` die Pfade aller erstellten, fertig geschriebenen oder hineinverschobenen Dateien.
+
+    Methoden:
+        add_directory(directory): Fügt einen Ordner zur Überwachung hinzu.
+        fileno(): Gibt den inotify-Dateideskriptor zurück.
+        read_changes(): Liest alle anstehenden Ereignisse und gibt die geänderten Pfade zurück.
+        close(): Beendet die Überwachung.
+    """
+
+    def __init__(self):
+        # Die libc ist bereits in den Prozess geladen; find_library würde ldconfig aufrufen und den Start verzögern.
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._directories = {}
+
+    def add_directory(self, directory):
+        """
+        Fügt einen Ordner zur Überwachung hinzu.
+
+        Args:
+            directory (str): Der zu überwachende Ordner.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), directory)
+        self._directories[wd] = directory
+
+    def fileno(self):
+        """
+        Gibt den inotify-Dateideskriptor zurück.
+
+        Returns:
+            int: Der Dateideskriptor.
+        """
+        return self._fd
+
+    def read_changes(self):
+        """
+        Liest alle anstehenden Ereignisse und gibt die geänderten Pfade zurück.
+
+        Mehrere Ereignisse für denselben Pfad werden zusammengefasst. Läuft die Ereigniswarteschlange
+        des Kernels über, werden die überwachten Ordner einmal vollständig gelistet.
+
+        Returns:
+            list: Die Pfade der geänderten Dateien in der Reihenfolge ihres ersten Ereignisses.
+        """
+        changes = {}
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            except InterruptedError:
+                continue
+            if not data:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    for path in self._list_all():
+                        changes[path] = None
+                    continue
+                if mask & IN_IGNORED:
+                    self._directories.pop(wd, None)
+                    continue
+                if mask & IN_ISDIR or not name:
+                    continue
+
+                directory = self._directories.get(wd)
+                if directory is not None:
+                    changes[os.path.join(directory, os.fsdecode(name))] = None
+        return list(changes)
+
+    def _list_all(self):
+        """
+        Listet alle Dateien der überwachten Ordner auf (nur nach einem Überlauf der Warteschlange).
+        """
+        for directory in self._directories.values():
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            yield entry.path
+            except OSError:
+                continue
+
+    def close(self):
+        """
+        Beendet die Überwachung und schließt den Dateideskriptor.
+        """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._directories.clear()
+
+
+class PollingWatcher:
+    """
+    Überwacht Ordner durch periodisches Abfragen, falls inotify nicht verfügbar ist.
+
+    Jeder Abfragezyklus listet die Ordner und vergleicht für jede Datei Inode, Größe und Änderungszeit mit dem
+    letzten Zyklus. Die Änderungszeit des Ordners allein genügt nicht, da sie sich beim Überschreiben einer
+    vorhandenen Datei nicht ändert. Im Leerlauf kostet ein Zyklus daher einen `stat`-Aufruf pro Datei.
+
+    Attribute:
+        poll_interval (int): Das empfohlene Abfrageintervall in Millisekunden.
+
+    Methoden:
+        add_directory(directory): Fügt einen Ordner zur Überwachung hinzu.
+        fileno(): Gibt None zurück, da kein Dateideskriptor existiert.
+        read_changes(): Fragt die Ordner ab und gibt die neuen oder geänderten Pfade zurück.
+        close(): Beendet die Überwachung.
+    """
+
+    poll_interval = 500
+
+    def __init__(self):
+        self._directories = {}
+
+    def add_directory(self, directory):
+        """
+        Fügt einen Ordner zur Überwachung hinzu. Bereits vorhandene Dateien gelten als bekannt.
+
+        Args:
+            directory (str): Der zu überwachende Ordner.
+        """
+        state = {}
+        self._directories[directory] = state
+        self._scan(directory, state)
+
+    def fileno(self):
+        """
+        Gibt None zurück, da der Polling-Watcher keinen Dateideskriptor besitzt.
+        """
+        return None
+
+    def read_changes(self):
+        """
+        Fragt die überwachten Ordner ab und gibt die neuen oder geänderten Pfade zurück.
+
+        Returns:
+            list: Die Pfade der neuen oder geänderten Dateien.
+        """
+        changes = []
+        for directory, state in self._directories.items():
+            changes.extend(self._scan(directory, state))
+        return changes
+
+    def _scan(self, directory, known):
+        """
+        Listet einen Ordner und gibt die Dateien zurück, die neu sind oder deren Inode, Größe oder
+        Änderungszeit sich seit dem letzten Zyklus geändert hat. `known` wird dabei aktualisiert.
+        """
+        current = {}
+        changes = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        status = entry.stat()
+                    except OSError:
+                        # Die Datei wurde zwischen Auflisten und stat entfernt.
+                        continue
+                    signature = (status.st_ino, status.st_size, status.st_mtime_ns)
+                    current[entry.name] = signature
+                    if known.get(entry.name) != signature:
+                        changes.append(entry.path)
+        except OSError:
+            return []
+        known.clear()
+        known.update(current)
+        return changes
+
+    def close(self):
+        """
+        Beendet die Überwachung.
+        """
+        self._directories.clear()
+
+
+def create_watcher(directories):
+    """
+    Erstellt den passenden Watcher für das aktuelle System.
+
+    Unter Linux wird inotify verwendet; schlägt die Initialisierung fehl (z. B. weil das
+    Watch-Limit erreicht ist), wird auf den PollingWatcher ausgewichen.
+
+    Args:
+        directories (list): Die zu überwachenden Ordner.
+
+    Returns:
+        InotifyWatcher | PollingWatcher: Der initialisierte Watcher.
+    """
+    if sys.platform.startswith("linux"):
+        watcher = None
+        try:
+            watcher = InotifyWatcher()
+            for directory in directories:
+                watcher.add_directory(directory)
+            return watcher
+        except (OSError, AttributeError):
+            if watcher is not None:
+                watcher.close()
+
+    watcher = PollingWatcher()
+    for directory in directories:
+        watcher.add_directory(directory)
+    return watcher
@@ -0,0 +1,500 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Verlauf Modul:
+
+Dieses Modul enthält den Verlaufsspeicher der Automatisierung. Jede Verschiebung wird als Zeile in einer
+SQLite-Datenbank im WAL-Modus gespeichert. Indizes auf Dateiname und Zeitpunkt erlauben Abfragen ohne
+vollständigen Durchlauf, und die Anzeige lädt immer nur die sichtbaren Zeilen seitenweise.
+
+Vor jeder Verschiebung wird im Journal (`move_journal`) vermerkt, was verschoben werden soll. Der Vermerk wird in
+derselben Transaktion gelöscht, in der der Verlaufseintrag geschrieben wird. Nach einem Absturz stehen im Journal
+also genau die Verschiebungen, deren Ausgang noch mit dem Dateisystem abgeglichen werden muss.
+
+Daneben speichert er die einmal gelesenen Aufnahmezeitpunkte von Fotos. Der Schlüssel aus Dateiname, Größe
+und Änderungszeit bleibt beim Verschieben erhalten, sodass keine Datei zweimal ausgewertet wird.
+
+Neue Einträge werden über den HistoryWriter gesammelt und gebündelt in einer Transaktion geschrieben
+(Group Commit), statt pro verschobener Datei eine eigene Transaktion zu öffnen. Schlägt ein Commit fehl
+(z. B. volle Platte oder gesperrte Datenbank), bleiben die Einträge vorgemerkt und werden später erneut
+geschrieben.
+
+Klassen:
+- HistoryStore: Der Verlaufsspeicher für verschobene Dateien.
+- HistoryWriter: Der gepufferte Schreiber für den Verlaufsspeicher.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import messung
+
+FLUSH_BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.2
+RETRY_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_FILE = "verlauf.db"
+LEGACY_HISTORY_FILE = "moved_files.txt"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS moves (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    target_path TEXT,
+    moved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moves_filename ON moves (filename);
+CREATE INDEX IF NOT EXISTS moves_moved_at ON moves (moved_at);
+CREATE TABLE IF NOT EXISTS capture_times (
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    captured_at REAL,
+    PRIMARY KEY (filename, size, mtime_ns)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS move_journal (
+    id INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    target_path TEXT,
+    duplicate_path TEXT,
+    started_at REAL NOT NULL
+);
+-- Vermerke werden nach ID gelöscht; der frühere Index über den Quellpfad wird nicht mehr gebraucht.
+DROP INDEX IF EXISTS move_journal_source_path;
+"""
+
+# In moved_files.txt enthalten sowohl Dateinamen als auch Zeitstempel Kommas. Da nur Fotos gespeichert
+# wurden, endet der Dateiname am ersten Komma nach einer Foto-Endung.
+_LEGACY_LINE = re.compile(r"^(.*?\.(?:jpe?g|heic|png)),(.*)$", re.IGNORECASE)
+
+
+class HistoryStore:
+    """
+    Der Verlaufsspeicher für verschobene Dateien.
+
+    Die Verbindung darf aus mehreren Threads verwendet werden; alle Zugriffe sind über eine Sperre geschützt.
+
+    Parameter:
+        path (str): Der Pfad der Datenbankdatei.
+        durable (bool): Ob jeder Commit mit fsync auf den Datenträger geschrieben wird.
+
+    Methoden:
+        append(filename, target_path, moved_at): Speichert eine Verschiebung.
+        append_many(entries, completed_sources): Speichert mehrere Verschiebungen in einer Transaktion.
+        begin_move(source_path, target_path, duplicate_path): Vermerkt eine geplante Verschiebung im Journal.
+        abort_move(journal_id): Löscht einen Vermerk, dessen Verschiebung nicht stattgefunden hat.
+        unfinished_moves(): Gibt die Vermerke aller nicht abgeschlossenen Verschiebungen zurück.
+        count(): Gibt die Anzahl gespeicherter Verschiebungen zurück.
+        page(before_id, limit): Gibt eine Seite von Einträgen, die neuesten zuerst, zurück.
+        find_by_filename(filename): Sucht alle Verschiebungen einer Datei.
+        between(start, end): Sucht alle Verschiebungen in einem Zeitraum.
+        import_legacy_file(path, parse_timestamp): Übernimmt einmalig die alte moved_files.txt.
+        get_capture_time(filename, size, mtime_ns): Gibt einen gespeicherten Aufnahmezeitpunkt zurück.
+        put_capture_time(filename, size, mtime_ns, captured_at): Speichert einen Aufnahmezeitpunkt.
+        close(): Schließt die Datenbank.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, durable=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Im WAL-Modus sichert NORMAL gegen Programmabstürze; FULL zusätzlich gegen Stromausfall.
+        self._connection.execute("PRAGMA synchronous=FULL" if durable else "PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def append(self, filename, target_path, moved_at=None):
+        """
+        Speichert eine Verschiebung.
+
+        Args:
+            filename (str): Der Name der verschobenen Datei.
+            target_path (str): Der Zielpfad der Datei.
+            moved_at (float): Der Zeitpunkt der Verschiebung in Sekunden seit der Epoche (Standard: jetzt).
+
+        Returns:
+            int: Die ID des neuen Eintrags.
+        """
+        if moved_at is None:
+            moved_at = time.time()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO moves (filename, target_path, moved_at) VALUES (?, ?, ?)",
+                (filename, target_path, moved_at),
+            )
+            return cursor.lastrowid
+
+    def append_many(self, entries, completed_journal_ids=()):
+        """
+        Speichert mehrere Verschiebungen in einer einzigen Transaktion.
+
+        Args:
+            entries (list): Tupel (filename, target_path, moved_at).
+            completed_journal_ids (list): Die IDs der Journal-Vermerke dieser Verschiebungen, die in derselben
+                Transaktion gelöscht werden. Es wird nach ID gelöscht, nicht nach Quellpfad, damit ein
+                späterer Vermerk derselben Quelle (z. B. ein erneuter Download) offen bleibt.
+
+        Returns:
+            list: Die IDs der neuen Einträge in derselben Reihenfolge.
+        """
+        ids = []
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                for entry in entries:
+                    cursor = self._connection.execute(
+                        "INSERT INTO moves (filename, target_path, moved_at) VALUES (?, ?, ?)", entry
+                    )
+                    ids.append(cursor.lastrowid)
+                self._connection.executemany(
+                    "DELETE FROM move_journal WHERE id = ?", ((journal_id,) for journal_id in completed_journal_ids)
+                )
+        return ids
+
+    def begin_move(self, source_path, target_path, duplicate_path=None):
+        """
+        Vermerkt eine geplante Verschiebung im Journal, bevor sie ausgeführt wird.
+
+        Args:
+            source_path (str): Der Pfad der zu verschiebenden Datei.
+            target_path (str): Der reservierte Zielpfad oder None, falls keine neue Datei entsteht.
+            duplicate_path (str): Das inhaltsgleiche Duplikat im Zielordner, falls die Datei keines kopiert wird.
+
+        Returns:
+            int: Die ID des Vermerks.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO move_journal (source_path, target_path, duplicate_path, started_at) VALUES (?, ?, ?, ?)",
+                (source_path, target_path, duplicate_path, time.time()),
+            )
+            return cursor.lastrowid
+
+    def abort_move(self, journal_id):
+        """
+        Löscht den Vermerk einer Verschiebung, die nicht stattgefunden hat.
+
+        Args:
+            journal_id (int): Die ID des Vermerks.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM move_journal WHERE id = ?", (journal_id,))
+
+    def unfinished_moves(self):
+        """
+        Gibt die Vermerke aller Verschiebungen zurück, für die noch kein Verlaufseintrag geschrieben wurde.
+
+        Returns:
+            list: Tupel (id, source_path, target_path, duplicate_path, started_at), die ältesten zuerst.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, source_path, target_path, duplicate_path, started_at FROM move_journal ORDER BY id"
+            ).fetchall()
+
+    def count(self):
+        """
+        Gibt die Anzahl gespeicherter Verschiebungen zurück.
+
+        Returns:
+            int: Die Anzahl der Einträge.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM moves").fetchone()[0]
+
+    def page(self, before_id=None, limit=200):
+        """
+        Gibt eine Seite von Einträgen zurück, die neuesten zuerst.
+
+        Die Seiten werden über die ID fortgesetzt, sodass jede Seite unabhängig von der Gesamtgröße
+        des Verlaufs nur einen Indexzugriff kostet.
+
+        Args:
+            before_id (int): Nur Einträge mit kleinerer ID zurückgeben (None für die neueste Seite).
+            limit (int): Die maximale Anzahl Einträge.
+
+        Returns:
+            list: Tupel (id, filename, target_path, moved_at).
+        """
+        with self._lock:
+            if before_id is None:
+                cursor = self._connection.execute(
+                    "SELECT id, filename, target_path, moved_at FROM moves ORDER BY id DESC LIMIT ?", (limit,)
+                )
+            else:
+                cursor = self._connection.execute(
+                    "SELECT id, filename, target_path, moved_at FROM moves WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit),
+                )
+            return cursor.fetchall()
+
+    def find_by_filename(self, filename):
+        """
+        Sucht alle Verschiebungen einer Datei.
+
+        Args:
+            filename (str): Der Dateiname.
+
+        Returns:
+            list: Tupel (id, filename, target_path, moved_at), die ältesten zuerst.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, filename, target_path, moved_at FROM moves WHERE filename = ? ORDER BY id", (filename,)
+            ).fetchall()
+
+    def between(self, start, end):
+        """
+        Sucht alle Verschiebungen in einem Zeitraum.
+
+        Args:
+            start (float): Der Beginn des Zeitraums in Sekunden seit der Epoche (inklusive).
+            end (float): Das Ende des Zeitraums in Sekunden seit der Epoche (exklusive).
+
+        Returns:
+            list: Tupel (id, filename, target_path, moved_at), nach Zeitpunkt sortiert.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, filename, target_path, moved_at FROM moves WHERE moved_at >= ? AND moved_at < ? "
+                "ORDER BY moved_at",
+                (start, end),
+            ).fetchall()
+
+    def import_legacy_file(self, path=LEGACY_HISTORY_FILE, target_dir=None, parse_timestamp=None):
+        """
+        Übernimmt einmalig die Einträge der alten Textdatei und benennt sie danach in `<path>.migrated` um.
+
+        Args:
+            path (str): Der Pfad der alten Textdatei.
+            target_dir (str): Der Zielordner, in den die Dateien damals verschoben wurden.
+            parse_timestamp (callable): Wandelt den gespeicherten Zeitstempel-Text in Sekunden seit der
+                Epoche um oder gibt None zurück. Ohne Parser wird die Änderungszeit der Textdatei verwendet.
+
+        Returns:
+            int: Die Anzahl übernommener Einträge.
+        """
+        if not os.path.exists(path):
+            return 0
+
+        fallback_time = os.path.getmtime(path)
+        rows = []
+        with open(path, "r") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if not line:
+                    continue
+                match = _LEGACY_LINE.match(line)
+                filename, timestamp = match.groups() if match else line.partition(",")[::2]
+                moved_at = parse_timestamp(timestamp) if parse_timestamp else None
+                target_path = os.path.join(target_dir, filename) if target_dir else None
+                rows.append((filename, target_path, moved_at if moved_at is not None else fallback_time))
+
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(
+                    "INSERT INTO moves (filename, target_path, moved_at) VALUES (?, ?, ?)", rows
+                )
+        os.replace(path, path + ".migrated")
+        return len(rows)
+
+    def get_capture_time(self, filename, size, mtime_ns):
+        """
+        Gibt den gespeicherten Aufnahmezeitpunkt einer Datei zurück.
+
+        Args:
+            filename (str): Der Dateiname.
+            size (int): Die Dateigröße in Bytes.
+            mtime_ns (int): Die Änderungszeit in Nanosekunden.
+
+        Returns:
+            tuple: (captured_at,) mit None für Dateien ohne Aufnahmedatum, oder None, falls die Datei
+            noch nicht ausgewertet wurde.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT captured_at FROM capture_times WHERE filename = ? AND size = ? AND mtime_ns = ?",
+                (filename, size, mtime_ns),
+            ).fetchone()
+
+    def put_capture_time(self, filename, size, mtime_ns, captured_at):
+        """
+        Speichert den Aufnahmezeitpunkt einer Datei.
+
+        Args:
+            filename (str): Der Dateiname.
+            size (int): Die Dateigröße in Bytes.
+            mtime_ns (int): Die Änderungszeit in Nanosekunden.
+            captured_at (float): Der Aufnahmezeitpunkt in Sekunden seit der Epoche oder None.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO capture_times (filename, size, mtime_ns, captured_at) VALUES (?, ?, ?, ?)",
+                (filename, size, mtime_ns, captured_at),
+            )
+
+    def close(self):
+        """
+        Schließt die Datenbank.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+class HistoryWriter:
+    """
+    Der gepufferte Schreiber für den Verlaufsspeicher (Group Commit).
+
+    `append` kehrt sofort zurück. Ein Hintergrund-Thread schreibt die gesammelten Einträge in einer
+    Transaktion, sobald `batch_size` Einträge vorliegen oder seit dem ersten ungeschriebenen Eintrag
+    `flush_interval` Sekunden vergangen sind.
+
+    Schlägt ein Commit fehl (z. B. mit einem SQLite-Fehler), wird er protokolliert und über `on_error` gemeldet; die
+    Einträge bleiben vorgemerkt und der Thread versucht es nach `retry_interval` Sekunden erneut. Endet der
+    Thread trotzdem unerwartet, lösen `append` und `flush` einen RuntimeError aus, statt weiter vorzumerken.
+
+    Parameter:
+        store (HistoryStore): Der Verlaufsspeicher.
+        batch_size (int): Die Anzahl Einträge, nach der sofort geschrieben wird.
+        flush_interval (float): Die maximale Wartezeit in Sekunden, bevor geschrieben wird.
+        on_committed (callable): Wird nach jedem Commit im Schreib-Thread mit einer Liste von
+            Tupeln (id, filename, target_path, moved_at) aufgerufen.
+        on_error (callable): Wird im Schreib-Thread mit dem Fehler aufgerufen, wenn ein Commit fehlschlägt.
+        retry_interval (float): Die Wartezeit in Sekunden nach einem fehlgeschlagenen Commit.
+
+    Methoden:
+        append(filename, target_path, moved_at, journal_id): Merkt eine Verschiebung zum Schreiben vor.
+        flush(): Schreibt alle vorgemerkten Einträge sofort.
+        close(): Schreibt alle vorgemerkten Einträge und beendet den Schreib-Thread.
+    """
+
+    def __init__(self, store, batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL, on_committed=None,
+                 on_error=None, retry_interval=RETRY_INTERVAL):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_committed = on_committed
+        self.on_error = on_error
+        self.retry_interval = retry_interval
+        self._condition = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._pending = []
+        self._pending_journal_ids = []
+        self._first_pending_at = None
+        self._closed = False
+        self._failure = None
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, filename, target_path, moved_at=None, journal_id=None):
+        """
+        Merkt eine Verschiebung zum Schreiben vor.
+
+        Args:
+            filename (str): Der Name der verschobenen Datei.
+            target_path (str): Der Zielpfad der Datei.
+            moved_at (float): Der Zeitpunkt der Verschiebung in Sekunden seit der Epoche (Standard: jetzt).
+            journal_id (int): Die ID des Journal-Vermerks, der mit dem Eintrag gelöscht wird.
+        """
+        if moved_at is None:
+            moved_at = time.time()
+        with self._condition:
+            if self._closed:
+                raise ValueError("HistoryWriter ist bereits geschlossen.")
+            self._check_alive()
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((filename, target_path, moved_at))
+            if journal_id is not None:
+                self._pending_journal_ids.append(journal_id)
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def _check_alive(self):
+        """
+        Löst einen RuntimeError aus, wenn der Schreib-Thread unerwartet beendet wurde.
+        """
+        if self._failure is not None:
+            raise RuntimeError("Der Schreib-Thread des Verlaufs ist beendet.") from self._failure
+
+    def _run(self):
+        """
+        Wartet im Schreib-Thread auf volle Stapel oder abgelaufene Wartezeiten und schreibt sie.
+        """
+        try:
+            while True:
+                with self._condition:
+                    while not self._pending and not self._closed:
+                        self._condition.wait()
+                    if self._closed and not self._pending:
+                        return
+                    while len(self._pending) < self.batch_size and not self._closed:
+                        remaining = self._first_pending_at + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                try:
+                    self.flush()
+                except Exception as error:
+                    logger.exception("Verlauf konnte nicht geschrieben werden, neuer Versuch in %s s",
+                                     self.retry_interval)
+                    if self.on_error:
+                        self.on_error(error)
+                    with self._condition:
+                        if self._closed:
+                            # close() versucht es selbst noch einmal und meldet den Fehler dem Aufrufer.
+                            return
+                        self._condition.wait(self.retry_interval)
+        except BaseException as error:
+            with self._condition:
+                self._failure = error
+            logger.exception("Schreib-Thread des Verlaufs unerwartet beendet")
+            raise
+
+    def flush(self):
+        """
+        Schreibt alle vorgemerkten Einträge sofort in einer Transaktion. Schlägt der Commit fehl, bleiben die
+        Einträge vorgemerkt und der Fehler wird weitergegeben.
+
+        Raises:
+            sqlite3.Error: Wenn der Commit fehlschlägt.
+            RuntimeError: Wenn der Schreib-Thread unerwartet beendet wurde.
+        """
+        with self._commit_lock:
+            with self._condition:
+                if not self._closed:
+                    self._check_alive()
+                batch, self._pending = self._pending, []
+                journal_ids, self._pending_journal_ids = self._pending_journal_ids, []
+            if not batch:
+                return
+            try:
+                with messung.span("verlauf.commit"):
+                    ids = self.store.append_many(batch, journal_ids)
+            except BaseException:
+                with self._condition:
+                    self._pending[:0] = batch
+                    self._pending_journal_ids[:0] = journal_ids
+                    self._first_pending_at = time.monotonic()
+                raise
+            messung.count("verlauf.eintraege", len(batch))
+        if self.on_committed:
+            self.on_committed([(entry_id,) + entry for entry_id, entry in zip(ids, batch)])
+
+    def close(self):
+        """
+        Schreibt alle vorgemerkten Einträge und beendet den Schreib-Thread. Mehrfache Aufrufe sind erlaubt.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
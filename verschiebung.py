@@ -0,0 +1,532 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Verschiebung Modul:
+
+Dieses Modul enthält die Verschiebe-Engine der Automatisierung. Die Dateien werden in einem
+begrenzten Thread-Pool verschoben, damit große Dateien oder Ziele auf einem anderen Dateisystem
+den Aufrufer (z. B. die Qt-Ereignisschleife) nicht blockieren.
+
+Innerhalb eines Dateisystems wird per `os.rename` verschoben. Über Dateisystemgrenzen hinweg kopiert
+der FastMover die Daten im Kernel (`os.copy_file_range` bzw. `os.sendfile`) in eine temporäre Datei,
+übernimmt die Metadaten und benennt sie anschließend um. Die fsync-Aufrufe werden gesammelt; die
+Quelldateien werden erst gelöscht, nachdem ihre Kopien dauerhaft gespeichert sind.
+
+Klassen:
+- FastMover: Verschiebt Dateien mit rename-Schnellpfad und Kernel-Kopie über Dateisystemgrenzen.
+- MoveEngine: Verschiebt Dateien im Hintergrund und meldet Fortschritt und Ergebnisse über Callbacks.
+
+Funktionen:
+- unique_target_path(target_path, reserved): Sucht einen freien Zielpfad nach dem Muster "name (1).jpg".
+"""
+import errno
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import messung
+
+DEFAULT_MAX_WORKERS = 4
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+SYNC_BATCH_SIZE = 32
+PARTIAL_SUFFIX = ".partial"
+
+DUPLICATE_SKIP = "skip"
+DUPLICATE_LINK = "link"
+
+# Fehler, bei denen der nächste Kopiermechanismus versucht wird (z. B. ältere Kernel oder FUSE-Dateisysteme).
+_FALLBACK_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+
+class FastMover:
+    """
+    Verschiebt Dateien mit rename-Schnellpfad und Kernel-Kopie über Dateisystemgrenzen.
+
+    Eine Kopie über Dateisystemgrenzen wird zuerst unter `.<name>.partial` im Zielordner geschrieben und
+    erst nach vollständiger Übertragung umbenannt, sodass im Ziel nie eine halbe Datei sichtbar ist.
+    Die Quelldateien solcher Kopien werden gesammelt und erst in `flush()` gelöscht, nachdem alle Kopien
+    mit einem gemeinsamen fsync-Durchlauf gesichert wurden.
+
+    Parameter:
+        chunk_size (int): Die Anzahl Bytes pro Kopieraufruf.
+        sync_batch_size (int): Die Anzahl Kopien, nach der automatisch `flush()` ausgeführt wird.
+
+    Methoden:
+        move(source_path, target_path): Verschiebt eine Datei.
+        flush(): Sichert alle ausstehenden Kopien und löscht deren Quelldateien.
+    """
+
+    def __init__(self, chunk_size=COPY_CHUNK_SIZE, sync_batch_size=SYNC_BATCH_SIZE):
+        self.chunk_size = chunk_size
+        self.sync_batch_size = sync_batch_size
+        self._lock = threading.Lock()
+        self._unsynced = []
+
+    def move(self, source_path, target_path):
+        """
+        Verschiebt eine Datei.
+
+        Args:
+            source_path (str): Der Pfad der zu verschiebenden Datei.
+            target_path (str): Der Zielpfad.
+        """
+        try:
+            os.rename(source_path, target_path)
+            return
+        except OSError as error:
+            if error.errno != errno.EXDEV:
+                raise
+
+        partial_path = partial_path_for(target_path)
+        try:
+            self.copy_file(source_path, partial_path)
+            os.rename(partial_path, target_path)
+        except BaseException:
+            try:
+                os.unlink(partial_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._unsynced.append((source_path, target_path))
+            batch_full = len(self._unsynced) >= self.sync_batch_size
+        if batch_full:
+            self.flush()
+
+    def copy_file(self, source_path, target_path):
+        """
+        Kopiert Inhalt, Berechtigungen, Zeitstempel und erweiterte Attribute einer Datei.
+
+        Die Daten werden im Kernel übertragen: zuerst mit `os.copy_file_range`, dann mit `os.sendfile`
+        und nur als letzte Möglichkeit über einen Puffer im Userspace.
+
+        Args:
+            source_path (str): Der Pfad der Quelldatei.
+            target_path (str): Der Pfad der neuen Datei.
+        """
+        source_fd = os.open(source_path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        try:
+            stat = os.fstat(source_fd)
+            target_fd = os.open(target_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0),
+                                stat.st_mode & 0o777)
+            try:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(source_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                self._copy_data(source_fd, target_fd)
+                self._copy_metadata(source_fd, target_fd, target_path, stat)
+            finally:
+                os.close(target_fd)
+        finally:
+            os.close(source_fd)
+
+    def _copy_data(self, source_fd, target_fd):
+        """
+        Überträgt die Daten mit dem schnellsten verfügbaren Mechanismus bis zum Dateiende.
+        """
+        offset = 0
+        if hasattr(os, "copy_file_range"):
+            try:
+                while True:
+                    copied = os.copy_file_range(source_fd, target_fd, self.chunk_size)
+                    if not copied:
+                        return
+                    offset += copied
+            except OSError as error:
+                if error.errno not in _FALLBACK_ERRORS:
+                    raise
+
+        if hasattr(os, "sendfile"):
+            try:
+                while True:
+                    copied = os.sendfile(target_fd, source_fd, offset, self.chunk_size)
+                    if not copied:
+                        return
+                    offset += copied
+            except OSError as error:
+                if error.errno not in _FALLBACK_ERRORS:
+                    raise
+
+        os.lseek(source_fd, offset, os.SEEK_SET)
+        os.lseek(target_fd, offset, os.SEEK_SET)
+        buffer = bytearray(min(self.chunk_size, 1024 * 1024))
+        view = memoryview(buffer)
+        with os.fdopen(source_fd, "rb", buffering=0, closefd=False) as source:
+            while True:
+                read = source.readinto(buffer)
+                if not read:
+                    return
+                written = 0
+                while written < read:
+                    written += os.write(target_fd, view[written:read])
+
+    def _copy_metadata(self, source_fd, target_fd, target_path, stat):
+        """
+        Übernimmt Berechtigungen, Zeitstempel und erweiterte Attribute über die offenen Dateideskriptoren.
+        """
+        if hasattr(os, "listxattr"):
+            try:
+                for name in os.listxattr(source_fd):
+                    try:
+                        os.setxattr(target_fd, name, os.getxattr(source_fd, name))
+                    except OSError as error:
+                        if error.errno not in (errno.EPERM, errno.ENOTSUP, errno.ENODATA, errno.EACCES):
+                            raise
+            except OSError as error:
+                if error.errno not in (errno.ENOTSUP, errno.ENOSYS, errno.EACCES):
+                    raise
+
+        if os.chmod in os.supports_fd:
+            os.chmod(target_fd, stat.st_mode & 0o7777)
+        else:
+            os.chmod(target_path, stat.st_mode & 0o7777)
+
+        times = (stat.st_atime_ns, stat.st_mtime_ns)
+        if os.utime in os.supports_fd:
+            os.utime(target_fd, ns=times)
+        else:
+            os.utime(target_path, ns=times)
+
+    def flush(self):
+        """
+        Sichert alle ausstehenden Kopien und löscht anschließend deren Quelldateien.
+
+        Zuerst werden alle kopierten Dateien und danach jeder betroffene Zielordner genau einmal mit fsync
+        gesichert. Erst dann werden die Quelldateien gelöscht, sodass nach einem Absturz immer mindestens
+        eine vollständige Kopie existiert.
+        """
+        with self._lock:
+            batch, self._unsynced = self._unsynced, []
+        if not batch:
+            return
+
+        directories = set()
+        for _source_path, target_path in batch:
+            _fsync_path(target_path)
+            directories.add(os.path.dirname(target_path))
+        for directory in directories:
+            _fsync_path(directory)
+
+        for source_path, _target_path in batch:
+            try:
+                os.unlink(source_path)
+            except FileNotFoundError:
+                pass
+
+
+def partial_path_for(target_path):
+    """
+    Gibt den Pfad zurück, unter dem eine Kopie über Dateisystemgrenzen geschrieben wird, bevor sie fertig ist.
+
+    Args:
+        target_path (str): Der Zielpfad.
+
+    Returns:
+        str: Der Pfad `.<name>.partial` im Zielordner.
+    """
+    target_dir, target_name = os.path.split(target_path)
+    return os.path.join(target_dir, f".{target_name}{PARTIAL_SUFFIX}")
+
+
+def _fsync_path(path):
+    """
+    Öffnet eine Datei oder einen Ordner und sichert ihn mit fsync.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError as error:
+        # Einige Dateisysteme erlauben kein fsync auf Ordnern.
+        if error.errno not in (errno.EINVAL, errno.EBADF):
+            raise
+    finally:
+        os.close(fd)
+
+
+class MoveEngine:
+    """
+    Verschiebt Dateien in einem begrenzten Thread-Pool.
+
+    Die Callbacks werden im Worker-Thread aufgerufen. Eine GUI muss die Ergebnisse deshalb selbst
+    in ihren Thread übertragen, z. B. über Qt-Signale.
+
+    Parameter:
+        max_workers (int): Die maximale Anzahl gleichzeitiger Verschiebungen.
+        on_finished (callable): Wird mit (source_path, target_path, error, journal_id) aufgerufen, sobald eine
+            Verschiebung abgeschlossen ist. `target_path` ist der tatsächlich verwendete Zielpfad,
+            `error` ist None bei Erfolg, `journal_id` die ID des Journal-Vermerks (oder None).
+        on_progress (callable): Wird mit (completed, total) des aktuellen Stapels aufgerufen.
+        mover (FastMover): Der Mover, der die einzelnen Dateien verschiebt.
+        dedup_index (DedupIndex): Der Duplikat-Index des Zielordners oder None, um nicht zu prüfen.
+        duplicate_policy (str): DUPLICATE_SKIP löscht exakte Duplikate nur aus der Quelle,
+            DUPLICATE_LINK legt zusätzlich einen Hardlink unter dem neuen Namen an.
+        prepare (callable): Wird im Worker-Thread vor der Verschiebung mit (source_path, target_path) aufgerufen
+            und gibt den endgültigen Zielpfad zurück, z. B. nach dem Auslesen der Metadaten.
+        journal (HistoryStore): Vermerkt jede Verschiebung, bevor sie ausgeführt wird, oder None. Der Vermerk
+            wird über seine ID mit dem Verlaufseintrag gelöscht (siehe `HistoryWriter.append`).
+
+    Methoden:
+        submit(source_path, target_path): Plant eine Verschiebung ein.
+        recover(): Gleicht die nach einem Absturz offenen Vermerke des Journals mit dem Dateisystem ab.
+        shutdown(wait): Beendet den Thread-Pool.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, on_finished=None, on_progress=None, mover=None,
+                 dedup_index=None, duplicate_policy=DUPLICATE_LINK, prepare=None, journal=None):
+        self.max_workers = max_workers
+        self.on_finished = on_finished
+        self.on_progress = on_progress
+        self.mover = mover or FastMover()
+        self.dedup_index = dedup_index
+        self.duplicate_policy = duplicate_policy
+        self.prepare = prepare
+        self.journal = journal
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="move")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._reserved_targets = set()
+        self._submitted = 0
+        self._completed = 0
+
+    def submit(self, source_path, target_path):
+        """
+        Plant eine Verschiebung ein.
+
+        Ist für dieselbe Quelldatei bereits eine Verschiebung eingeplant, wird der Aufruf ignoriert.
+
+        Args:
+            source_path (str): Der Pfad der zu verschiebenden Datei.
+            target_path (str): Der Zielpfad.
+
+        Returns:
+            bool: True, falls die Verschiebung eingeplant wurde, ansonsten False.
+        """
+        with self._lock:
+            if source_path in self._pending:
+                return False
+            self._pending.add(source_path)
+            self._submitted += 1
+        self._executor.submit(self._run, source_path, target_path)
+        return True
+
+    def _run(self, source_path, target_path):
+        """
+        Führt eine Verschiebung im Worker-Thread aus und meldet das Ergebnis.
+
+        Jeder Fehler wird gemeldet, nicht nur OSError: `prepare`, das Journal und der Duplikat-Index schreiben
+        in SQLite (z. B. "database is locked"). Die Quelldatei wird in jedem Fall wieder freigegeben, damit sie
+        erneut eingeplant werden kann und der Stapel abgeschlossen wird.
+        """
+        error = journal_id = None
+        try:
+            with messung.span("verschiebung.datei"):
+                target_path, journal_id = self.move(source_path, target_path)
+        except Exception as exc:
+            error = exc
+            messung.count("verschiebung.fehler")
+        else:
+            messung.count("verschiebung.erfolgreich")
+        finally:
+            with self._lock:
+                self._pending.discard(source_path)
+                self._completed += 1
+                completed, total = self._completed, self._submitted
+                batch_done = not self._pending
+                if batch_done:
+                    # Der Stapel ist abgeschlossen, der nächste Fortschritt beginnt wieder bei null.
+                    self._submitted = self._completed = 0
+
+        if batch_done:
+            self._flush()
+
+        if self.on_finished:
+            self.on_finished(source_path, target_path, error, journal_id)
+        if self.on_progress:
+            self.on_progress(completed, total)
+
+    def move(self, source_path, target_path):
+        """
+        Verschiebt eine einzelne Datei.
+
+        Exakte Duplikate einer Datei im Zielordner werden nicht kopiert. Existiert unter dem Zielpfad bereits
+        eine andere Datei, wird ein freier Name gewählt, statt sie zu überschreiben.
+
+        Args:
+            source_path (str): Der Pfad der zu verschiebenden Datei.
+            target_path (str): Der gewünschte Zielpfad.
+
+        Returns:
+            tuple: (target_path, journal_id) mit dem tatsächlich verwendeten Zielpfad und der ID des
+            Journal-Vermerks (oder None ohne Journal).
+        """
+        if self.prepare is not None:
+            target_path = self.prepare(source_path, target_path)
+
+        hashes = None
+        if self.dedup_index is not None:
+            duplicate, hashes = self.dedup_index.find_duplicate(source_path)
+            if duplicate is not None:
+                return self._handle_duplicate(source_path, target_path, duplicate)
+
+        target_path = self._reserve_target(target_path)
+        journal_id = self._begin(source_path, target_path)
+        try:
+            self.mover.move(source_path, target_path)
+        except BaseException:
+            self._abort(journal_id)
+            raise
+        finally:
+            self._release_target(target_path)
+
+        if self.dedup_index is not None:
+            self.dedup_index.add(target_path, hashes)
+        return target_path, journal_id
+
+    def _handle_duplicate(self, source_path, target_path, duplicate):
+        """
+        Behandelt eine Datei, deren Inhalt bereits im Zielordner liegt, ohne Daten zu kopieren.
+        """
+        result = duplicate
+        if self.duplicate_policy == DUPLICATE_LINK and os.path.basename(duplicate) != os.path.basename(target_path):
+            target_path = self._reserve_target(target_path)
+            journal_id = self._begin(source_path, target_path, duplicate)
+            try:
+                os.link(duplicate, target_path)
+                result = target_path
+            except OSError:
+                # Hardlinks werden nicht überall unterstützt; dann bleibt es beim vorhandenen Duplikat.
+                pass
+            finally:
+                self._release_target(target_path)
+            if result == target_path:
+                self.dedup_index.add(target_path)
+        else:
+            journal_id = self._begin(source_path, None, duplicate)
+
+        try:
+            os.unlink(source_path)
+        except BaseException:
+            self._abort(journal_id)
+            raise
+        return result, journal_id
+
+    def _begin(self, source_path, target_path, duplicate_path=None):
+        """
+        Vermerkt eine Verschiebung im Journal, falls eines verwendet wird.
+        """
+        if self.journal is None:
+            return None
+        return self.journal.begin_move(source_path, target_path, duplicate_path)
+
+    def _abort(self, journal_id):
+        """
+        Löscht den Vermerk einer fehlgeschlagenen Verschiebung.
+        """
+        if journal_id is not None:
+            self.journal.abort_move(journal_id)
+
+    def recover(self):
+        """
+        Gleicht die offenen Vermerke des Journals nach einem Absturz mit dem Dateisystem ab. Es werden nur die
+        vermerkten Pfade geprüft, kein Ordner wird durchsucht.
+
+        - Halbe Kopien (`.<name>.partial`) werden gelöscht.
+        - Liegt die Datei vollständig im Ziel, ist die Verschiebung abgeschlossen; eine noch vorhandene Quelle
+          (Kopie über Dateisystemgrenzen vor dem Löschen) wird erst nach fsync des Ziels gelöscht.
+        - Liegt sie noch in der Quelle, hat die Verschiebung nicht stattgefunden; der Vermerk wird gelöscht und
+          die Datei beim nächsten Durchlauf erneut verschoben.
+
+        Muss vor dem ersten `submit` aufgerufen werden.
+
+        Returns:
+            list: Tupel (source_path, target_path, started_at, journal_id) der abgeschlossenen Verschiebungen,
+            deren Verlaufseintrag noch fehlt. Ihre Vermerke werden erst mit diesem Eintrag gelöscht.
+        """
+        if self.journal is None:
+            return []
+        completed = []
+        for journal_id, source_path, target_path, duplicate_path, started_at in self.journal.unfinished_moves():
+            source_exists = os.path.lexists(source_path)
+            result = None
+            if target_path is not None:
+                try:
+                    os.unlink(partial_path_for(target_path))
+                except FileNotFoundError:
+                    pass
+                if os.path.lexists(target_path) and (
+                        not source_exists or os.path.getsize(source_path) == os.path.getsize(target_path)):
+                    result = target_path
+            if result is None and not source_exists and duplicate_path is not None and \
+                    os.path.lexists(duplicate_path):
+                result = duplicate_path
+
+            if result is None:
+                self.journal.abort_move(journal_id)
+                continue
+            if source_exists:
+                _fsync_path(result)
+                _fsync_path(os.path.dirname(result))
+                os.unlink(source_path)
+            completed.append((source_path, result, started_at, journal_id))
+            messung.count("verschiebung.wiederhergestellt")
+        return completed
+
+    def _reserve_target(self, target_path):
+        """
+        Reserviert einen freien Zielpfad, damit parallele Verschiebungen sich nicht überschreiben.
+        """
+        with self._lock:
+            target_path = unique_target_path(target_path, self._reserved_targets)
+            self._reserved_targets.add(target_path)
+        return target_path
+
+    def _release_target(self, target_path):
+        """
+        Gibt einen reservierten Zielpfad wieder frei.
+        """
+        with self._lock:
+            self._reserved_targets.discard(target_path)
+
+    def _flush(self):
+        """
+        Sichert die Kopien des abgeschlossenen Stapels. Fehler dabei lassen die Quelldateien nur liegen.
+        """
+        try:
+            self.mover.flush()
+        except OSError:
+            pass
+
+    def shutdown(self, wait=True):
+        """
+        Beendet den Thread-Pool und sichert alle noch ausstehenden Kopien.
+
+        Args:
+            wait (bool): Ob auf laufende und eingeplante Verschiebungen gewartet werden soll.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self._flush()
+
+
+def unique_target_path(target_path, reserved=()):
+    """
+    Sucht einen freien Zielpfad nach dem Muster "name (1).jpg", falls der gewünschte bereits belegt ist.
+
+    Args:
+        target_path (str): Der gewünschte Zielpfad.
+        reserved (set): Pfade, die bereits für andere Verschiebungen vorgesehen sind.
+
+    Returns:
+        str: Ein Pfad, der weder existiert noch reserviert ist.
+    """
+    if target_path not in reserved and not os.path.lexists(target_path):
+        return target_path
+    stem, extension = os.path.splitext(target_path)
+    counter = 1
+    while True:
+        candidate = f"{stem} ({counter}){extension}"
+        if candidate not in reserved and not os.path.lexists(candidate):
+            return candidate
+        counter += 1
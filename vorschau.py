@@ -0,0 +1,415 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Vorschau Modul:
+
+Dieses Modul enthält die Vorschaubilder für die Tabelle der verschobenen Dateien. Das Dekodieren großer
+JPEG- oder PNG-Dateien ist zu langsam für den GUI-Thread; die Vorschaubilder werden deshalb in einem Pool
+aus Worker-Prozessen mit QImageReader erzeugt. Bei JPEG dekodiert QImageReader dank `setScaledSize` direkt
+in der kleinen Zielgröße, ohne das ganze Bild aufzubauen.
+
+Die fertigen Vorschaubilder liegen in einem inhaltsadressierten Zwischenspeicher auf der Festplatte
+(`vorschau/<ab>/<hash>-<größe>.png`). Inhaltsgleiche Dateien teilen sich also ein Vorschaubild, und ein
+bereits vorhandenes wird nicht neu erzeugt. Damit nicht bei jeder Anfrage die ganze Datei gehasht werden muss,
+merkt sich der Zwischenspeicher zu (Gerät, Inode, Größe, Änderungszeit) einer Datei ihren Schlüssel
+(`vorschau/schluessel.db`); gehasht wird nur, wenn dazu noch kein Schlüssel bekannt ist. Überschreitet der Zwischenspeicher `MAX_CACHE_BYTES`, werden die
+am längsten nicht verwendeten Vorschaubilder gelöscht (LRU); die Reihenfolge steckt in der Änderungszeit der
+Dateien und bleibt daher über Neustarts erhalten.
+
+Klassen:
+- ThumbnailCache: Der inhaltsadressierte Zwischenspeicher mit LRU-Verdrängung.
+- ThumbnailService: Erzeugt Vorschaubilder im Prozess-Pool und liefert sie an die GUI.
+
+Funktionen:
+- content_key(path): Berechnet die Inhaltsadresse einer Datei.
+- render_thumbnail(source_path, cache_directory, size): Erzeugt ein Vorschaubild (im Worker-Prozess).
+"""
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImageReader, QPixmap
+
+import messung
+
+DEFAULT_CACHE_DIR = "vorschau"
+THUMBNAIL_SIZE = 48
+MAX_CACHE_BYTES = 64 * 1024 ** 2
+DEFAULT_MAX_WORKERS = 2
+PIXMAP_CACHE_ENTRIES = 256
+HASH_CHUNK = 1024 * 1024
+THUMBNAIL_SUFFIX = ".png"
+KEY_INDEX_FILE = "schluessel.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (device, inode)
+) WITHOUT ROWID;
+"""
+
+
+def content_key(path):
+    """
+    Berechnet die Inhaltsadresse einer Datei (BLAKE2, wie im Duplikat-Index).
+
+    Args:
+        path (str): Der Pfad der Datei.
+
+    Returns:
+        str: Der Hash als Hex-Text.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(cache_directory, key):
+    """
+    Gibt den Pfad eines Vorschaubilds im Zwischenspeicher zurück.
+    """
+    return os.path.join(cache_directory, key[:2], key + THUMBNAIL_SUFFIX)
+
+
+def render_thumbnail(source_path, cache_directory, size):
+    """
+    Erzeugt das Vorschaubild einer Datei im Zwischenspeicher. Läuft in einem Worker-Prozess.
+
+    Args:
+        source_path (str): Der Pfad der Bilddatei.
+        cache_directory (str): Das Verzeichnis des Zwischenspeichers.
+        size (int): Die maximale Kantenlänge des Vorschaubilds.
+
+    Returns:
+        tuple: (Schlüssel, Größe der Datei in Bytes oder None, falls das Bild nicht lesbar ist, ob es neu erzeugt wurde).
+    """
+    key = f"{content_key(source_path)}-{size}"
+    cache_path = _cache_path(cache_directory, key)
+    try:
+        return key, os.path.getsize(cache_path), False
+    except FileNotFoundError:
+        pass
+
+    reader = QImageReader(source_path)
+    reader.setAutoTransform(True)
+    scaled_size = reader.size()
+    if scaled_size.isValid() and (scaled_size.width() > size or scaled_size.height() > size):
+        scaled_size.scale(size, size, Qt.KeepAspectRatio)
+        reader.setScaledSize(scaled_size)
+    image = reader.read()
+    if image.isNull():
+        return key, None, False
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    if not image.save(temporary_path, "PNG"):
+        raise OSError(f"Vorschaubild für {source_path} konnte nicht gespeichert werden.")
+    os.replace(temporary_path, cache_path)
+    return key, os.path.getsize(cache_path), True
+
+
+class ThumbnailCache:
+    """
+    Der inhaltsadressierte Zwischenspeicher der Vorschaubilder mit LRU-Verdrängung.
+
+    Parameter:
+        directory (str): Das Verzeichnis des Zwischenspeichers.
+        max_bytes (int): Die maximale Gesamtgröße der Vorschaubilder.
+
+    Methoden:
+        path(key): Gibt den Pfad eines Vorschaubilds zurück.
+        add(key, size): Nimmt ein Vorschaubild auf und verdrängt bei Bedarf die ältesten.
+        touch(key): Markiert ein Vorschaubild als zuletzt verwendet.
+        lookup(stat): Gibt den Schlüssel einer unveränderten Datei zurück, ohne sie zu hashen.
+        remember(stat, key): Merkt sich den Schlüssel einer Datei.
+        close(): Schließt den Schlüsselindex.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+        self._connection = sqlite3.connect(os.path.join(directory, KEY_INDEX_FILE), isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _scan(self):
+        """
+        Liest die vorhandenen Vorschaubilder, die ältesten zuerst, und entfernt Reste abgebrochener Schreibvorgänge.
+        """
+        found = []
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith(".tmp"):
+                    os.unlink(entry.path)
+                elif entry.name.endswith(THUMBNAIL_SUFFIX):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime_ns, entry.name[:-len(THUMBNAIL_SUFFIX)], stat.st_size))
+        for _mtime_ns, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+        self._evict()
+
+    def path(self, key):
+        """
+        Gibt den Pfad eines Vorschaubilds zurück.
+
+        Args:
+            key (str): Der Schlüssel des Vorschaubilds.
+
+        Returns:
+            str: Der Pfad im Zwischenspeicher.
+        """
+        return _cache_path(self.directory, key)
+
+    def add(self, key, size):
+        """
+        Nimmt ein Vorschaubild auf und verdrängt die am längsten nicht verwendeten, bis die Grenze eingehalten ist.
+
+        Args:
+            key (str): Der Schlüssel des Vorschaubilds.
+            size (int): Die Größe der Datei in Bytes.
+        """
+        self._total += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._evict()
+
+    def touch(self, key):
+        """
+        Markiert ein Vorschaubild als zuletzt verwendet.
+
+        Args:
+            key (str): Der Schlüssel des Vorschaubilds.
+        """
+        if key not in self._entries:
+            return
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            self._total -= self._entries.pop(key)
+
+    def lookup(self, stat):
+        """
+        Gibt den Schlüssel einer Datei zurück, falls sie seit dem letzten Hashen unverändert ist und ihr
+        Vorschaubild noch im Zwischenspeicher liegt.
+
+        Args:
+            stat (os.stat_result): Der Status der Datei.
+
+        Returns:
+            str: Der Schlüssel oder None.
+        """
+        row = self._connection.execute(
+            "SELECT key FROM keys WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+            (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        return row[0] if row is not None and row[0] in self._entries else None
+
+    def remember(self, stat, key):
+        """
+        Merkt sich den Schlüssel einer Datei. Pro Inode wird nur der neueste Stand gespeichert.
+
+        Args:
+            stat (os.stat_result): Der Status der Datei beim Hashen.
+            key (str): Der Schlüssel ihres Vorschaubilds.
+        """
+        self._connection.execute(
+            "INSERT OR REPLACE INTO keys (device, inode, size, mtime_ns, key) VALUES (?, ?, ?, ?, ?)",
+            (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, key),
+        )
+
+    def close(self):
+        """
+        Schließt den Schlüsselindex.
+        """
+        self._connection.close()
+
+    def _evict(self):
+        """
+        Löscht die am längsten nicht verwendeten Vorschaubilder, bis die Gesamtgröße unter der Grenze liegt.
+        """
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
+            messung.count("vorschau.verdraengt")
+
+
+class ThumbnailService(QObject):
+    """
+    Erzeugt Vorschaubilder im Prozess-Pool und liefert sie an die GUI.
+
+    Alle Methoden werden im GUI-Thread aufgerufen. Die Ergebnisse der Worker-Prozesse kommen über ein Signal
+    in den GUI-Thread zurück; erst dort werden Zwischenspeicher und Zuordnungen geändert.
+
+    Signale:
+        thumbnail_ready: Signal mit dem Pfad der Bilddatei, sobald ihr Vorschaubild bereitsteht.
+
+    Parameter:
+        cache_directory (str): Das Verzeichnis des Zwischenspeichers.
+        max_bytes (int): Die maximale Gesamtgröße des Zwischenspeichers.
+        size (int): Die maximale Kantenlänge der Vorschaubilder.
+        max_workers (int): Die Anzahl der Worker-Prozesse.
+
+    Methoden:
+        supports(path): Gibt an, ob für eine Datei ein Vorschaubild erzeugt werden kann.
+        request(path): Plant die Erzeugung eines Vorschaubilds ein.
+        pixmap(path): Gibt das Vorschaubild zurück, falls es bereitsteht.
+        shutdown(): Beendet die Worker-Prozesse.
+    """
+
+    thumbnail_ready = pyqtSignal(str)
+    _finished = pyqtSignal(str, object, object)
+
+    def __init__(self, cache_directory=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES, size=THUMBNAIL_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS, parent=None):
+        super().__init__(parent)
+        self.cache = ThumbnailCache(cache_directory, max_bytes)
+        self.size = size
+        self.max_workers = max_workers
+        self.extensions = {"." + bytes(name).decode() for name in QImageReader.supportedImageFormats()}
+        self._executor = None
+        self._keys = {}
+        # Pfad -> Status der Datei beim Einplanen, damit ihr Schlüssel danach ohne Hashen gefunden wird.
+        self._pending = {}
+        self._pixmaps = OrderedDict()
+        self._closed = False
+        self._finished.connect(self._handle_finished)
+
+    def supports(self, path):
+        """
+        Gibt an, ob für eine Datei ein Vorschaubild erzeugt werden kann.
+
+        Args:
+            path (str): Der Pfad der Datei.
+
+        Returns:
+            bool: True, wenn QImageReader das Dateiformat lesen kann.
+        """
+        return os.path.splitext(path)[1].lower() in self.extensions
+
+    def request(self, path):
+        """
+        Plant die Erzeugung des Vorschaubilds einer Datei ein, sofern es nicht schon bekannt oder eingeplant ist.
+
+        Ist die Datei seit dem letzten Hashen unverändert und ihr Vorschaubild vorhanden, wird es sofort über
+        `thumbnail_ready` gemeldet, ohne die Datei zu lesen.
+
+        Args:
+            path (str): Der Pfad der Bilddatei.
+        """
+        if path in self._keys or path in self._pending or not self.supports(path):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._keys[path] = None
+            return
+        key = self.cache.lookup(stat)
+        if key is not None:
+            self._keys[path] = key
+            messung.count("vorschau.treffer")
+            self.thumbnail_ready.emit(path)
+            return
+        if self._executor is None:
+            # "spawn" statt fork: Ein geforkter Qt-Prozess mit laufenden Threads ist nicht sicher.
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._pending[path] = stat
+        future = self._executor.submit(render_thumbnail, path, self.cache.directory, self.size)
+        future.add_done_callback(lambda done: self._finished.emit(
+            path, None if done.cancelled() or done.exception() else done.result(),
+            None if done.cancelled() else done.exception()))
+
+    def pixmap(self, path):
+        """
+        Gibt das Vorschaubild einer Datei zurück. Steht es noch nicht bereit, wird es eingeplant und
+        später über `thumbnail_ready` gemeldet.
+
+        Args:
+            path (str): Der Pfad der Bilddatei.
+
+        Returns:
+            QPixmap: Das Vorschaubild oder None.
+        """
+        pixmap = self._pixmaps.get(path)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(path)
+            return pixmap
+        if path not in self._keys:
+            self.request(path)
+            if path not in self._keys:
+                return None
+        key = self._keys[path]
+        if key is None:
+            return None
+
+        pixmap = QPixmap(self.cache.path(key))
+        if pixmap.isNull():
+            # Inzwischen verdrängt: neu erzeugen.
+            del self._keys[path]
+            self.request(path)
+            return None
+        self.cache.touch(key)
+        self._pixmaps[path] = pixmap
+        if len(self._pixmaps) > PIXMAP_CACHE_ENTRIES:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def _handle_finished(self, path, result, error):
+        """
+        Übernimmt das Ergebnis eines Worker-Prozesses im GUI-Thread.
+        """
+        stat = self._pending.pop(path, None)
+        if self._closed:
+            return
+        if error is not None or result is None:
+            # Nicht lesbar, verschwunden oder abgebrochen: kein Vorschaubild für diesen Pfad.
+            self._keys[path] = None
+            return
+        key, size, created = result
+        if size is None:
+            self._keys[path] = None
+            return
+        self.cache.add(key, size)
+        if stat is not None:
+            self.cache.remember(stat, key)
+        self._keys[path] = key
+        messung.count("vorschau.erzeugt" if created else "vorschau.treffer")
+        self.thumbnail_ready.emit(path)
+
+    def shutdown(self):
+        """
+        Beendet die Worker-Prozesse und schließt den Schlüsselindex; noch nicht begonnene Aufträge werden verworfen.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.cache.close()
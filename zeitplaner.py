@@ -0,0 +1,619 @@
+"""
+Author: Taha Al-Bukhaiti
+
+Zeitplaner Modul:
+
+Dieses Modul enthält die geplanten Aufgaben der Automatisierung. Die Aufgaben werden aus einer JSON-Datei
+geladen; jede hat einen Namen, eine Beschreibung, einen Auslöser (cron-Ausdruck oder festes Intervall) und eine
+Aktion (ein Befehl oder eine Benachrichtigung). Jede Ausführung wird mit Ergebnis im Aufgabenverlauf gespeichert.
+
+Die nächsten Ausführungszeitpunkte aller Aufgaben liegen in einem Min-Heap. Der Aufrufer braucht genau einen
+Timer (bzw. ein select-Timeout), der auf den vordersten Zeitpunkt gestellt wird; es wird nichts abgefragt,
+und tausende Aufgaben kosten im Leerlauf nichts. Die Aktionen laufen in einem Thread-Pool.
+
+Beispiel für aufgaben.json:
+    {
+        "tasks": [
+            {"name": "Sicherung", "description": "Bilder sichern", "cron": "30 2 * * *",
+             "action": {"command": ["rsync", "-a", "/home/ich/Documents/Bilder", "/mnt/sicherung"]}},
+            {"name": "Pause", "description": "Kurz aufstehen", "interval": 3600,
+             "action": {"notify": "Zeit für eine Pause"}}
+        ]
+    }
+
+Cron-Ausdrücke haben fünf Felder (Minute, Stunde, Tag, Monat, Wochentag mit 0 = Sonntag) und unterstützen
+`*`, Listen (`1,15`), Bereiche (`1-5`) und Schritte (`*/10`, `0-30/5`, `5/10`).
+
+Klassen:
+- CronTrigger: Ein Auslöser nach einem cron-Ausdruck.
+- IntervalTrigger: Ein Auslöser in festen Abständen.
+- Task: Eine geplante Aufgabe.
+- TaskRunStore: Der Verlauf der Ausführungen.
+- Scheduler: Der Zeitplaner aller Aufgaben.
+
+Funktionen:
+- load_tasks(path): Lädt die Aufgaben aus einer JSON-Datei.
+- save_tasks(path, tasks): Speichert die Aufgaben in einer JSON-Datei.
+"""
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+DEFAULT_TASKS_FILE = "aufgaben.json"
+DEFAULT_RUNS_FILE = "aufgabenverlauf.db"
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_COMMAND_TIMEOUT = 3600
+# Der Timer wird höchstens so weit gestellt, damit Änderungen der Systemuhr bald bemerkt werden.
+MAX_TIMEOUT = 3600
+
+STATUS_OK = "ok"
+STATUS_FAILED = "fehler"
+STATUS_SKIPPED = "übersprungen"
+
+logger = logging.getLogger(__name__)
+
+_CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    task TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_task ON runs (task, started_at);
+"""
+
+
+def _parse_cron_field(text, low, high):
+    """
+    Wandelt ein Feld eines cron-Ausdrucks in die Menge der erlaubten Werte um.
+    """
+    values = set()
+    for part in text.split(","):
+        part, _slash, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step:
+                # Wie bei cron bedeutet "5/10" 5, 15, 25, ... bis zum Ende des Felds.
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f"Ungültiges cron-Feld: {text!r}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronTrigger:
+    """
+    Ein Auslöser nach einem cron-Ausdruck mit fünf Feldern.
+
+    Wie bei cron genügt es, wenn Tag oder Wochentag passt, sofern beide eingeschränkt sind.
+
+    Parameter:
+        expression (str): Der cron-Ausdruck, z. B. "*/15 8-18 * * 1-5".
+
+    Methoden:
+        next_after(timestamp, last_run): Gibt den nächsten Zeitpunkt nach `timestamp` zurück.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Ein cron-Ausdruck hat fünf Felder: {expression!r}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, _CRON_FIELDS)
+        )
+        # 7 ist wie 0 der Sonntag.
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, timestamp, last_run=None):
+        """
+        Gibt den nächsten passenden Zeitpunkt nach `timestamp` (lokale Zeit) zurück.
+
+        Args:
+            timestamp (float): Der Zeitpunkt in Sekunden seit der Epoche.
+            last_run (float): Wird für cron-Auslöser nicht benötigt.
+
+        Returns:
+            float: Der nächste Zeitpunkt in Sekunden seit der Epoche.
+        """
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Jeder Schritt springt zum Anfang des nächsten Monats, Tags, der nächsten Stunde oder Minute;
+        # nach spätestens einigen Jahren ist ein passender Tag gefunden (z. B. 29. Februar).
+        limit = moment + timedelta(days=366 * 8)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return time.mktime(moment.timetuple())
+        raise ValueError(f"Der cron-Ausdruck {self.expression!r} trifft nie zu.")
+
+    def to_dict(self):
+        return {"cron": self.expression}
+
+
+class IntervalTrigger:
+    """
+    Ein Auslöser in festen Abständen, gemessen vom Beginn der letzten Ausführung.
+
+    Parameter:
+        seconds (float): Der Abstand in Sekunden.
+
+    Methoden:
+        next_after(timestamp, last_run): Gibt den nächsten Zeitpunkt nach `timestamp` zurück.
+    """
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Das Intervall muss positiv sein.")
+        self.seconds = seconds
+
+    def next_after(self, timestamp, last_run=None):
+        """
+        Gibt den nächsten Zeitpunkt zurück. Eine während einer Pause versäumte Ausführung wird einmal sofort
+        nachgeholt, nicht mehrfach.
+
+        Args:
+            timestamp (float): Der aktuelle Zeitpunkt in Sekunden seit der Epoche.
+            last_run (float): Der Beginn der letzten Ausführung oder None.
+
+        Returns:
+            float: Der nächste Zeitpunkt in Sekunden seit der Epoche.
+        """
+        if last_run is None:
+            return timestamp + self.seconds
+        return max(last_run + self.seconds, timestamp)
+
+    def to_dict(self):
+        return {"interval": self.seconds}
+
+
+class Task:
+    """
+    Eine geplante Aufgabe.
+
+    Attribute:
+        name (str): Der eindeutige Name der Aufgabe.
+        description (str): Die Beschreibung.
+        trigger (CronTrigger | IntervalTrigger): Der Auslöser.
+        action (dict): Die Aktion: {"command": [...], "timeout": Sekunden} oder {"notify": "Text"}.
+        enabled (bool): Ob die Aufgabe ausgeführt wird.
+
+    Methoden:
+        run(): Führt die Aktion aus (im Worker-Thread).
+    """
+
+    def __init__(self, name, trigger, action, description="", enabled=True):
+        if "command" not in action and "notify" not in action:
+            raise ValueError(f"Aufgabe {name!r}: Die Aktion braucht 'command' oder 'notify'.")
+        self.name = name
+        self.trigger = trigger
+        self.action = action
+        self.description = description
+        self.enabled = enabled
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Erstellt eine Aufgabe aus einem Eintrag der Aufgabendatei.
+
+        Args:
+            data (dict): Der Eintrag mit den Schlüsseln name, description, cron oder interval, action und enabled.
+
+        Returns:
+            Task: Die erstellte Aufgabe.
+        """
+        if "cron" in data:
+            trigger = CronTrigger(data["cron"])
+        elif "interval" in data:
+            trigger = IntervalTrigger(data["interval"])
+        else:
+            raise ValueError(f"Aufgabe {data.get('name')!r}: 'cron' oder 'interval' fehlt.")
+        return cls(data["name"], trigger, data["action"], data.get("description", ""), data.get("enabled", True))
+
+    def to_dict(self):
+        """
+        Gibt den Eintrag der Aufgabe für die Aufgabendatei zurück.
+        """
+        data = {"name": self.name, "description": self.description}
+        data.update(self.trigger.to_dict())
+        data["action"] = self.action
+        if not self.enabled:
+            data["enabled"] = False
+        return data
+
+    def run(self):
+        """
+        Führt die Aktion aus.
+
+        Returns:
+            str: Die Meldung der Aktion (Benachrichtigungstext bzw. letzte Ausgabezeile des Befehls).
+
+        Raises:
+            OSError, subprocess.SubprocessError: Wenn der Befehl nicht ausgeführt werden kann oder fehlschlägt.
+        """
+        if "notify" in self.action:
+            return self.action["notify"]
+        result = subprocess.run(self.action["command"], capture_output=True, text=True, check=True,
+                                timeout=self.action.get("timeout", DEFAULT_COMMAND_TIMEOUT))
+        lines = result.stdout.strip().splitlines()
+        return lines[-1] if lines else ""
+
+
+def load_tasks(path=DEFAULT_TASKS_FILE):
+    """
+    Lädt die Aufgaben aus einer JSON-Datei. Existiert die Datei nicht, gibt es keine Aufgaben.
+
+    Args:
+        path (str): Der Pfad der Aufgabendatei.
+
+    Returns:
+        list: Die Aufgaben.
+
+    Raises:
+        OSError: Wenn die Datei nicht gelesen werden kann.
+        ValueError, KeyError, TypeError: Wenn die Datei kein gültiges JSON ist oder ein Eintrag ungültig ist.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as file:
+        return [Task.from_dict(entry) for entry in json.load(file)["tasks"]]
+
+
+def save_tasks(path, tasks):
+    """
+    Speichert die Aufgaben atomar in einer JSON-Datei.
+
+    Args:
+        path (str): Der Pfad der Aufgabendatei.
+        tasks (iterable): Die Aufgaben.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as file:
+        json.dump({"tasks": [task.to_dict() for task in tasks]}, file, indent=4, ensure_ascii=False)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+class TaskRunStore:
+    """
+    Der Verlauf der Ausführungen aller Aufgaben.
+
+    Parameter:
+        path (str): Der Pfad der Datenbankdatei.
+
+    Methoden:
+        record(task, started_at, finished_at, status, message): Speichert eine Ausführung.
+        last_started(task): Gibt den Beginn der letzten Ausführung einer Aufgabe zurück.
+        runs(task, limit): Gibt die letzten Ausführungen einer Aufgabe zurück.
+        close(): Schließt die Datenbank.
+    """
+
+    def __init__(self, path=DEFAULT_RUNS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def record(self, task, started_at, finished_at, status, message=None):
+        """
+        Speichert eine Ausführung.
+
+        Args:
+            task (str): Der Name der Aufgabe.
+            started_at (float): Der Beginn in Sekunden seit der Epoche.
+            finished_at (float): Das Ende in Sekunden seit der Epoche.
+            status (str): STATUS_OK, STATUS_FAILED oder STATUS_SKIPPED.
+            message (str): Die Meldung der Aktion bzw. der Fehler.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO runs (task, started_at, finished_at, status, message) VALUES (?, ?, ?, ?, ?)",
+                (task, started_at, finished_at, status, message),
+            )
+
+    def last_started(self, task):
+        """
+        Gibt den Beginn der letzten Ausführung einer Aufgabe zurück.
+
+        Args:
+            task (str): Der Name der Aufgabe.
+
+        Returns:
+            float: Der Beginn in Sekunden seit der Epoche oder None.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT MAX(started_at) FROM runs WHERE task = ? AND status != ?", (task, STATUS_SKIPPED)
+            ).fetchone()[0]
+
+    def runs(self, task, limit=20):
+        """
+        Gibt die letzten Ausführungen einer Aufgabe zurück, die neuesten zuerst.
+
+        Args:
+            task (str): Der Name der Aufgabe.
+            limit (int): Die maximale Anzahl.
+
+        Returns:
+            list: Tupel (started_at, finished_at, status, message).
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT started_at, finished_at, status, message FROM runs WHERE task = ? "
+                "ORDER BY started_at DESC LIMIT ?",
+                (task, limit),
+            ).fetchall()
+
+    def close(self):
+        """
+        Schließt die Datenbank.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+class Scheduler:
+    """
+    Der Zeitplaner aller Aufgaben.
+
+    `next_timeout` und `run_due` werden vom Aufrufer aus einem einzigen Thread aufgerufen (GUI-Thread bzw.
+    select-Schleife). Der Heap enthält pro Aufgabe einen Eintrag mit einer Versionsnummer; Einträge geänderter
+    oder entfernter Aufgaben werden beim Entnehmen verworfen, statt sie im Heap zu suchen.
+
+    Parameter:
+        tasks_file (str): Der Pfad der Aufgabendatei.
+        runs_file (str): Der Pfad der Datenbank des Aufgabenverlaufs.
+        max_workers (int): Die maximale Anzahl gleichzeitig laufender Aktionen.
+        on_finished (callable): Wird im Worker-Thread mit (name, status, message) aufgerufen, sobald eine
+            Ausführung beendet ist.
+
+    Methoden:
+        reload(): Lädt die Aufgabendatei neu; bei einem Fehler bleibt der bisherige Zeitplan.
+        add_task(task): Fügt eine Aufgabe hinzu oder ersetzt sie und speichert die Aufgabendatei.
+        remove_task(name): Entfernt eine Aufgabe und speichert die Aufgabendatei.
+        next_run(name): Gibt den nächsten Ausführungszeitpunkt einer Aufgabe zurück.
+        next_timeout(): Gibt die Zeit bis zur nächsten fälligen Aufgabe zurück.
+        run_due(): Startet alle fälligen Aufgaben.
+        shutdown(wait): Beendet den Thread-Pool und schließt den Aufgabenverlauf.
+    """
+
+    def __init__(self, tasks_file=DEFAULT_TASKS_FILE, runs_file=DEFAULT_RUNS_FILE, max_workers=DEFAULT_MAX_WORKERS,
+                 on_finished=None):
+        self.tasks_file = tasks_file
+        self.on_finished = on_finished
+        self.runs = TaskRunStore(runs_file)
+        self.tasks = {}
+        self._heap = []
+        self._next_runs = {}
+        self._versions = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._running = set()
+        # Anzahl eingereichter, noch nicht beendeter Ausführungen; der Verlauf wird erst nach der letzten geschlossen.
+        self._active = 0
+        self._closing = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aufgabe")
+        self.reload()
+
+    def reload(self):
+        """
+        Lädt die Aufgabendatei neu und plant alle Aufgaben neu ein. Ist die Datei fehlerhaft, wird der Fehler
+        protokolliert und der bisherige Zeitplan beibehalten.
+
+        Returns:
+            bool: True, falls die Aufgaben geladen wurden, ansonsten False.
+        """
+        try:
+            tasks = {task.name: task for task in load_tasks(self.tasks_file)}
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logger.error("Aufgaben aus %s konnten nicht geladen werden, der bisherige Zeitplan bleibt: %s",
+                         self.tasks_file, error)
+            return False
+        now = time.time()
+        self.tasks = tasks
+        self._heap = []
+        self._next_runs = {}
+        for task in self.tasks.values():
+            self._schedule(task, now, push=False)
+        heapq.heapify(self._heap)
+        return True
+
+    def add_task(self, task):
+        """
+        Fügt eine Aufgabe hinzu oder ersetzt die gleichnamige und speichert die Aufgabendatei.
+
+        Args:
+            task (Task): Die Aufgabe.
+        """
+        self.tasks[task.name] = task
+        save_tasks(self.tasks_file, self.tasks.values())
+        self._schedule(task, time.time())
+
+    def remove_task(self, name):
+        """
+        Entfernt eine Aufgabe und speichert die Aufgabendatei. Ihr Eintrag im Heap wird beim Entnehmen verworfen.
+
+        Args:
+            name (str): Der Name der Aufgabe.
+        """
+        if self.tasks.pop(name, None) is None:
+            return
+        self._versions[name] = self._versions.get(name, 0) + 1
+        self._next_runs.pop(name, None)
+        save_tasks(self.tasks_file, self.tasks.values())
+
+    def next_run(self, name):
+        """
+        Gibt den nächsten Ausführungszeitpunkt einer Aufgabe zurück.
+
+        Args:
+            name (str): Der Name der Aufgabe.
+
+        Returns:
+            float: Der Zeitpunkt in Sekunden seit der Epoche oder None, falls die Aufgabe nicht eingeplant ist.
+        """
+        return self._next_runs.get(name)
+
+    def _schedule(self, task, now, push=True, last_run=None):
+        """
+        Berechnet den nächsten Zeitpunkt einer Aufgabe und legt ihn mit neuer Versionsnummer in den Heap.
+        """
+        version = self._versions.get(task.name, 0) + 1
+        self._versions[task.name] = version
+        self._next_runs.pop(task.name, None)
+        if not task.enabled:
+            return
+        if last_run is None and isinstance(task.trigger, IntervalTrigger):
+            last_run = self.runs.last_started(task.name)
+        next_run = task.trigger.next_after(now, last_run)
+        self._next_runs[task.name] = next_run
+        entry = (next_run, next(self._counter), task.name, version)
+        if push:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._heap.append(entry)
+
+    def _discard_stale(self):
+        """
+        Entfernt veraltete Einträge von der Spitze des Heaps.
+        """
+        while self._heap and self._versions.get(self._heap[0][2]) != self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def next_timeout(self):
+        """
+        Gibt die Zeit bis zur nächsten fälligen Aufgabe zurück.
+
+        Returns:
+            float: Die Wartezeit in Sekunden (höchstens MAX_TIMEOUT) oder None, falls keine Aufgabe eingeplant ist.
+        """
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return min(MAX_TIMEOUT, max(0.0, self._heap[0][0] - time.time()))
+
+    def run_due(self):
+        """
+        Startet alle fälligen Aufgaben im Thread-Pool und plant ihre nächste Ausführung ein. Läuft eine Aufgabe
+        noch von ihrer letzten Ausführung, wird die neue übersprungen.
+
+        Returns:
+            int: Die Anzahl gestarteter Aufgaben.
+        """
+        started = 0
+        now = time.time()
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return started
+            _next_run, _order, name, _version = heapq.heappop(self._heap)
+            task = self.tasks[name]
+            self._schedule(task, now, last_run=now)
+            with self._lock:
+                busy = name in self._running
+                if not busy:
+                    self._running.add(name)
+            if busy:
+                self._finish(task, now, STATUS_SKIPPED, "Die letzte Ausführung läuft noch.")
+                continue
+            with self._lock:
+                self._active += 1
+            self._executor.submit(self._execute, task, now).add_done_callback(self._release)
+            started += 1
+
+    def _execute(self, task, started_at):
+        """
+        Führt eine Aufgabe im Worker-Thread aus und speichert das Ergebnis.
+        """
+        try:
+            message = task.run()
+            status = STATUS_OK
+        except subprocess.CalledProcessError as error:
+            status = STATUS_FAILED
+            output = (error.stderr or error.stdout or "").strip().splitlines()
+            message = output[-1] if output else f"Exit-Code {error.returncode}"
+        except Exception as error:
+            # Auch eine fehlerhafte Aktion (z. B. ein falscher Typ in der Aufgabendatei) wird als Fehlschlag
+            # gespeichert, statt im Future verloren zu gehen.
+            status = STATUS_FAILED
+            message = str(error) or type(error).__name__
+        finally:
+            with self._lock:
+                self._running.discard(task.name)
+        self._finish(task, started_at, status, message)
+
+    def _finish(self, task, started_at, status, message):
+        """
+        Speichert eine Ausführung im Verlauf und meldet sie weiter. Kann der Verlauf nicht geschrieben werden,
+        wird die Ausführung trotzdem gemeldet.
+        """
+        try:
+            self.runs.record(task.name, started_at, time.time(), status, message)
+        except sqlite3.Error:
+            logger.exception("Ausführung der Aufgabe %s konnte nicht gespeichert werden", task.name)
+        if self.on_finished:
+            self.on_finished(task.name, status, message)
+
+    def _release(self, _future):
+        """
+        Zählt eine beendete oder verworfene Ausführung ab und schließt den Verlauf nach der letzten, falls der
+        Zeitplaner schon beendet wurde.
+        """
+        with self._lock:
+            self._active -= 1
+            close = self._closing and self._active == 0
+        if close:
+            self.runs.close()
+
+    def shutdown(self, wait=True):
+        """
+        Beendet den Thread-Pool und schließt den Aufgabenverlauf. Mehrfache Aufrufe sind erlaubt.
+
+        Args:
+            wait (bool): Ob auf laufende Aufgaben gewartet werden soll. Ohne Warten kehrt der Aufruf sofort
+                zurück und noch nicht begonnene Ausführungen werden verworfen; laufende Befehle laufen im
+                Hintergrund zu Ende, werden noch im Verlauf gespeichert, und erst danach wird er geschlossen.
+        """
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+        with self._lock:
+            self._closing = True
+            close = self._active == 0
+        if close:
+            self.runs.close()